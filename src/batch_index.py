@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+
+import argparse
+import json
+import math
+import sys
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional, Tuple
+from index import is_coordinate, is_positive_int, is_valid_csv_file
+from search_restaurants_program import FilterRestaurantsCSVProgram
+from models.restaurant_criteria import RestaurantCriteria
+from ranking.top_k import DEFAULT_LIMIT
+
+
+def main(args) -> List[Dict[str, Any]]:
+    '''
+    Reads one JSON query per line and writes one JSON result per line, in the
+    same order. Every valid query is answered in a single pass over the CSVs.
+    '''
+
+    program = FilterRestaurantsCSVProgram(
+        restaurant_file_name=args.restaurant_file, cuisine_file_name=args.cuisine_file,
+        use_snapshot=args.snapshot)
+
+    results: List[Dict[str, Any]] = []
+    criterias: List[RestaurantCriteria] = []
+    limits: List[int] = []
+    answered: List[Dict[str, Any]] = []
+
+    for line_number, line in enumerate(args.queries, 1):
+        if not line.strip():
+            continue
+        result: Dict[str, Any] = {'line': line_number}
+        try:
+            query = json.loads(line)
+            if isinstance(query, dict) and 'id' in query:
+                result['id'] = query['id']
+            criteria, limit = parse_query(query, args.limit)
+        except ValueError as error:
+            result['error'] = str(error)
+        else:
+            criterias.append(criteria)
+            limits.append(limit)
+            answered.append(result)
+        results.append(result)
+
+    top_restaurants = program.get_best_matched_restaurants_for_each(
+        criterias, limits)
+    for result, restaurants in zip(answered, top_restaurants):
+        result['restaurants'] = [asdict(restaurant)
+                                 for restaurant in restaurants]
+
+    for result in results:
+        args.output.write(json.dumps(result) + '\n')
+    args.output.flush()
+
+    return results
+
+
+def parse_query(query: Any, default_limit: int) -> Tuple[RestaurantCriteria, int]:
+    '''
+    Validates a JSON query the same way index.py validates its arguments.
+    Queries use the long argument names of index.py: name, distance, price,
+    customer_rating, cuisine, origin, fuzzy and limit, all optional, with
+    origin given as a [latitude, longitude] array and fuzzy the typos allowed
+    in the name. Values must have their JSON type, so a limit of 2.5 or a
+    distance of "3" is invalid rather than converted. Raises a ValueError
+    describing the first invalid value.
+    '''
+
+    if not isinstance(query, dict):
+        raise ValueError('query must be a JSON object')
+
+    unknown_keys = set(query) - {'id', 'name', 'distance',
+                                 'price', 'customer_rating', 'cuisine', 'origin', 'fuzzy', 'limit'}
+    if unknown_keys:
+        raise ValueError(f'unknown query keys {sorted(unknown_keys)}')
+
+    distance = _optional(query.get('distance'), _positive_number, 'distance')
+    price = _optional(query.get('price'), _positive_number, 'price')
+    limit = _optional(query.get('limit'), _positive_integer, 'limit')
+    max_name_edits = _optional(query.get('fuzzy'), _positive_integer, 'fuzzy')
+    try:
+        origin = _optional(query.get('origin'), _parse_origin)
+    except argparse.ArgumentTypeError as error:
+        raise ValueError(str(error))
+
+    customer_rating = query.get('customer_rating')
+    if customer_rating is not None and (type(customer_rating) is not int or customer_rating not in range(1, 6)):
+        raise ValueError(
+            f'{customer_rating} is an invalid customer rating, choose from 1-5')
+
+    for key in ['name', 'cuisine']:
+        if query.get(key) is not None and not isinstance(query[key], str):
+            raise ValueError(f'{query[key]} is an invalid {key}')
+
+    criteria = RestaurantCriteria(
+        restaurant_name=query.get('name'),
+        max_distance=distance,
+        max_price=price,
+        min_customer_rating=customer_rating,
+        cuisine=query.get('cuisine'),
+        origin=origin,
+        max_name_edits=max_name_edits
+    )
+    return criteria, default_limit if limit is None else limit
+
+
+def _parse_origin(origin: Any) -> Tuple[float, float]:
+    if not isinstance(origin, list) or not all(type(coordinate) in (int, float) for coordinate in origin):
+        raise ValueError(f'{origin} is an invalid origin, give [latitude, longitude]')
+    return is_coordinate(','.join(map(str, origin)))
+
+
+def _positive_number(value: Any, key: str) -> float:
+    # bool is a subclass of int, but true is not a number in JSON
+    if type(value) not in (int, float) or not math.isfinite(value) or value <= 0:
+        raise ValueError(f'{value} is an invalid {key}, give a positive number')
+    return float(value)
+
+
+def _positive_integer(value: Any, key: str) -> int:
+    if type(value) is not int or value <= 0:
+        raise ValueError(f'{value} is an invalid {key}, give a positive integer')
+    return value
+
+
+def _optional(value: Optional[Any], validate, *args: Any) -> Optional[Any]:
+    return None if value is None else validate(value, *args)
+
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description='Answer many restaurant searches, given as JSON Lines, in one pass over the CSV data.')
+    parser.add_argument('queries', nargs='?', type=argparse.FileType('r'), default=sys.stdin,
+                        help='JSON Lines file of queries, one JSON object per line using the long argument '
+                        'names of index.py (name, distance, price, customer_rating, cuisine, origin, fuzzy, limit). Defaults to stdin')
+    parser.add_argument('-o', '--output', type=argparse.FileType('w'), default=sys.stdout,
+                        help='File to write the JSON Lines results to. Defaults to stdout')
+    parser.add_argument('-f', '--restaurant-file', type=is_valid_csv_file,
+                        help='Name of restaurant data csv located in src/csv. Must contain .csv', default='restaurants.csv')
+    parser.add_argument('--cuisine-file', type=is_valid_csv_file,
+                        help='Name of cuisines data csv located in src/csv. Must contain .csv', default='cuisines.csv')
+    parser.add_argument('--snapshot', action=argparse.BooleanOptionalAction, default=False,
+                        help='Load every restaurant from a cached snapshot of the CSVs, rebuilt when they change, '
+                        'rather than parsing the CSVs. Defaults to parsing')
+    parser.add_argument('-k', '--limit', type=is_positive_int, default=DEFAULT_LIMIT,
+                        help=f'Max number of restaurants per query when the query has no limit, defaults to {DEFAULT_LIMIT}')
+    return parser
+
+
+if __name__ == '__main__':
+    main(make_parser().parse_args())
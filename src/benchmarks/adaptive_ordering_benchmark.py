@@ -0,0 +1,91 @@
+'''
+Compares filtering generated restaurants with the criteria in their fixed
+order (rating, distance, price, cuisine, name) against the
+AdaptiveAndSpecification, which reorders them by measured cost and
+selectivity. The first searches are skewed so the fixed order checks the
+criteria nearly every restaurant passes first and the selective name last,
+the last is already well ordered and shows the cost of measuring.
+
+Run from src/ with `python -m benchmarks.adaptive_ordering_benchmark --rows 200000`
+'''
+
+import argparse
+import os
+import time
+from typing import Callable, Dict, List
+from benchmarks.generate_data import benchmark_file_names, generate
+from models.restaurant import Restaurant
+from models.restaurant_criteria import RestaurantCriteria
+from search_restaurants_program import DEFAULT_CHUNK_SIZE, FilterRestaurantsCSVProgram
+
+# Searches whose cheap criteria let nearly everything through while a name
+# prefix of the Zipf tail rejects nearly everything
+SKEWED_SEARCHES: Dict[str, RestaurantCriteria] = {
+    'rare name, loose numbers': RestaurantCriteria(
+        restaurant_name='harvest', max_distance=10, max_price=50, min_customer_rating=1, cuisine=None),
+    'rare name and cuisine': RestaurantCriteria(
+        restaurant_name='smoke', max_distance=9.5, max_price=45, min_customer_rating=2, cuisine='a'),
+    'already well ordered': RestaurantCriteria(
+        restaurant_name='grill', max_distance=1, max_price=15, min_customer_rating=5, cuisine=None),
+}
+
+
+def best_seconds(function: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(rows: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    restaurant_file_name, cuisine_file_name = benchmark_file_names(rows)
+    if not os.path.exists('csv/'+restaurant_file_name):
+        generate(rows, 'csv/'+restaurant_file_name, 'csv/'+cuisine_file_name)
+    program = FilterRestaurantsCSVProgram(
+        cuisine_file_name, restaurant_file_name)
+    chunks: List[List[Restaurant]] = list(
+        program.read_restaurant_chunks(DEFAULT_CHUNK_SIZE))
+
+    results: Dict[str, Dict[str, float]] = {}
+    for search, criteria in SKEWED_SEARCHES.items():
+        is_valid_restaurant = program._compile_criteria(criteria)
+
+        def fixed_order() -> List[Restaurant]:
+            return [r for chunk in chunks for r in filter(is_valid_restaurant, chunk)]
+
+        def adaptive_order() -> List[Restaurant]:
+            valid_restaurant = program._adaptive_criteria_specification()
+            return [r for chunk in chunks for r in valid_restaurant.filter(chunk, criteria)]
+
+        assert fixed_order() == adaptive_order()
+        results[search] = {
+            'fixed': best_seconds(fixed_order, repeat),
+            'adaptive': best_seconds(adaptive_order, repeat),
+        }
+    return results
+
+
+def main(args) -> None:
+    results = run(args.rows, args.repeat)
+    print("{:<30}{:>14}{:>14}{:>10}".format(
+        'Search', 'Fixed (ms)', 'Adaptive (ms)', 'Speedup'))
+    for search, seconds in results.items():
+        print("{:<30}{:>14.1f}{:>14.1f}{:>9.2f}x".format(
+            search, seconds['fixed'] * 1000, seconds['adaptive'] * 1000,
+            seconds['fixed'] / seconds['adaptive']))
+
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description='Compare fixed and adaptive ordering of the criteria on skewed searches.')
+    parser.add_argument('--rows', type=int, default=200000,
+                        help='Number of generated restaurants to filter, defaults to 200000')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Times each search is timed, the best is kept, defaults to 5')
+    return parser
+
+
+if __name__ == '__main__':
+    main(make_parser().parse_args())
@@ -0,0 +1,56 @@
+'''
+Micro-benchmark of the per restaurant cost of checking a RestaurantCriteria,
+comparing evaluating the specification tree against the compiled predicate.
+
+Run from src/ with `python -m benchmarks.compiled_specification_benchmark`
+'''
+
+import timeit
+from typing import List
+from search_restaurants_program import FilterRestaurantsCSVProgram
+from models.restaurant import Restaurant
+from models.restaurant_criteria import RestaurantCriteria
+from specifications.compiler import compile_specification
+from specifications.restaurant import restaurant_criteria_specification
+
+CRITERIAS = {
+    'no criteria': RestaurantCriteria(restaurant_name=None, max_distance=None, max_price=None,
+                                      min_customer_rating=None, cuisine=None),
+    'distance': RestaurantCriteria(restaurant_name=None, max_distance=5, max_price=None,
+                                   min_customer_rating=None, cuisine=None),
+    'all criteria': RestaurantCriteria(restaurant_name='delic', max_distance=9, max_price=40,
+                                       min_customer_rating=2, cuisine='a'),
+}
+
+
+def time_per_row(restaurants: List[Restaurant], check, repeat: int = 5, number: int = 20) -> float:
+    '''Returns the best time, in nanoseconds, to check one restaurant'''
+
+    def run():
+        for restaurant in restaurants:
+            check(restaurant)
+
+    best = min(timeit.repeat(run, repeat=repeat, number=number))
+    return best / (number * len(restaurants)) * 1e9
+
+
+def main() -> None:
+    restaurants = list(FilterRestaurantsCSVProgram(
+        'cuisines.csv', 'restaurants.csv').read_restaurants())
+    restaurants *= 50
+
+    print("{:<16}{:>16}{:>16}{:>10}".format(
+        'Criteria', 'Tree (ns/row)', 'Compiled', 'Speedup'))
+    for label, criteria in CRITERIAS.items():
+        specification = restaurant_criteria_specification()
+        compiled = compile_specification(specification, criteria)
+
+        tree_time = time_per_row(
+            restaurants, lambda r: specification.is_satisfied_by(r, criteria))
+        compiled_time = time_per_row(restaurants, compiled)
+        print("{:<16}{:>16.1f}{:>16.1f}{:>9.1f}x".format(
+            label, tree_time, compiled_time, tree_time / compiled_time))
+
+
+if __name__ == '__main__':
+    main()
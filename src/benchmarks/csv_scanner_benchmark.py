@@ -0,0 +1,103 @@
+'''
+Measures the rows per second read from a generated restaurant csv by
+csv.DictReader and by the memory mapped CSVScanner, on their own and when
+parsing the rows into Restaurants for a search, with every criteria pushed
+down to the rows.
+
+Run from src/ with `python -m benchmarks.csv_scanner_benchmark --rows 1000000`
+'''
+
+import argparse
+import csv
+import os
+import time
+from typing import Callable, Dict, Optional
+from benchmarks.generate_data import benchmark_file_names, generate
+from catalog.csv_scanner import CSVScanner
+from models.restaurant_criteria import RestaurantCriteria
+from search_restaurants_program import DEFAULT_CHUNK_SIZE, FilterRestaurantsCSVProgram
+
+SEARCHES: Dict[str, Optional[RestaurantCriteria]] = {
+    'every row': None,
+    'distance': RestaurantCriteria(restaurant_name=None, max_distance=2, max_price=None,
+                                   min_customer_rating=None, cuisine=None),
+    'all criteria': RestaurantCriteria(restaurant_name='delic', max_distance=9, max_price=40,
+                                       min_customer_rating=2, cuisine='a'),
+}
+
+
+def best_time(function: Callable[[], None], repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(rows: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    '''Returns the rows per second of DictReader and the CSVScanner in each case'''
+
+    restaurant_file_name, cuisine_file_name = benchmark_file_names(rows)
+    if not os.path.exists('csv/'+restaurant_file_name):
+        generate(rows, 'csv/'+restaurant_file_name, 'csv/'+cuisine_file_name)
+    path = 'csv/'+restaurant_file_name
+    program = FilterRestaurantsCSVProgram(cuisine_file_name, restaurant_file_name)
+    cuisines = program._build_cuisines_map()
+
+    def read_dicts() -> None:
+        with open(path, 'r') as csvfile:
+            for _ in csv.DictReader(csvfile):
+                pass
+
+    def scan_fields() -> None:
+        with CSVScanner(path) as scanner:
+            for lines in scanner.line_chunks(DEFAULT_CHUNK_SIZE):
+                for line in lines:
+                    line.split(b',')
+
+    def parse_dicts(criteria: Optional[RestaurantCriteria]) -> Callable[[], None]:
+        def parse() -> None:
+            with open(path, 'r') as csvfile:
+                for _ in program._parse_restaurant_rows(
+                        csv.DictReader(csvfile), cuisines, DEFAULT_CHUNK_SIZE, criteria):
+                    pass
+        return parse
+
+    def parse_scanned(criteria: Optional[RestaurantCriteria]) -> Callable[[], None]:
+        def parse() -> None:
+            for _ in program._parse_restaurant_chunks(DEFAULT_CHUNK_SIZE, criteria):
+                pass
+        return parse
+
+    cases = {'split rows into fields': (read_dicts, scan_fields)}
+    for label, criteria in SEARCHES.items():
+        cases[f'parse, {label}'] = (parse_dicts(criteria), parse_scanned(criteria))
+
+    return {label: {'DictReader': rows / best_time(with_dict_reader, repeat),
+                    'CSVScanner': rows / best_time(with_scanner, repeat)}
+            for label, (with_dict_reader, with_scanner) in cases.items()}
+
+
+def main(args) -> None:
+    results = run(args.rows, args.repeat)
+    print("{:<26}{:>20}{:>20}{:>10}".format(
+        'Case', 'DictReader (rows/s)', 'CSVScanner (rows/s)', 'Speedup'))
+    for case, rates in results.items():
+        print("{:<26}{:>20,.0f}{:>20,.0f}{:>9.1f}x".format(
+            case, rates['DictReader'], rates['CSVScanner'],
+            rates['CSVScanner'] / rates['DictReader']))
+
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description='Compare the rows per second read by csv.DictReader and the CSVScanner.')
+    parser.add_argument('--rows', type=int, default=200000,
+                        help='Number of generated restaurants to read, defaults to 200000')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Times each case is timed, the best is kept, defaults to 3')
+    return parser
+
+
+if __name__ == '__main__':
+    main(make_parser().parse_args())
@@ -0,0 +1,105 @@
+'''
+Generates restaurants.csv and cuisines.csv format files of any size for
+benchmarking. Names follow the sample data, a base word with a prefix word
+("Herbed Delicious") or a suffix ("Deliciousgenix"), with the base words
+and cuisines drawn from Zipf like distributions so that a few are common
+and most are rare, as in real listings.
+
+Run from src/ with `python -m benchmarks.generate_data --rows 100000`
+'''
+
+import argparse
+import random
+from itertools import accumulate
+from typing import List
+
+CUISINES = ['American', 'Chinese', 'Thai', 'Italian', 'French', 'Japanese', 'Turkish',
+            'Korean', 'Vietnamese', 'Indian', 'Spanish', 'Greek', 'Mexican', 'Malaysian',
+            'African', 'German', 'Indonesian', 'Russian', 'Other']
+
+BASE_WORDS = ['Delicious', 'Chow', 'Table', 'Grill', 'Kitchen', 'Bistro', 'Palace', 'Spice',
+              'Garden', 'House', 'Diner', 'Cafe', 'Tavern', 'Noodle', 'Bowl', 'Taco',
+              'Burger', 'Sushi', 'Curry', 'Pho', 'Pizza', 'Oven', 'Wok', 'Smoke', 'Harvest']
+
+PREFIX_WORDS = ['Herbed', 'Hideaway', 'Lord', 'Hilltop', 'Fine', 'Havana', 'Fed', 'Hotspot',
+                'Gusto', 'Local', 'Crisp', 'Bang', 'Hearty', 'Traditional', 'Minty', 'Lucha',
+                'Hut', 'Wish', 'Bazaar', 'Story', 'Strip', 'Aroma', 'Cave', 'Wagon', 'Whole',
+                'Central', 'Ambrosial', 'Golden', 'Sunny', 'Rustic', 'Urban', 'Happy', 'Sweet']
+
+SUFFIXES = ['genix', 'scape', 'ish', 'pad', 'bea', 'quipo', 'zen', 'zilla', 'io', 'oryx',
+            'zoid', 'aza', 'ology', 'ify', 'bes', 'ly', 'hub', 'ster']
+
+RATING_WEIGHTS = [5, 10, 25, 35, 25]
+
+
+def zipf_weights(count: int, exponent: float = 1.1) -> List[float]:
+    '''Returns cumulative weights where the n-th item is 1/n^exponent as likely as the first'''
+
+    return list(accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+def generate(rows: int, restaurant_path: str, cuisine_path: str, seed: int = 0) -> None:
+    '''Writes a cuisine csv and a restaurant csv with the given number of rows'''
+
+    generator = random.Random(seed)
+
+    with open(cuisine_path, 'w') as csvfile:
+        csvfile.write('id,name\n')
+        for cuisine_id, cuisine in enumerate(CUISINES, 1):
+            csvfile.write(f'{cuisine_id},{cuisine}\n')
+
+    base_weights = zipf_weights(len(BASE_WORDS))
+    cuisine_weights = zipf_weights(len(CUISINES), 0.8)
+    cuisine_ids = list(range(1, len(CUISINES) + 1))
+    ratings = list(range(1, 6))
+    rating_weights = list(accumulate(RATING_WEIGHTS))
+
+    with open(restaurant_path, 'w') as csvfile:
+        csvfile.write('name,customer_rating,distance,price,cuisine_id\n')
+        lines: List[str] = []
+        for _ in range(rows):
+            base = generator.choices(BASE_WORDS, cum_weights=base_weights)[0]
+            if generator.random() < 0.6:
+                name = f'{generator.choice(PREFIX_WORDS)} {base}'
+            else:
+                name = base + generator.choice(SUFFIXES)
+
+            lines.append(f'{name},'
+                         f'{generator.choices(ratings, cum_weights=rating_weights)[0]},'
+                         f'{round(generator.uniform(0.5, 10), 1)},'
+                         f'{generator.randrange(10, 55, 5)},'
+                         f'{generator.choices(cuisine_ids, cum_weights=cuisine_weights)[0]}\n')
+            if len(lines) == 10000:
+                csvfile.writelines(lines)
+                lines.clear()
+        csvfile.writelines(lines)
+
+
+def benchmark_file_names(rows: int):
+    '''The restaurant and cuisine csv names in src/csv used for generated data'''
+
+    return f'benchmark_{rows}_restaurants.csv', 'benchmark_cuisines.csv'
+
+
+def main(args) -> None:
+    restaurant_file_name, cuisine_file_name = benchmark_file_names(args.rows)
+    generate(args.rows, args.restaurant_file or 'csv/'+restaurant_file_name,
+             args.cuisine_file or 'csv/'+cuisine_file_name, args.seed)
+
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description='Generate restaurant and cuisine CSVs for benchmarking.')
+    parser.add_argument('--rows', type=int, default=100000,
+                        help='Number of restaurants to generate, defaults to 100000')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed of the random data, defaults to 0')
+    parser.add_argument('--restaurant-file',
+                        help='Path to write the restaurants to, defaults to csv/benchmark_<rows>_restaurants.csv')
+    parser.add_argument('--cuisine-file',
+                        help='Path to write the cuisines to, defaults to csv/benchmark_cuisines.csv')
+    return parser
+
+
+if __name__ == '__main__':
+    main(make_parser().parse_args())
@@ -0,0 +1,87 @@
+'''
+Measures the memory held by a catalog's restaurants in each representation:
+the previous Restaurant model (a frozen dataclass with a per instance
+__dict__), the current Restaurant with __slots__, and RestaurantColumns with
+typed arrays, cuisine codes and interned names.
+
+Run from src/ with `python -m benchmarks.memory_benchmark --rows 1000000`
+'''
+
+import argparse
+import gc
+import os
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+from benchmarks.generate_data import benchmark_file_names, generate
+from catalog.restaurant_columns import RestaurantColumns
+from search_restaurants_program import FilterRestaurantsCSVProgram
+
+
+@dataclass(frozen=True)
+class DictRestaurant:
+    '''The Restaurant model before __slots__, for comparison'''
+    name: str
+    customer_rating: int
+    distance: float
+    average_price: float
+    cuisine: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+
+def measure(build: Callable[[], Any]) -> int:
+    '''Returns the bytes still allocated by what build returns, once it is built'''
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        built = build()
+        gc.collect()
+        held, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del built
+    return held
+
+
+def run(rows: int) -> Dict[str, int]:
+    restaurant_file_name, cuisine_file_name = benchmark_file_names(rows)
+    if not os.path.exists('csv/'+restaurant_file_name):
+        generate(rows, 'csv/'+restaurant_file_name, 'csv/'+cuisine_file_name)
+    program = FilterRestaurantsCSVProgram(
+        cuisine_file_name, restaurant_file_name)
+
+    def dict_restaurants() -> List[DictRestaurant]:
+        return [DictRestaurant(r.name, r.customer_rating, r.distance, r.average_price, r.cuisine,
+                               r.latitude, r.longitude) for r in program.read_restaurants()]
+
+    return {
+        'dataclass with __dict__ (previous)': measure(dict_restaurants),
+        'dataclass with __slots__': measure(lambda: list(program.read_restaurants())),
+        'RestaurantColumns': measure(lambda: RestaurantColumns(
+            program._build_cuisines_map().values(), program.read_restaurants())),
+    }
+
+
+def main(args) -> None:
+    results = run(args.rows)
+    baseline = next(iter(results.values()))
+
+    print("{:<40}{:>12}{:>14}{:>12}".format(
+        'Representation', 'MB', 'Bytes/row', 'Of previous'))
+    for representation, held in results.items():
+        print("{:<40}{:>12.1f}{:>14.1f}{:>11.0%}".format(
+            representation, held / 2 ** 20, held / args.rows, held / baseline))
+
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description='Measure the memory held by the restaurants of a catalog in each representation.')
+    parser.add_argument('--rows', type=int, default=1000000,
+                        help='Number of generated restaurants to load, defaults to 1000000')
+    return parser
+
+
+if __name__ == '__main__':
+    main(make_parser().parse_args())
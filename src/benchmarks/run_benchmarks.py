@@ -0,0 +1,220 @@
+'''
+Times parsing, every specification, the top k ranking, catalog queries and
+end to end command line latency on generated data of several sizes, and
+saves the results as JSON so they can be compared between commits.
+
+Run from src/ with `python -m benchmarks.run_benchmarks --sizes 1000,100000`
+and compare against an earlier run with `--compare earlier.json`.
+'''
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+from index import make_parser as make_index_parser
+from benchmarks.generate_data import benchmark_file_names, generate
+from catalog.restaurant_catalog import RestaurantCatalog
+from search_restaurants_program import FilterRestaurantsCSVProgram
+from models.restaurant_criteria import RestaurantCriteria
+from ranking.top_k import TopRestaurants, rank_key
+from specifications.compiler import compile_specification
+from specifications.restaurant import (RestaurantIsCheapEnough, RestaurantIsCloseEnough, RestaurantIsRatedWellEnough,
+                                       RestaurantIsTheRightCuisine, RestaurantIsTheRightName)
+
+# Representative searches, as index.py arguments
+SEARCHES: Dict[str, List[str]] = {
+    'no criteria': [],
+    'distance': ['-d', '1'],
+    'name': ['-n', 'grill'],
+    'fuzzy name': ['-n', 'grlil', '--fuzzy'],
+    'cuisine': ['-c', 'thai'],
+    'price and rating': ['-p', '20', '--customer-rating', '4'],
+    'all criteria': ['-n', 'h', '-d', '6', '-p', '40', '--customer-rating', '2', '-c', 'a'],
+}
+
+SPECIFICATIONS = {
+    'name': (RestaurantIsTheRightName(), {'restaurant_name': 'grill'}),
+    'cuisine': (RestaurantIsTheRightCuisine(), {'cuisine': 'thai'}),
+    'price': (RestaurantIsCheapEnough(), {'max_price': 20}),
+    'rating': (RestaurantIsRatedWellEnough(), {'min_customer_rating': 4}),
+    'distance': (RestaurantIsCloseEnough(), {'max_distance': 1}),
+}
+
+
+def make_criteria(**fields: Any) -> RestaurantCriteria:
+    criteria = dict(restaurant_name=None, max_distance=None, max_price=None,
+                    min_customer_rating=None, cuisine=None)
+    criteria.update(fields)
+    return RestaurantCriteria(**criteria)
+
+
+def search_criteria(argv: List[str]) -> RestaurantCriteria:
+    '''Turns index.py arguments into the RestaurantCriteria index.py would search for'''
+
+    args = make_index_parser().parse_args(argv)
+    return make_criteria(restaurant_name=args.name, max_distance=args.distance, max_price=args.price,
+                         min_customer_rating=args.customer_rating, cuisine=args.cuisine,
+                         max_name_edits=args.fuzzy)
+
+
+def best_time(function: Callable[[], Any], repeat: int) -> float:
+    '''Returns the fastest of "repeat" runs of the function, in seconds'''
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def benchmark_size(rows: int, repeat: int) -> List[Dict[str, Any]]:
+    '''Runs every benchmark on generated data with the given number of rows'''
+
+    restaurant_file_name, cuisine_file_name = benchmark_file_names(rows)
+    if not os.path.exists('csv/'+restaurant_file_name):
+        generate(rows, 'csv/'+restaurant_file_name, 'csv/'+cuisine_file_name)
+
+    results: List[Dict[str, Any]] = []
+
+    def record(benchmark: str, case: str, seconds: float, **extra: Any) -> None:
+        results.append(dict(rows=rows, benchmark=benchmark,
+                       case=case, seconds=seconds, **extra))
+        print(f'{rows:>10} {benchmark:<14} {case:<18} {seconds * 1000:>12.3f} ms', file=sys.stderr)
+
+    program = FilterRestaurantsCSVProgram(
+        cuisine_file_name, restaurant_file_name)
+    snapshot_program = FilterRestaurantsCSVProgram(
+        cuisine_file_name, restaurant_file_name, use_snapshot=True)
+    list(snapshot_program.read_restaurants())
+
+    record('ingest', 'csv', best_time(
+        lambda: list(program.read_restaurants()), repeat))
+    record('ingest', 'snapshot', best_time(
+        lambda: list(snapshot_program.read_restaurants()), repeat))
+
+    restaurants = list(program.read_restaurants())
+    for label, (specification, fields) in SPECIFICATIONS.items():
+        criteria = make_criteria(**fields)
+        record('specification', label, best_time(
+            lambda: [specification.is_satisfied_by(r, criteria) for r in restaurants], repeat))
+        compiled = compile_specification(specification, criteria)
+        record('compiled', label, best_time(
+            lambda: [compiled(r) for r in restaurants], repeat))
+
+    def top_k():
+        top_restaurants = TopRestaurants(5)
+        top_restaurants.add_all(restaurants)
+        return top_restaurants.results()
+
+    record('top k', 'bounded heap', best_time(top_k, repeat))
+    record('top k', 'full sort', best_time(
+        lambda: sorted(restaurants, key=rank_key)[:5], repeat))
+
+    catalog = RestaurantCatalog(cuisine_file_name, restaurant_file_name)
+    for label, argv in SEARCHES.items():
+        criteria = search_criteria(argv)
+        record('catalog query', label, best_time(
+            lambda: catalog.get_best_matched_restaurants(criteria), repeat))
+        record('program query', label, best_time(
+            lambda: program.get_best_matched_restaurants(criteria), repeat))
+
+    # A later page, fetched with its cursor, should cost about as much as the first
+    for label in ['no criteria', 'all criteria']:
+        criteria = search_criteria(SEARCHES[label])
+        cursor = None
+        for page_number in range(1, 101):
+            if page_number in (1, 100):
+                record('catalog page', f'{label} p{page_number}', best_time(
+                    lambda: catalog.get_best_matched_restaurants_page(criteria, cursor=cursor), repeat))
+            cursor = catalog.get_best_matched_restaurants_page(
+                criteria, cursor=cursor).cursor
+            if cursor is None:
+                break
+
+    for label, argv in SEARCHES.items():
+        command = [sys.executable, 'index.py', '-f', restaurant_file_name,
+                   '--cuisine-file', cuisine_file_name] + argv
+        record('cli', label, best_time(lambda: subprocess.run(
+            command, check=True, stdout=subprocess.DEVNULL), repeat))
+        record('cli snapshot', label, best_time(lambda: subprocess.run(
+            command + ['--snapshot'], check=True, stdout=subprocess.DEVNULL), repeat))
+
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous: Dict[str, Any], current: Dict[str, Any]) -> None:
+    '''Prints how long each benchmark took compared to a previous run'''
+
+    def key(result):
+        return (result['rows'], result['benchmark'], result['case'])
+
+    previous_seconds = {key(result): result['seconds']
+                        for result in previous['results']}
+    print("\n{:>10} {:<14} {:<18}{:>14}{:>14}{:>9}".format(
+        'Rows', 'Benchmark', 'Case', 'Before (ms)', 'After (ms)', 'Ratio'))
+    for result in current['results']:
+        before = previous_seconds.get(key(result))
+        if before is None:
+            continue
+        print("{:>10} {:<14} {:<18}{:>14.3f}{:>14.3f}{:>8.2f}x".format(
+            *key(result), before * 1000, result['seconds'] * 1000, result['seconds'] / before))
+
+
+def main(args) -> Dict[str, Any]:
+    report: Dict[str, Any] = {
+        'metadata': {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'date': datetime.now(timezone.utc).isoformat(),
+            'repeat': args.repeat,
+        },
+        'results': [],
+    }
+    for rows in args.sizes:
+        report['results'].extend(benchmark_size(rows, args.repeat))
+
+    with open(args.output, 'w') as output:
+        json.dump(report, output, indent=2)
+
+    if args.compare:
+        with open(args.compare) as previous:
+            compare(json.load(previous), report)
+    return report
+
+
+def parse_sizes(value: str) -> List[int]:
+    return [int(float(size)) for size in value.split(',')]
+
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description='Benchmark parsing, filtering and ranking on generated restaurant data.')
+    parser.add_argument('--sizes', type=parse_sizes, default=[1000, 10000, 100000],
+                        help='Comma separated numbers of restaurants to benchmark, from 1e3 to 1e7. '
+                        'Defaults to 1e3,1e4,1e5')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Number of runs of each benchmark, the fastest is kept. Defaults to 3')
+    parser.add_argument('-o', '--output', default='benchmark_results.json',
+                        help='Path to save the JSON results to, defaults to benchmark_results.json')
+    parser.add_argument('--compare',
+                        help='Path of earlier JSON results to compare against')
+    return parser
+
+
+if __name__ == '__main__':
+    main(make_parser().parse_args())
@@ -0,0 +1,217 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+from search_restaurants_program import FilterRestaurantsCSVProgram
+from catalog.fuzzy_index import FuzzyIndex
+from catalog.prefix_index import PrefixIndex
+from catalog.spatial_index import DISTANCE_MARGIN, EARTH_RADIUS_MILES, locate_restaurant
+from models.restaurant import Restaurant
+from models.restaurant_criteria import RestaurantCriteria
+from ranking.top_k import DEFAULT_LIMIT, TopRestaurants, criteria_rank_key
+from specifications.restaurant import name_edit_distance, searches_names_fuzzily, strings_partially_match
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class ColumnarRestaurantCatalog(FilterRestaurantsCSVProgram):
+    '''
+    An in memory catalog which stores the parsed restaurants as NumPy columns
+    rather than Restaurant objects: distance, price and rating as numeric
+    arrays and the cuisine as an integer code into the distinct cuisine names.
+    A RestaurantCriteria is evaluated as a boolean mask in a handful of
+    vectorized operations and Restaurant objects are only built for the top
+    ranked rows. Requires numpy to be installed.
+    '''
+
+    def __init__(self, cuisine_file_name: str, restaurant_file_name: str):
+        if numpy is None:
+            raise ImportError(
+                'numpy must be installed to use the ColumnarRestaurantCatalog')
+
+        super().__init__(cuisine_file_name=cuisine_file_name,
+                         restaurant_file_name=restaurant_file_name)
+        self.reload()
+
+    def reload(self) -> None:
+        '''Re-parses the csv files, replacing the columns held in memory'''
+
+        # Restaurants are unique, dict.fromkeys drops duplicates but keeps file order
+        restaurants: List[Restaurant] = list(
+            dict.fromkeys(self.read_restaurants()))
+
+        self.names: List[str] = [r.name for r in restaurants]
+        self.distances = numpy.array(
+            [r.distance for r in restaurants], dtype=numpy.float64)
+        self.prices = numpy.array(
+            [r.average_price for r in restaurants], dtype=numpy.float64)
+        self.ratings = numpy.array(
+            [r.customer_rating for r in restaurants], dtype=numpy.int64)
+        # Missing coordinates are NaN, which never satisfies a comparison
+        self.latitudes = numpy.array(
+            [numpy.nan if r.latitude is None else r.latitude for r in restaurants], dtype=numpy.float64)
+        self.longitudes = numpy.array(
+            [numpy.nan if r.longitude is None else r.longitude for r in restaurants], dtype=numpy.float64)
+
+        cuisine_codes: Dict[str, int] = {}
+        self.cuisine_codes = numpy.array(
+            [cuisine_codes.setdefault(r.cuisine, len(cuisine_codes))
+             for r in restaurants], dtype=numpy.int32)
+        self.cuisine_names: List[str] = list(cuisine_codes)
+
+        self.name_index = PrefixIndex()
+        self.name_index.add_all(self.names)
+        self.fuzzy_name_index = FuzzyIndex()
+        self.fuzzy_name_index.add_all(self.names)
+
+    def get_best_matched_restaurants(self, criteria: RestaurantCriteria, limit: int = DEFAULT_LIMIT) -> List[Restaurant]:
+        '''
+        Given a set of criteria, returns the top "limit" Restaurants which
+        satisfy the criteria, ranked exactly as the pure Python program does.
+        '''
+
+        if criteria.origin is not None:
+            return self._get_nearest_restaurants(criteria, limit)
+
+        rows = numpy.flatnonzero(self._criteria_mask(criteria))
+        if limit <= 0:
+            return []
+
+        keys = [rows, self.prices[rows], -self.ratings[rows], self.distances[rows]]
+        if searches_names_fuzzily(criteria):
+            # Names with the fewest typos rank first, then by distance
+            keys.append(numpy.array([name_edit_distance(self.names[row], criteria.restaurant_name)
+                                     for row in rows], dtype=numpy.int64))
+        elif len(rows) > limit:
+            # Only rows as close as the limit-th closest can make the top
+            distances = self.distances[rows]
+            cutoff = numpy.partition(distances, limit - 1)[limit - 1]
+            keys = [key[distances <= cutoff] for key in keys]
+            rows = keys[0]
+
+        # lexsort sorts by its last key first, the row breaks ties in file order
+        order = numpy.lexsort(keys)
+        return [self._build_restaurant(row) for row in rows[order[:limit]]]
+
+    def iter_valid_restaurants(self, criteria: RestaurantCriteria) -> Iterator[Restaurant]:
+        '''Yields, in file order, the restaurants which conform to the given Criteria'''
+
+        if criteria.origin is not None:
+            rows, _ = self._located_rows(criteria)
+            for row in rows:
+                yield locate_restaurant(self._build_restaurant(row), criteria.origin)
+            return
+
+        for row in numpy.flatnonzero(self._criteria_mask(criteria)):
+            yield self._build_restaurant(row)
+
+    def _get_nearest_restaurants(self, criteria: RestaurantCriteria, limit: int) -> List[Restaurant]:
+        '''
+        Ranks the rows matching a Criteria with an origin. Only rows within
+        DISTANCE_MARGIN of the limit-th closest approximate distance can make
+        the top, so exact distances are only computed for those.
+        '''
+
+        rows, distances = self._located_rows(criteria)
+        if limit <= 0:
+            return []
+
+        if len(rows) > limit and not searches_names_fuzzily(criteria):
+            cutoff = numpy.partition(distances, limit - 1)[limit - 1]
+            rows = rows[distances <= cutoff + DISTANCE_MARGIN]
+
+        top_restaurants = TopRestaurants(limit, criteria_rank_key(criteria))
+        top_restaurants.add_all(locate_restaurant(self._build_restaurant(row), criteria.origin)
+                                for row in rows)
+        return top_restaurants.results()
+
+    def _located_rows(self, criteria: RestaurantCriteria) -> Tuple['numpy.ndarray', 'numpy.ndarray']:
+        '''
+        Returns the rows matching a Criteria with an origin, in file order,
+        and their approximate distances from the origin. The vectorized
+        distances may differ from locate_restaurant's in the last digits, so
+        rows this close to the max distance are checked exactly.
+        '''
+
+        distances = self._origin_distances(criteria.origin)
+        mask = self._criteria_mask(criteria, distances)
+        rows = numpy.flatnonzero(mask)
+        distances = distances[rows]
+
+        if criteria.max_distance is not None:
+            keep = numpy.ones(len(rows), dtype=bool)
+            for i in numpy.flatnonzero(distances > criteria.max_distance - DISTANCE_MARGIN):
+                restaurant = locate_restaurant(
+                    self._build_restaurant(rows[i]), criteria.origin)
+                keep[i] = restaurant.distance <= criteria.max_distance
+            rows, distances = rows[keep], distances[keep]
+        return rows, distances
+
+    def _origin_distances(self, origin: Tuple[float, float]):
+        '''Returns the haversine distance in miles of every row from the origin, NaN without coordinates'''
+
+        origin_latitude, origin_longitude = numpy.radians(origin)
+        latitudes, longitudes = numpy.radians(
+            self.latitudes), numpy.radians(self.longitudes)
+        a = (numpy.sin((latitudes - origin_latitude) / 2) ** 2
+             + numpy.cos(origin_latitude) * numpy.cos(latitudes) * numpy.sin((longitudes - origin_longitude) / 2) ** 2)
+        return 2 * EARTH_RADIUS_MILES * numpy.arcsin(numpy.sqrt(numpy.minimum(a, 1.0)))
+
+    def _criteria_mask(self, criteria: RestaurantCriteria, origin_distances: Optional['numpy.ndarray'] = None):
+        '''
+        Returns a boolean array which is True for rows matching the Criteria.
+        Given the approximate distances from the Criteria's origin, rows
+        without coordinates are excluded and the max distance is checked
+        against them with DISTANCE_MARGIN to spare.
+        '''
+
+        mask = numpy.ones(len(self.names), dtype=bool)
+
+        if origin_distances is not None:
+            mask &= ~numpy.isnan(origin_distances)
+            if criteria.max_distance is not None:
+                mask &= origin_distances <= criteria.max_distance + DISTANCE_MARGIN
+        elif criteria.max_distance is not None:
+            mask &= self.distances <= criteria.max_distance
+        if criteria.max_price is not None:
+            mask &= self.prices <= criteria.max_price
+        if criteria.min_customer_rating is not None:
+            mask &= self.ratings >= criteria.min_customer_rating
+
+        if criteria.cuisine:
+            # Only the few distinct cuisine names need string matching
+            matching_codes = [code for code, cuisine in enumerate(self.cuisine_names)
+                              if strings_partially_match(cuisine, criteria.cuisine)]
+            mask &= numpy.isin(self.cuisine_codes, matching_codes)
+
+        if criteria.restaurant_name:
+            name_rows = self.name_index.rows_with_prefix(
+                criteria.restaurant_name)
+            if criteria.max_name_edits is not None:
+                name_rows = name_rows.union(self.fuzzy_name_index.rows_within(
+                    criteria.restaurant_name, criteria.max_name_edits))
+            name_mask = numpy.zeros(len(self.names), dtype=bool)
+            name_mask[list(name_rows)] = True
+            mask &= name_mask
+
+        return mask
+
+    def _build_restaurant(self, row: int) -> Restaurant:
+        '''Builds the Restaurant object stored at the given row'''
+
+        return Restaurant(
+            name=self.names[row],
+            customer_rating=int(self.ratings[row]),
+            distance=float(self.distances[row]),
+            average_price=float(self.prices[row]),
+            cuisine=self.cuisine_names[self.cuisine_codes[row]],
+            latitude=_from_column(self.latitudes[row]),
+            longitude=_from_column(self.longitudes[row])
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+def _from_column(coordinate) -> Optional[float]:
+    return None if numpy.isnan(coordinate) else float(coordinate)
@@ -0,0 +1,128 @@
+import csv
+import locale
+import mmap
+import os
+from typing import Iterable, Iterator, List, Optional
+
+# Bytes sampled from the start of the rows to estimate their length
+_SAMPLE_SIZE = 1 << 16
+
+
+class CSVScanner(object):
+    '''
+    Scans a csv file mapped into memory (mmap) for the boundaries of its
+    rows, without decoding or copying the rest of the file into Python
+    objects. Rows are returned as raw lines, whose fields are split on ","
+    and only converted where they are needed (see compile_line_parser).
+
+    Only files which the csv module would split the same way can be
+    scanned: without quotes (so no quoted field can hold a "," or a line
+    break), without NUL bytes, with every line ending in "\\n" or every line
+    in "\\r\\n" and in an encoding which writes those characters as single
+    bytes never found within other characters. Other files are read with
+    the csv module, see can_scan. Use it as a context manager, which maps
+    and unmaps the file.
+    '''
+
+    def __init__(self, path: str, encoding: Optional[str] = None):
+        self.path = path
+        # The encoding open() reads the file with by default
+        self.encoding = encoding or locale.getpreferredencoding(False)
+        self.fieldnames: List[str] = []
+        self._buffer: Optional[mmap.mmap] = None
+        self._newline = b'\n'
+        self._rows_start = 0
+
+    def __enter__(self) -> 'CSVScanner':
+        with open(self.path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size > 0:
+                self._buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._buffer is not None and self._is_splittable():
+            header_end = self._buffer.find(self._newline)
+            if header_end < 0:
+                header_end = len(self._buffer)
+            header = self._buffer[:header_end].decode(self.encoding)
+            self.fieldnames = next(csv.reader([header]), [])
+            self._rows_start = header_end + len(self._newline)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._buffer is not None:
+            self._buffer.close()
+            self._buffer = None
+
+    def can_scan(self, columns: Iterable[str]) -> bool:
+        '''Whether the file can be scanned and its header has every one of the columns'''
+
+        return bool(self.fieldnames) and set(columns) <= set(self.fieldnames)
+
+    def column(self, name: str) -> int:
+        '''
+        The index of the column's field in a row, the last of the columns
+        with the name as csv.DictReader keeps the last one.
+        '''
+
+        return len(self.fieldnames) - 1 - self.fieldnames[::-1].index(name)
+
+    def line_chunks(self, chunk_size: int) -> Iterator[List[bytes]]:
+        '''
+        Yields the lines after the header, without their line endings, in
+        lists of about chunk_size lines, which may be empty lines. Raises a
+        UnicodeDecodeError where the file is not in the scanner's encoding,
+        as reading it with open() would.
+        '''
+
+        if self._buffer is None:
+            return
+        buffer, newline = self._buffer, self._newline
+        size = len(buffer)
+
+        sample = buffer[self._rows_start:self._rows_start + _SAMPLE_SIZE]
+        line_length = len(sample) / max(sample.count(b'\n'), 1)
+        window = max(int(line_length * chunk_size), 1)
+
+        start = self._rows_start
+        while start < size:
+            if start + window >= size:
+                end = size
+            else:
+                end = buffer.rfind(newline, start, start + window)
+                if end < 0:
+                    # A line longer than the window, which ends at the next line ending
+                    end = buffer.find(newline, start)
+                end = size if end < 0 else end + len(newline)
+
+            rows = buffer[start:end]
+            if not rows.isascii():
+                rows.decode(self.encoding)
+            lines = rows.split(newline)
+            if rows.endswith(newline):
+                lines.pop()
+            yield lines
+            start = end
+
+    def _is_splittable(self) -> bool:
+        '''Whether every row and field boundary is a line ending or ",", see the class'''
+
+        if ',\r\n"\0'.encode(self.encoding, errors='replace') != b',\r\n"\0':
+            return False
+        buffer = self._buffer
+        if buffer.find(b'"') >= 0 or buffer.find(b'\0') >= 0:
+            return False
+
+        if buffer.find(b'\r') < 0:
+            return True
+        # open() reads any "\r" as a line ending, only "\r\n" everywhere is scanned
+        carriage_returns = line_feeds = line_breaks = 0
+        previous = b''
+        for start in range(0, len(buffer), _SAMPLE_SIZE):
+            block = buffer[start:start + _SAMPLE_SIZE]
+            carriage_returns += block.count(b'\r')
+            line_feeds += block.count(b'\n')
+            # Counting a "\r\n" split between two blocks too
+            line_breaks += block.count(b'\r\n') + (previous.endswith(b'\r') and block.startswith(b'\n'))
+            previous = block
+        if carriage_returns != line_breaks or line_feeds != line_breaks:
+            return False
+        self._newline = b'\r\n'
+        return True
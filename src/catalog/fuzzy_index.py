@@ -0,0 +1,97 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from specifications.restaurant import edit_distance, searchable_words
+
+
+class _BKNode(object):
+    '''A node of the FuzzyIndex BK-tree, one per distinct indexed word'''
+    __slots__ = ('word', 'children')
+
+    def __init__(self, word: str):
+        self.word = word
+        # Child subtrees by the edit distance of all their words to this word
+        self.children: Dict[int, '_BKNode'] = {}
+
+
+class FuzzyIndex(object):
+    '''
+    A BK-tree over the distinct lowercased words of indexed strings. Looking
+    up a word returns the rows with a word within a maximum edit_distance of
+    it, following the same rules as name_edit_distance apart from prefixes,
+    which the PrefixIndex finds. As edit_distance is a metric, a lookup only
+    compares the word to the subtrees which can be close enough, so its cost
+    grows far slower than the number of distinct words indexed.
+    '''
+
+    def __init__(self):
+        self._root: Optional[_BKNode] = None
+        self._rows_by_word: Dict[str, Set[int]] = {}
+        # The latest lookup, as the planner estimates from the lookup it then uses
+        self._latest: Optional[Tuple[str, int, Dict[int, int]]] = None
+
+    def add(self, row: int, string: str) -> None:
+        '''Indexes every word of the string under the given row'''
+
+        for word in searchable_words(string):
+            rows = self._rows_by_word.get(word)
+            if rows is None:
+                rows = self._rows_by_word[word] = set()
+                self._insert(word)
+            rows.add(row)
+        self._latest = None
+
+    def add_all(self, strings: Iterable[str], first_row: int = 0) -> None:
+        '''Indexes the strings, numbering rows from first_row in order'''
+
+        for row, string in enumerate(strings, first_row):
+            self.add(row, string)
+
+    def rows_within(self, word: str, max_edits: int) -> Dict[int, int]:
+        '''
+        Returns the rows having a word within max_edits of the given word,
+        ignoring case, mapped to the fewest edits of any of their words.
+        '''
+
+        word = word.lower()
+        if self._latest is not None and self._latest[:2] == (word, max_edits):
+            return self._latest[2]
+
+        rows: Dict[int, int] = {}
+        for edits, indexed_word in sorted(self._words_within(word, max_edits), reverse=True):
+            # Closer words come last and overwrite the edits of further ones
+            rows.update(dict.fromkeys(self._rows_by_word[indexed_word], edits))
+        self._latest = (word, max_edits, rows)
+        return rows
+
+    def _words_within(self, word: str, max_edits: int) -> List[Tuple[int, str]]:
+        '''Returns the indexed words within max_edits of the word, with their edits'''
+
+        words: List[Tuple[int, str]] = []
+        to_visit = [] if self._root is None else [self._root]
+        while to_visit:
+            node = to_visit.pop()
+            edits = edit_distance(word, node.word)
+            if edits <= max_edits:
+                words.append((edits, node.word))
+            # By the triangle inequality, only children this far from the
+            # node can hold words within max_edits of the word
+            for child_edits, child in node.children.items():
+                if edits - max_edits <= child_edits <= edits + max_edits:
+                    to_visit.append(child)
+        return words
+
+    def _insert(self, word: str) -> None:
+        if self._root is None:
+            self._root = _BKNode(word)
+            return
+
+        node = self._root
+        while True:
+            edits = edit_distance(word, node.word)
+            child = node.children.get(edits)
+            if child is None:
+                node.children[edits] = _BKNode(word)
+                return
+            node = child
+
+    def __len__(self) -> int:
+        return len(self._rows_by_word)
@@ -0,0 +1,91 @@
+from typing import Dict, Iterable, Optional, Set
+from specifications.restaurant import searchable_words
+
+
+class _TrieNode(object):
+    '''A node of the PrefixIndex trie, one per character of an indexed word'''
+    __slots__ = ('children', 'rows', 'size')
+
+    def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        # Rows having a word which ends at this node
+        self.rows: Set[int] = set()
+        # Number of row entries at or below this node, used for estimates
+        self.size = 0
+
+
+class PrefixIndex(object):
+    '''
+    A trie over the lowercased words of indexed strings. Looking up a prefix
+    returns every row with a word starting with that prefix, following the same
+    rules as strings_partially_match. A lookup only walks the prefix and the
+    words below it, so its cost grows with the number of matches rather than
+    the number of rows indexed.
+    '''
+
+    def __init__(self):
+        self._root = _TrieNode()
+
+    def add(self, row: int, string: str) -> None:
+        '''Indexes every word of the string under the given row'''
+
+        for word in searchable_words(string):
+            path = [self._root]
+            for character in word:
+                child = path[-1].children.get(character)
+                if child is None:
+                    child = path[-1].children[character] = _TrieNode()
+                path.append(child)
+
+            if row not in path[-1].rows:
+                path[-1].rows.add(row)
+                for node in path:
+                    node.size += 1
+
+    def add_all(self, strings: Iterable[str], first_row: int = 0) -> None:
+        '''Indexes the strings, numbering rows from first_row in order'''
+
+        for row, string in enumerate(strings, first_row):
+            self.add(row, string)
+
+    def estimate_rows(self, prefix: Optional[str]) -> int:
+        '''
+        Returns an upper bound of the number of rows rows_with_prefix would
+        return, only walking the prefix itself. Rows with several words
+        starting with the prefix are counted once per word.
+        '''
+
+        node = self._find(prefix or '')
+        return 0 if node is None else node.size
+
+    def rows_with_prefix(self, prefix: Optional[str]) -> Optional[Set[int]]:
+        '''
+        Returns the rows with a word prefixed with the given prefix, ignoring
+        case. When the prefix is None or empty every row matches, which is
+        signalled by returning None rather than building the full set.
+        '''
+
+        if not prefix:
+            return None
+
+        node = self._find(prefix)
+        if node is None:
+            return set()
+
+        rows: Set[int] = set()
+        to_visit = [node]
+        while to_visit:
+            node = to_visit.pop()
+            rows |= node.rows
+            to_visit.extend(node.children.values())
+        return rows
+
+    def _find(self, prefix: str) -> Optional[_TrieNode]:
+        '''Returns the node reached by the lowercased prefix, if there is one'''
+
+        node = self._root
+        for character in prefix.lower():
+            node = node.children.get(character)
+            if node is None:
+                return None
+        return node
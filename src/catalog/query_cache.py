@@ -0,0 +1,129 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+from search_restaurants_program import FilterRestaurantsCSVProgram
+from models.restaurant import Restaurant
+from models.restaurant_criteria import RestaurantCriteria
+from ranking.keyset import RestaurantPage
+from ranking.top_k import DEFAULT_LIMIT
+
+CriteriaKey = Tuple[Optional[str], Optional[float],
+                    Optional[float], Optional[int], Optional[str],
+                    Optional[Tuple[float, float]], Optional[int]]
+
+
+def normalize_criteria(criteria: RestaurantCriteria) -> CriteriaKey:
+    '''
+    Returns a key which is the same for every RestaurantCriteria matching the
+    same restaurants: names and cuisines are compared ignoring case and an
+    empty string filters for nothing, just like None.
+    '''
+
+    def normalize_string(string: Optional[str]) -> Optional[str]:
+        return string.lower() if string else None
+
+    def normalize_number(number, kind):
+        return None if number is None else kind(number)
+
+    return (
+        normalize_string(criteria.restaurant_name),
+        normalize_number(criteria.max_distance, float),
+        normalize_number(criteria.max_price, float),
+        normalize_number(criteria.min_customer_rating, int),
+        normalize_string(criteria.cuisine),
+        None if criteria.origin is None else tuple(
+            float(coordinate) for coordinate in criteria.origin),
+        normalize_number(criteria.max_name_edits, int) if criteria.restaurant_name else None,
+    )
+
+
+class CachedRestaurantSearch(object):
+    '''
+    Wraps a FilterRestaurantsCSVProgram (or RestaurantCatalog), caching the
+    best matched restaurants of each normalized RestaurantCriteria and limit.
+    The least recently used results are evicted past max_size entries and
+    results older than ttl seconds are recomputed. Every entry is dropped
+    when the restaurant or cuisine CSV changes, refreshing the program first
+    if it holds the restaurants in memory. Hits and misses are counted.
+    '''
+
+    def __init__(self, program: FilterRestaurantsCSVProgram, max_size: int = 1024,
+                 ttl: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.program = program
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Tuple[CriteriaKey, int], Tuple[float, List[Restaurant]]]' = OrderedDict()
+        self._files_state = self._read_files_state()
+
+    def get_best_matched_restaurants(self, criteria: RestaurantCriteria, limit: int = DEFAULT_LIMIT) -> List[Restaurant]:
+        '''
+        Returns the program's best matched restaurants for the criteria, from
+        the cache when they are still fresh.
+        '''
+
+        self._invalidate_if_files_changed()
+
+        key = (normalize_criteria(criteria), limit)
+        now = self.clock()
+        entry = self._entries.get(key)
+        if entry is not None and (self.ttl is None or now - entry[0] < self.ttl):
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return list(entry[1])
+
+        self.misses += 1
+        restaurants = self.program.get_best_matched_restaurants(
+            criteria, limit)
+        self._entries[key] = (now, restaurants)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return list(restaurants)
+
+    def get_best_matched_restaurants_page(self, criteria: RestaurantCriteria, limit: int = DEFAULT_LIMIT,
+                                          cursor: Optional[str] = None) -> RestaurantPage:
+        '''
+        Returns a page of the program's best matched restaurants. Pages are
+        not cached, a cursor already makes them cheap to find.
+        '''
+
+        self._invalidate_if_files_changed()
+        return self.program.get_best_matched_restaurants_page(criteria, limit, cursor)
+
+    def display(self, restaurants: List[Restaurant], output_format: str = 'table') -> None:
+        self.program.display(restaurants, output_format)
+
+    def clear(self) -> None:
+        '''Drops every cached result, keeping the hit and miss counts'''
+
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _invalidate_if_files_changed(self) -> None:
+        files_state = self._read_files_state()
+        if files_state == self._files_state:
+            return
+
+        self.clear()
+        # Catalogs ingest appended rows with refresh, falling back to reloading
+        if hasattr(self.program, 'refresh'):
+            self.program.refresh()
+        elif hasattr(self.program, 'reload'):
+            self.program.reload()
+        # Only once refreshed, so a refresh which raises is tried again by the next search
+        self._files_state = files_state
+
+    def _read_files_state(self) -> List[Tuple[int, int, int]]:
+        '''Returns the inode, size and modification time of both CSVs'''
+
+        state = []
+        for file_name in [self.program.cuisine_file_name, self.program.restaurant_file_name]:
+            stat = os.stat('csv/'+file_name)
+            state.append((stat.st_ino, stat.st_size, stat.st_mtime_ns))
+        return state
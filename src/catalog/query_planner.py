@@ -0,0 +1,89 @@
+from typing import Dict, Iterable, Optional
+from dataclasses import dataclass
+from catalog.fuzzy_index import FuzzyIndex
+from catalog.prefix_index import PrefixIndex
+from catalog.range_index import RangeIndex
+from models.restaurant_criteria import RestaurantCriteria
+from specifications.restaurant import searches_names_fuzzily
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    '''
+    Names the index used to produce the candidate rows of a query and how many
+    rows it is expected to produce. An access path of "scan" means no criteria
+    is indexed and every row is a candidate.
+    '''
+    access_path: str
+    estimated_rows: int
+
+
+class QueryPlanner(object):
+    '''
+    Picks the most selective criteria of a RestaurantCriteria, estimated from
+    the catalog's indexes, and uses its index to produce the starting set of
+    candidate rows. The remaining criteria are then only checked on those
+    candidates. Names searched with max_name_edits can only use the name
+    index when a fuzzy name index is given.
+    '''
+
+    def __init__(self, name_index: PrefixIndex, cuisine_index: PrefixIndex,
+                 distance_index: RangeIndex, price_index: RangeIndex, rating_index: RangeIndex,
+                 fuzzy_name_index: Optional[FuzzyIndex] = None):
+        self.name_index = name_index
+        self.fuzzy_name_index = fuzzy_name_index
+        self.cuisine_index = cuisine_index
+        self.distance_index = distance_index
+        self.price_index = price_index
+        self.rating_index = rating_index
+
+    def plan(self, criteria: RestaurantCriteria) -> QueryPlan:
+        '''Returns the cheapest access path for the criteria'''
+
+        estimates: Dict[str, int] = {}
+        if searches_names_fuzzily(criteria):
+            if self.fuzzy_name_index is not None:
+                estimates['name'] = self.name_index.estimate_rows(criteria.restaurant_name) + len(
+                    self.fuzzy_name_index.rows_within(criteria.restaurant_name, criteria.max_name_edits))
+        elif criteria.restaurant_name:
+            estimates['name'] = self.name_index.estimate_rows(
+                criteria.restaurant_name)
+        if criteria.cuisine:
+            estimates['cuisine'] = self.cuisine_index.estimate_rows(
+                criteria.cuisine)
+        if criteria.max_distance is not None:
+            estimates['distance'] = self.distance_index.count_at_most(
+                criteria.max_distance)
+        if criteria.max_price is not None:
+            estimates['price'] = self.price_index.count_at_most(
+                criteria.max_price)
+        if criteria.min_customer_rating is not None:
+            estimates['rating'] = self.rating_index.count_at_least(
+                criteria.min_customer_rating)
+
+        if not estimates:
+            return QueryPlan(access_path='scan', estimated_rows=len(self.distance_index))
+
+        access_path = min(estimates, key=estimates.__getitem__)
+        return QueryPlan(access_path=access_path, estimated_rows=estimates[access_path])
+
+    def candidate_rows(self, plan: QueryPlan, criteria: RestaurantCriteria) -> Optional[Iterable[int]]:
+        '''
+        Returns the candidate rows produced by the plan's access path, or None
+        when every row has to be checked.
+        '''
+
+        if plan.access_path == 'name' and searches_names_fuzzily(criteria):
+            return self.name_index.rows_with_prefix(criteria.restaurant_name).union(
+                self.fuzzy_name_index.rows_within(criteria.restaurant_name, criteria.max_name_edits))
+        if plan.access_path == 'name':
+            return self.name_index.rows_with_prefix(criteria.restaurant_name)
+        if plan.access_path == 'cuisine':
+            return self.cuisine_index.rows_with_prefix(criteria.cuisine)
+        if plan.access_path == 'distance':
+            return self.distance_index.rows_at_most(criteria.max_distance)
+        if plan.access_path == 'price':
+            return self.price_index.rows_at_most(criteria.max_price)
+        if plan.access_path == 'rating':
+            return self.rating_index.rows_at_least(criteria.min_customer_rating)
+        return None
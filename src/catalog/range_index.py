@@ -0,0 +1,49 @@
+from bisect import bisect_left, bisect_right
+from typing import List, Sequence
+
+
+class RangeIndex(object):
+    '''
+    The rows of one numeric attribute sorted by value. Range predicates such
+    as "distance <= 3" are answered by bisecting the sorted values, so counting
+    the matches is O(log n) and fetching them only touches the matching rows.
+    '''
+
+    def __init__(self, values: Sequence[float]):
+        # Sorting is stable, rows with equal values stay in row order
+        self.rows: List[int] = sorted(
+            range(len(values)), key=values.__getitem__)
+        self.values: List[float] = [values[row] for row in self.rows]
+
+    def add(self, row: int, value: float) -> None:
+        '''
+        Inserts a row, which must be numbered after every row already
+        indexed. Only the sorted lists are shifted, nothing is re-sorted.
+        '''
+
+        position = bisect_right(self.values, value)
+        self.values.insert(position, value)
+        self.rows.insert(position, row)
+
+    def count_at_most(self, bound: float) -> int:
+        '''Returns the number of rows with a value <= bound'''
+
+        return bisect_right(self.values, bound)
+
+    def count_at_least(self, bound: float) -> int:
+        '''Returns the number of rows with a value >= bound'''
+
+        return len(self.values) - bisect_left(self.values, bound)
+
+    def rows_at_most(self, bound: float) -> List[int]:
+        '''Returns the rows with a value <= bound, in increasing value order'''
+
+        return self.rows[:self.count_at_most(bound)]
+
+    def rows_at_least(self, bound: float) -> List[int]:
+        '''Returns the rows with a value >= bound, in increasing value order'''
+
+        return self.rows[bisect_left(self.values, bound):]
+
+    def __len__(self) -> int:
+        return len(self.rows)
@@ -0,0 +1,386 @@
+import csv
+import heapq
+import io
+import math
+import os
+from array import array
+from bisect import bisect_right, insort
+from itertools import islice
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+from search_restaurants_program import DEFAULT_CHUNK_SIZE, FilterRestaurantsCSVProgram
+from catalog.fuzzy_index import FuzzyIndex
+from catalog.prefix_index import PrefixIndex
+from catalog.query_planner import QueryPlan, QueryPlanner
+from catalog.range_index import RangeIndex
+from catalog.restaurant_columns import RestaurantColumns
+from catalog.spatial_index import DISTANCE_MARGIN, EARTH_RADIUS_MILES, SpatialGrid, locate_restaurant
+from models.restaurant import Restaurant
+from models.restaurant_criteria import RestaurantCriteria
+from ranking.keyset import Keyset, RestaurantPage, decode_cursor, page_of
+from ranking.top_k import DEFAULT_LIMIT, criteria_rank_key, rank_key
+from search_stats import SearchStats
+from specifications.restaurant import searches_names_fuzzily
+
+# Bytes before the ingested offset compared on refresh to detect rewrites
+_TAIL_SIZE = 4096
+
+# No two points are further apart than half the Earth's circumference
+_MAX_RADIUS = math.ceil(math.pi * EARTH_RADIUS_MILES)
+
+
+class RestaurantCatalog(FilterRestaurantsCSVProgram):
+    '''
+    A FilterRestaurantsCSVProgram which parses the cuisine and restaurant csv
+    files once and keeps the joined Restaurants in memory. Any number of
+    RestaurantCriteria can then be answered without reading the files again,
+    so a query only costs the filtering and ranking work.
+
+    With compact, the Restaurants are held in RestaurantColumns rather than a
+    list of objects, which takes a fraction of the memory but builds a
+    Restaurant object for every candidate a query checks.
+    '''
+
+    def __init__(self, cuisine_file_name: str, restaurant_file_name: str, use_snapshot: bool = False,
+                 compact: bool = False):
+        super().__init__(cuisine_file_name=cuisine_file_name,
+                         restaurant_file_name=restaurant_file_name, use_snapshot=use_snapshot)
+        self.compact = compact
+        self.restaurants: Union[List[Restaurant], RestaurantColumns] = []
+        self.name_index = PrefixIndex()
+        self.fuzzy_name_index = FuzzyIndex()
+        self.cuisine_index = PrefixIndex()
+        self.planner: Optional[QueryPlanner] = None
+        self.spatial_index = SpatialGrid()
+        # Every row, ordered by _keyset
+        self._ranked_rows = array('q')
+        self.reload()
+
+    def reload(self) -> None:
+        '''Re-parses the csv files, replacing the Restaurants held in memory'''
+
+        restaurant_file_state = self._stat_restaurant_file()
+
+        if self.compact:
+            # Restaurants are unique, RestaurantColumns drops duplicates
+            self.restaurants = RestaurantColumns(
+                self._build_cuisines_map().values(), self.read_restaurants())
+        else:
+            # Restaurants are unique, dict.fromkeys drops duplicates but keeps file order
+            self.restaurants = list(dict.fromkeys(self.read_restaurants()))
+            self._known_restaurants: Set[Restaurant] = set(self.restaurants)
+
+        self.name_index = PrefixIndex()
+        self.name_index.add_all(self._column('name'))
+        self.fuzzy_name_index = FuzzyIndex()
+        self.fuzzy_name_index.add_all(self._column('name'))
+        self.cuisine_index = PrefixIndex()
+        self.cuisine_index.add_all(self._column('cuisine'))
+
+        self.planner = QueryPlanner(
+            name_index=self.name_index,
+            cuisine_index=self.cuisine_index,
+            distance_index=RangeIndex(self._column('distance')),
+            price_index=RangeIndex(self._column('average_price')),
+            rating_index=RangeIndex(self._column('customer_rating')),
+            fuzzy_name_index=self.fuzzy_name_index
+        )
+
+        self.spatial_index = SpatialGrid()
+        for row, restaurant in enumerate(self.restaurants):
+            self._add_location(row, restaurant)
+
+        # Sorting is stable, so rows of the same rank stay in row order
+        rank_keys = list(zip(self._column('distance'), [-rating for rating in self._column('customer_rating')],
+                             self._column('average_price')))
+        self._ranked_rows = array('q', sorted(
+            range(len(rank_keys)), key=rank_keys.__getitem__))
+
+        self._cuisine_file_state = os.stat('csv/'+self.cuisine_file_name)
+        self._restaurant_file_state = restaurant_file_state
+        # Rows appended while parsing are ingested again by the next refresh
+        # and dropped as duplicates
+        self._ingested_offset = restaurant_file_state.st_size
+        with open('csv/'+self.restaurant_file_name, 'rb') as csvfile:
+            header = csvfile.readline()
+            self._ingested_tail = self._read_tail(csvfile)
+        self._fieldnames = next(csv.reader(
+            io.TextIOWrapper(io.BytesIO(header))), [])
+
+    def refresh(self) -> bool:
+        '''
+        Brings the catalog up to date with the csv files, returning whether
+        anything changed. When rows were only appended to the Restaurant CSV,
+        just the new rows are parsed and added to the Restaurants and indexes,
+        so the cost depends on the size of the new rows. If the CSV was
+        truncated or rewritten (its inode changed, it shrank, or the bytes
+        before the already ingested offset differ), or the cuisines changed,
+        everything is reloaded.
+        '''
+
+        restaurant_file_state = self._stat_restaurant_file()
+        cuisine_file_state = os.stat('csv/'+self.cuisine_file_name)
+        restaurants_changed = _has_changed(
+            self._restaurant_file_state, restaurant_file_state)
+        cuisines_changed = _has_changed(
+            self._cuisine_file_state, cuisine_file_state)
+        if not restaurants_changed and not cuisines_changed:
+            return False
+
+        if (cuisines_changed or restaurant_file_state.st_ino != self._restaurant_file_state.st_ino
+                or restaurant_file_state.st_size < self._ingested_offset):
+            self.reload()
+            return True
+
+        with open('csv/'+self.restaurant_file_name, 'rb') as csvfile:
+            if self._read_tail(csvfile) != self._ingested_tail:
+                self.reload()
+                return True
+            csvfile.seek(self._ingested_offset)
+            appended = csvfile.read(
+                restaurant_file_state.st_size - self._ingested_offset)
+
+        if self._ingested_tail and not self._ingested_tail.endswith(b'\n') and not appended.startswith((b'\n', b'\r')):
+            # The last row ingested had no line break and was extended
+            self.reload()
+            return True
+
+        restaurant_reader = csv.DictReader(io.TextIOWrapper(
+            io.BytesIO(appended)), fieldnames=self._fieldnames)
+        for restaurants in self._parse_restaurant_rows(
+                restaurant_reader, self._build_cuisines_map(), DEFAULT_CHUNK_SIZE):
+            for restaurant in restaurants:
+                self._add_restaurant(restaurant)
+
+        self._restaurant_file_state = restaurant_file_state
+        self._cuisine_file_state = cuisine_file_state
+        self._ingested_offset = restaurant_file_state.st_size
+        self._ingested_tail = (self._ingested_tail + appended)[-_TAIL_SIZE:]
+        return True
+
+    def _add_restaurant(self, restaurant: Restaurant) -> None:
+        '''Adds a restaurant after every other, unless it is already known'''
+
+        row = len(self.restaurants)
+        if self.compact:
+            if not self.restaurants.add(restaurant):
+                return
+        elif restaurant in self._known_restaurants:
+            return
+        else:
+            self._known_restaurants.add(restaurant)
+            self.restaurants.append(restaurant)
+        self.name_index.add(row, restaurant.name)
+        self.fuzzy_name_index.add(row, restaurant.name)
+        self.cuisine_index.add(row, restaurant.cuisine)
+        self.planner.distance_index.add(row, restaurant.distance)
+        self.planner.price_index.add(row, restaurant.average_price)
+        self.planner.rating_index.add(row, restaurant.customer_rating)
+        self._add_location(row, restaurant)
+        insort(self._ranked_rows, row, key=self._keyset)
+
+    def _column(self, attribute: str) -> Sequence:
+        '''Returns the values of one attribute of every restaurant, in row order'''
+
+        if self.compact:
+            return self.restaurants.column(attribute)
+        return [getattr(r, attribute) for r in self.restaurants]
+
+    def _add_location(self, row: int, restaurant: Restaurant) -> None:
+        if restaurant.latitude is not None and restaurant.longitude is not None:
+            self.spatial_index.add(
+                row, restaurant.latitude, restaurant.longitude)
+
+    def _stat_restaurant_file(self) -> os.stat_result:
+        return os.stat('csv/'+self.restaurant_file_name)
+
+    def _read_tail(self, csvfile: BinaryIO) -> bytes:
+        '''Reads the last bytes before the ingested offset, to detect rewrites'''
+
+        start = max(self._ingested_offset - _TAIL_SIZE, 0)
+        csvfile.seek(start)
+        return csvfile.read(self._ingested_offset - start)
+
+    def get_best_matched_restaurants(self, criteria: RestaurantCriteria, limit: int = DEFAULT_LIMIT) -> List[Restaurant]:
+        '''
+        Given a set of criteria, returns the top "limit" Restaurants which
+        satisfy the criteria. When the Criteria has an origin, the nearest
+        restaurants are found with the spatial index, see _get_nearest_restaurants,
+        unless names are searched with max_name_edits, which rank before distances.
+        '''
+
+        if criteria.origin is None or self.stats_collectors or searches_names_fuzzily(criteria):
+            return super().get_best_matched_restaurants(criteria, limit)
+        return self._get_nearest_restaurants(criteria, limit)
+
+    def get_best_matched_restaurants_page(self, criteria: RestaurantCriteria, limit: int = DEFAULT_LIMIT,
+                                          cursor: Optional[str] = None) -> RestaurantPage:
+        '''
+        Returns a page of the best matched restaurants, see
+        FilterRestaurantsCSVProgram.get_best_matched_restaurants_page, with
+        ties in row order. The catalog keeps its rows in ranked order, so a
+        page is found by seeking to the cursor and checking the following
+        rows until the page is full. When the Criteria's index produces fewer
+        candidates than that would check, the candidates after the cursor are
+        ranked instead. Either way, a later page costs about as much as the
+        first. With an origin or names searched with max_name_edits, which
+        change the ranking, every match is ranked.
+        '''
+
+        if criteria.origin is not None or searches_names_fuzzily(criteria):
+            return super().get_best_matched_restaurants_page(criteria, limit, cursor)
+
+        after = decode_cursor(cursor, criteria)
+        is_valid_restaurant = self._compile_criteria(criteria)
+        plan = self.plan(criteria)
+        # Rows in ranked order match about as often as estimated_rows / len(self)
+        if plan.access_path == 'scan' or plan.estimated_rows ** 2 >= (limit + 1) * len(self):
+            start = 0 if after is None else bisect_right(
+                self._ranked_rows, after, key=self._keyset)
+            ranked: List[Tuple[Keyset, Restaurant]] = []
+            for row in islice(self._ranked_rows, start, None):
+                restaurant = self.restaurants[row]
+                if is_valid_restaurant(restaurant):
+                    ranked.append((self._keyset(row), restaurant))
+                    if len(ranked) > limit:
+                        break
+        else:
+            candidates = (self._keyset(row)
+                          for row in self.planner.candidate_rows(plan, criteria))
+            keysets = heapq.nsmallest(limit + 1, (
+                keyset for keyset in candidates
+                if (after is None or keyset > after) and is_valid_restaurant(self.restaurants[keyset[-1]])))
+            ranked = [(keyset, self.restaurants[keyset[-1]])
+                      for keyset in keysets]
+        return page_of(ranked, limit)
+
+    def _keyset(self, row: int) -> Keyset:
+        return rank_key(self.restaurants[row]) + (row,)
+
+    def _get_nearest_restaurants(self, criteria: RestaurantCriteria, limit: int) -> List[Restaurant]:
+        '''
+        Searches for matches within a small radius of the origin, doubling it
+        until there are "limit" matches, it reaches the Criteria's max
+        distance or it covers every restaurant. Any restaurant outside the
+        radius is further away than every match, so ranking the matches
+        within it gives the same results as ranking every restaurant.
+        '''
+
+        is_valid_restaurant = self._compile_criteria(criteria)
+        radius = math.radians(
+            self.spatial_index.cell_degrees) * EARTH_RADIUS_MILES
+        while True:
+            if criteria.max_distance is not None:
+                radius = min(radius, criteria.max_distance)
+            matches = [restaurant for restaurant in self._located_within(criteria.origin, radius)
+                       if is_valid_restaurant(restaurant)]
+            if len(matches) >= limit or radius == criteria.max_distance or radius >= _MAX_RADIUS:
+                return self._get_top_restaurants(matches, limit)
+            radius *= 2
+
+    def _located_within(self, origin: Tuple[float, float], radius: float) -> List[Restaurant]:
+        '''
+        Returns, in file order, the restaurants within radius miles of the
+        origin with their distance measured from it. Distances are only
+        computed for the rows in the spatial index cells near the origin.
+        '''
+
+        located = (locate_restaurant(self.restaurants[row], origin)
+                   for row in self.spatial_index.rows_within(origin, radius + DISTANCE_MARGIN))
+        return [restaurant for restaurant in located if restaurant.distance <= radius]
+
+    def _located_candidates(self, criteria: RestaurantCriteria) -> List[Restaurant]:
+        '''
+        Returns the restaurants which can possibly match a Criteria with an
+        origin, with their distance measured from it: those within the max
+        distance, or every restaurant with coordinates.
+        '''
+
+        radius = _MAX_RADIUS if criteria.max_distance is None else criteria.max_distance
+        return self._located_within(criteria.origin, radius)
+
+    def iter_valid_restaurants(self, criteria: RestaurantCriteria) -> Iterator[Restaurant]:
+        '''
+        Yields, in file order, the in memory restaurants which conform to the
+        given Criteria. The most selective criteria picks the candidate
+        restaurants from its index, so only those are checked against the rest
+        of the Criteria. With an origin, the candidates come from the spatial
+        index and are yielded with their distance from the origin.
+        '''
+
+        if criteria.origin is not None:
+            candidates = iter(self._located_candidates(criteria))
+        else:
+            rows = self._candidate_rows(criteria)
+            candidates = iter(self.restaurants) if rows is None else (
+                self.restaurants[row] for row in sorted(rows))
+
+        valid_restaurant = self._adaptive_criteria_specification()
+        while True:
+            restaurants = list(islice(candidates, DEFAULT_CHUNK_SIZE))
+            if not restaurants:
+                return
+            yield from valid_restaurant.filter(restaurants, criteria)
+
+    def get_best_matched_restaurants_for_each(self, criterias: List[RestaurantCriteria],
+                                              limits: List[int]) -> List[List[Restaurant]]:
+        '''
+        Answers many criteria. The restaurants are already in memory, so each
+        criteria is answered on its own using the indexes.
+        '''
+
+        return [self.get_best_matched_restaurants(criteria, limit)
+                for criteria, limit in zip(criterias, limits)]
+
+    def _get_best_matched_restaurants_with_stats(self, criteria: RestaurantCriteria, limit: int) -> List[Restaurant]:
+        '''
+        The same search as get_best_matched_restaurants, measuring planning,
+        evaluating and ranking the candidates and counting the candidates
+        rejected by each specification.
+        '''
+
+        stats = SearchStats()
+        with stats.time('plan'):
+            plan = self.plan(criteria)
+            if criteria.origin is not None:
+                candidates = self._located_candidates(criteria)
+            else:
+                rows = self.planner.candidate_rows(plan, criteria)
+                candidates = self.restaurants if rows is None else [
+                    self.restaurants[row] for row in sorted(rows)]
+        stats.access_path = plan.access_path
+        stats.rows_read = len(candidates)
+
+        specifications = self._compile_criteria_leaves(criteria)
+        stats.rejected_by = dict.fromkeys(specifications, 0)
+        matches = self._evaluate_with_stats(candidates, specifications, stats)
+
+        with stats.time('rank'):
+            results = self._get_top_restaurants(
+                matches, limit, criteria_rank_key(criteria))
+        stats.results = len(results)
+        for collector in self.stats_collectors:
+            collector(stats)
+        return results
+
+    def plan(self, criteria: RestaurantCriteria) -> QueryPlan:
+        '''Returns the QueryPlan used to answer the Criteria'''
+
+        if criteria.origin is not None:
+            # Distances depend on the origin, so only the spatial index applies
+            return QueryPlan(access_path='spatial', estimated_rows=len(self.spatial_index))
+        return self.planner.plan(criteria)
+
+    def _candidate_rows(self, criteria: RestaurantCriteria) -> Optional[Iterable[int]]:
+        '''
+        Returns the rows which can possibly match the Criteria, or None when
+        every row has to be checked.
+        '''
+
+        return self.planner.candidate_rows(self.plan(criteria), criteria)
+
+    def __len__(self) -> int:
+        return len(self.restaurants)
+
+
+def _has_changed(before: os.stat_result, after: os.stat_result) -> bool:
+    return (before.st_ino, before.st_size, before.st_mtime_ns) != (after.st_ino, after.st_size, after.st_mtime_ns)
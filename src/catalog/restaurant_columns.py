@@ -0,0 +1,142 @@
+import math
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+from models.restaurant import Restaurant
+
+
+class RestaurantColumns(Sequence[Restaurant]):
+    '''
+    An append only sequence of unique Restaurants stored as columns rather
+    than objects: numbers in typed arrays, the cuisine as an integer code into
+    the distinct cuisine names and interned names, so a row costs a few dozen
+    bytes instead of a whole object. Restaurant objects are only built when a
+    row is read, and compare equal to the ones stored.
+    '''
+
+    def __init__(self, cuisine_names: Iterable[str] = (), restaurants: Iterable[Restaurant] = ()):
+        self.names: List[str] = []
+        self.ratings = array('q')
+        self.distances = array('d')
+        self.prices = array('d')
+        self.cuisine_codes = array('I')
+        # Missing coordinates are stored as NaN
+        self.latitudes = array('d')
+        self.longitudes = array('d')
+
+        # Codes are assigned in the order cuisines are first seen, starting
+        # with the given cuisine names (such as the cuisine csv's)
+        self.cuisine_names: List[str] = []
+        self._cuisine_codes: Dict[str, int] = {}
+        for cuisine in cuisine_names:
+            self._cuisine_code(cuisine)
+
+        # An open addressing hash table of rows, -1 for empty slots, and the
+        # hash of each slot's Restaurant. Kept in arrays rather than a dict
+        # as boxed ints would take more memory than the columns
+        self._slot_rows = array('q', [-1]) * 8
+        self._slot_hashes = array('q', [0]) * 8
+        for restaurant in restaurants:
+            self.add(restaurant)
+
+    def add(self, restaurant: Restaurant) -> bool:
+        '''Appends the restaurant unless it is already stored, returning whether it was'''
+
+        key = hash(restaurant)
+        slot = self._find_slot(restaurant, key)
+        if self._slot_rows[slot] >= 0:
+            return False
+        self._slot_rows[slot] = len(self.names)
+        self._slot_hashes[slot] = key
+
+        self.names.append(sys.intern(restaurant.name))
+        self.ratings.append(restaurant.customer_rating)
+        self.distances.append(restaurant.distance)
+        self.prices.append(restaurant.average_price)
+        self.cuisine_codes.append(self._cuisine_code(restaurant.cuisine))
+        self.latitudes.append(_to_column(restaurant.latitude))
+        self.longitudes.append(_to_column(restaurant.longitude))
+
+        if 2 * len(self.names) > len(self._slot_rows):
+            self._grow_slots()
+        return True
+
+    def column(self, attribute: str) -> Sequence:
+        '''Returns the values of one Restaurant attribute for every row, without building Restaurants'''
+
+        if attribute == 'cuisine':
+            return [self.cuisine_names[code] for code in self.cuisine_codes]
+        return {
+            'name': self.names,
+            'customer_rating': self.ratings,
+            'distance': self.distances,
+            'average_price': self.prices,
+        }[attribute]
+
+    def __contains__(self, restaurant: object) -> bool:
+        if not isinstance(restaurant, Restaurant):
+            return False
+        return self._slot_rows[self._find_slot(restaurant, hash(restaurant))] >= 0
+
+    def __getitem__(self, row: int) -> Restaurant:
+        return Restaurant(
+            name=self.names[row],
+            customer_rating=self.ratings[row],
+            distance=self.distances[row],
+            average_price=self.prices[row],
+            cuisine=self.cuisine_names[self.cuisine_codes[row]],
+            latitude=_from_column(self.latitudes[row]),
+            longitude=_from_column(self.longitudes[row])
+        )
+
+    def __iter__(self) -> Iterator[Restaurant]:
+        for name, rating, distance, price, code, latitude, longitude in zip(
+                self.names, self.ratings, self.distances, self.prices,
+                self.cuisine_codes, self.latitudes, self.longitudes):
+            yield Restaurant(name=name, customer_rating=rating, distance=distance,
+                             average_price=price, cuisine=self.cuisine_names[code],
+                             latitude=_from_column(latitude), longitude=_from_column(longitude))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _find_slot(self, restaurant: Restaurant, key: int) -> int:
+        '''Returns the slot holding the restaurant's row, or the empty slot to put it in'''
+
+        mask = len(self._slot_rows) - 1
+        slot = key & mask
+        while True:
+            row = self._slot_rows[slot]
+            if row < 0 or (self._slot_hashes[slot] == key and self[row] == restaurant):
+                return slot
+            slot = (slot + 1) & mask
+
+    def _grow_slots(self) -> None:
+        '''Doubles the hash table, keeping it at most half full'''
+
+        slot_rows, slot_hashes = self._slot_rows, self._slot_hashes
+        self._slot_rows = array('q', [-1]) * (2 * len(slot_rows))
+        self._slot_hashes = array('q', [0]) * (2 * len(slot_rows))
+        mask = len(self._slot_rows) - 1
+        for row, key in zip(slot_rows, slot_hashes):
+            if row >= 0:
+                slot = key & mask
+                while self._slot_rows[slot] >= 0:
+                    slot = (slot + 1) & mask
+                self._slot_rows[slot] = row
+                self._slot_hashes[slot] = key
+
+    def _cuisine_code(self, cuisine: str) -> int:
+        code = self._cuisine_codes.get(cuisine)
+        if code is None:
+            code = self._cuisine_codes[cuisine] = len(self.cuisine_names)
+            self.cuisine_names.append(sys.intern(cuisine))
+        return code
+
+
+def _to_column(coordinate: Optional[float]) -> float:
+    return math.nan if coordinate is None else coordinate
+
+
+def _from_column(coordinate: float) -> Optional[float]:
+    return None if math.isnan(coordinate) else coordinate
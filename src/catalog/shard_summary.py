@@ -0,0 +1,125 @@
+import json
+import math
+import os
+from typing import List, Optional, Set
+from dataclasses import dataclass, field
+from models.restaurant import Restaurant
+from models.restaurant_criteria import RestaurantCriteria
+from catalog.snapshot import FileState, file_state
+from specifications.restaurant import strings_partially_match
+
+SUMMARY_VERSION = 2
+
+
+def summary_path(cuisine_file_name: str, shard_file_name: str) -> str:
+    '''Returns where the summary of a shard is kept, next to the shard in csv/'''
+
+    directory, shard = os.path.split('csv/'+shard_file_name)
+    return os.path.join(directory, f'.{shard}.{os.path.basename(cuisine_file_name)}.summary')
+
+
+@dataclass
+class ShardSummary:
+    '''
+    The bounds of the restaurants in one shard of the restaurant csv: how
+    many there are, the least distance and price, the best rating and the
+    names of the cuisines served. A search whose criteria fall outside
+    these bounds can't match any restaurant of the shard, see can_match.
+    '''
+    rows: int = 0
+    min_distance: float = math.inf
+    min_price: float = math.inf
+    max_rating: int = 0
+    cuisines: Set[str] = field(default_factory=set)
+
+    def add_all(self, restaurants: List[Restaurant]) -> None:
+        '''Widens the bounds to take in the restaurants'''
+
+        if not restaurants:
+            return
+        self.rows += len(restaurants)
+        self.min_distance = min(self.min_distance, min(r.distance for r in restaurants))
+        self.min_price = min(self.min_price, min(r.average_price for r in restaurants))
+        self.max_rating = max(self.max_rating, max(r.customer_rating for r in restaurants))
+        self.cuisines.update(r.cuisine for r in restaurants)
+
+    def can_match(self, criteria: RestaurantCriteria) -> bool:
+        '''
+        Whether a restaurant of the shard may satisfy the Criteria. False
+        proves that none does, True only that the bounds don't rule it out.
+        Distances measured from an origin aren't bounded by the distance
+        column, so they never rule a shard out.
+        '''
+
+        if self.rows == 0:
+            return False
+        if (criteria.max_distance is not None and criteria.origin is None
+                and self.min_distance > criteria.max_distance):
+            return False
+        if criteria.max_price is not None and self.min_price > criteria.max_price:
+            return False
+        if (criteria.min_customer_rating is not None
+                and self.max_rating < criteria.min_customer_rating):
+            return False
+        return any(strings_partially_match(cuisine, criteria.cuisine) for cuisine in self.cuisines)
+
+
+class ShardSummaryFile(object):
+    '''
+    The ShardSummary of a shard kept as JSON next to it, with the inode,
+    size and modification time of the cuisine csv and the shard it was made
+    from. It is only loaded while both files are unchanged, which is checked
+    without reading them, so that the shards a search skips are never read.
+    '''
+
+    def __init__(self, cuisine_file_name: str, shard_file_name: str):
+        self.path = summary_path(cuisine_file_name, shard_file_name)
+        self.source_paths = ['csv/'+cuisine_file_name,
+                             'csv/'+shard_file_name]
+
+    def files_state(self) -> List[FileState]:
+        return [file_state(path) for path in self.source_paths]
+
+    def load(self, files_state: List[FileState]) -> Optional[ShardSummary]:
+        '''
+        Returns the summary, or None when there is none, it is unreadable or
+        it was made from different files.
+        '''
+
+        try:
+            with open(self.path, 'r') as file:
+                saved = json.load(file)
+            if (saved['version'] != SUMMARY_VERSION
+                    or saved['files_state'] != [list(state) for state in files_state]):
+                return None
+            return ShardSummary(rows=saved['rows'], min_distance=saved['min_distance'],
+                                min_price=saved['min_price'], max_rating=saved['max_rating'],
+                                cuisines=set(saved['cuisines']))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def write(self, files_state: List[FileState], summary: ShardSummary) -> None:
+        '''
+        Writes the summary of the files in the given state, replacing
+        it atomically. A directory which can't be written to is ignored as the
+        summary is only a cache.
+        '''
+
+        saved = {
+            'version': SUMMARY_VERSION,
+            'files_state': [list(state) for state in files_state],
+            'rows': summary.rows,
+            'min_distance': summary.min_distance,
+            'min_price': summary.min_price,
+            'max_rating': summary.max_rating,
+            'cuisines': sorted(summary.cuisines),
+        }
+
+        temporary_path = f'{self.path}.{os.getpid()}.tmp'
+        try:
+            with open(temporary_path, 'w') as file:
+                json.dump(saved, file)
+            os.replace(temporary_path, self.path)
+        except OSError:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
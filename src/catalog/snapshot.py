@@ -0,0 +1,187 @@
+import hashlib
+import math
+import marshal
+import os
+from array import array
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from models.restaurant import Restaurant
+
+SNAPSHOT_VERSION = 2
+_MAGIC = b'RESTSNAP'
+
+Fingerprint = Tuple[int, int, str]
+FileState = Tuple[int, int, int]
+
+
+def file_fingerprint(path: str) -> Fingerprint:
+    '''Returns the size, modification time and content hash of a file'''
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    stat = os.stat(path)
+    return (stat.st_size, stat.st_mtime_ns, digest.hexdigest())
+
+
+def file_state(path: str) -> FileState:
+    '''Returns the inode, size and modification time of a file, a cheap check for changes'''
+
+    stat = os.stat(path)
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+def snapshot_path(cuisine_file_name: str, restaurant_file_name: str) -> str:
+    '''Returns where the snapshot of the joined csv files is kept, next to them in csv/'''
+
+    return f'csv/.{restaurant_file_name}.{cuisine_file_name}.snapshot'
+
+
+@dataclass
+class SnapshotColumns:
+    '''
+    The restaurants of a snapshot, in file order, as the columns it stores:
+    numbers in typed arrays and the cuisine as a code into the cuisine
+    names, with NaN for missing coordinates. Restaurants are only built when
+    iterating, see compile_column_parser to only build some of them.
+    '''
+    cuisine_names: List[str]
+    names: List[str]
+    ratings: array
+    distances: array
+    prices: array
+    cuisine_codes: array
+    latitudes: array
+    longitudes: array
+
+    @classmethod
+    def from_restaurants(cls, restaurants: Iterable[Restaurant]) -> 'SnapshotColumns':
+        restaurants = list(restaurants)
+        cuisine_codes: Dict[str, int] = {}
+        codes = array('I', [cuisine_codes.setdefault(r.cuisine, len(cuisine_codes))
+                            for r in restaurants])
+        return cls(
+            cuisine_names=list(cuisine_codes),
+            names=[r.name for r in restaurants],
+            ratings=array('q', [r.customer_rating for r in restaurants]),
+            distances=array('d', [r.distance for r in restaurants]),
+            prices=array('d', [r.average_price for r in restaurants]),
+            cuisine_codes=codes,
+            latitudes=array('d', [_to_column(r.latitude) for r in restaurants]),
+            longitudes=array('d', [_to_column(r.longitude) for r in restaurants]),
+        )
+
+    def chunks(self, chunk_size: int) -> Iterator[Tuple[Sequence, ...]]:
+        '''Yields the columns of chunk_size rows at a time, in the order compile_column_parser takes them'''
+
+        for start in range(0, len(self.names), chunk_size):
+            stop = start + chunk_size
+            yield (self.names[start:stop], self.ratings[start:stop], self.distances[start:stop],
+                   self.prices[start:stop], self.cuisine_codes[start:stop],
+                   self.latitudes[start:stop], self.longitudes[start:stop])
+
+    def __getitem__(self, row: int) -> Restaurant:
+        return Restaurant(
+            name=self.names[row],
+            customer_rating=self.ratings[row],
+            distance=self.distances[row],
+            average_price=self.prices[row],
+            cuisine=self.cuisine_names[self.cuisine_codes[row]],
+            latitude=_from_column(self.latitudes[row]),
+            longitude=_from_column(self.longitudes[row])
+        )
+
+    def __iter__(self) -> Iterator[Restaurant]:
+        for name, rating, distance, price, code, latitude, longitude in zip(
+                self.names, self.ratings, self.distances, self.prices,
+                self.cuisine_codes, self.latitudes, self.longitudes):
+            yield Restaurant(name=name, customer_rating=rating, distance=distance,
+                             average_price=price, cuisine=self.cuisine_names[code],
+                             latitude=_from_column(latitude), longitude=_from_column(longitude))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+class RestaurantSnapshot(object):
+    '''
+    A compact binary copy of the restaurants parsed and joined from a cuisine
+    and restaurant csv, stored as columns next to the csv files. The snapshot
+    records the fingerprint (size, modification time and content hash) of both
+    csv files and is only loaded while they still match, so any change to a
+    csv file makes it stale and it is rebuilt from the csv files.
+    '''
+
+    def __init__(self, cuisine_file_name: str, restaurant_file_name: str):
+        self.path = snapshot_path(cuisine_file_name, restaurant_file_name)
+        self.source_paths = ['csv/'+cuisine_file_name,
+                             'csv/'+restaurant_file_name]
+
+    def fingerprints(self) -> List[Fingerprint]:
+        return [file_fingerprint(path) for path in self.source_paths]
+
+    def load(self, fingerprints: List[Fingerprint]) -> Optional[SnapshotColumns]:
+        '''
+        Returns the columns of the snapshot's restaurants, or None when there
+        is no snapshot, it is unreadable or it was built from different files.
+        No Restaurant is built, so loading costs little more than reading.
+        '''
+
+        try:
+            with open(self.path, 'rb') as file:
+                if file.read(len(_MAGIC)) != _MAGIC:
+                    return None
+                (version, snapshot_fingerprints, cuisine_names, names,
+                 ratings, distances, prices, cuisine_codes, latitudes, longitudes) = marshal.load(file)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+
+        if version != SNAPSHOT_VERSION or snapshot_fingerprints != [list(f) for f in fingerprints]:
+            return None
+
+        return SnapshotColumns(
+            cuisine_names=cuisine_names, names=names, ratings=array('q', ratings),
+            distances=array('d', distances), prices=array('d', prices),
+            cuisine_codes=array('I', cuisine_codes), latitudes=array('d', latitudes),
+            longitudes=array('d', longitudes))
+
+    def write(self, fingerprints: List[Fingerprint], columns: SnapshotColumns) -> None:
+        '''
+        Writes the restaurants' columns as the snapshot of the files with the
+        given fingerprints. The snapshot is replaced atomically, and a
+        directory which can't be written to is ignored as the snapshot is
+        only a cache.
+        '''
+
+        saved = (
+            SNAPSHOT_VERSION,
+            [list(f) for f in fingerprints],
+            columns.cuisine_names,
+            columns.names,
+            columns.ratings.tobytes(),
+            columns.distances.tobytes(),
+            columns.prices.tobytes(),
+            columns.cuisine_codes.tobytes(),
+            columns.latitudes.tobytes(),
+            columns.longitudes.tobytes(),
+        )
+
+        temporary_path = f'{self.path}.{os.getpid()}.tmp'
+        try:
+            with open(temporary_path, 'wb') as file:
+                file.write(_MAGIC)
+                marshal.dump(saved, file)
+            os.replace(temporary_path, self.path)
+        except OSError:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+
+def _to_column(coordinate: Optional[float]) -> float:
+    # Missing coordinates are stored as NaN in the double columns
+    return math.nan if coordinate is None else coordinate
+
+
+def _from_column(coordinate: float) -> Optional[float]:
+    return None if math.isnan(coordinate) else coordinate
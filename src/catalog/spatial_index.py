@@ -0,0 +1,115 @@
+import math
+from dataclasses import replace
+from typing import Dict, Iterable, List, Optional, Tuple
+from models.restaurant import Restaurant
+
+EARTH_RADIUS_MILES = 3958.8
+
+# Distances measured from an origin are rounded to hundredths of a mile
+DISTANCE_DECIMALS = 2
+
+# Approximate distances within this many miles of a bound are checked exactly
+DISTANCE_MARGIN = 10 ** -DISTANCE_DECIMALS
+
+
+def haversine_miles(origin: Tuple[float, float], latitude: float, longitude: float) -> float:
+    '''Returns the great circle distance in miles between the origin and a point'''
+
+    origin_latitude, origin_longitude = map(math.radians, origin)
+    latitude, longitude = math.radians(latitude), math.radians(longitude)
+    a = (math.sin((latitude - origin_latitude) / 2) ** 2
+         + math.cos(origin_latitude) * math.cos(latitude) * math.sin((longitude - origin_longitude) / 2) ** 2)
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, math.sqrt(a)))
+
+
+def locate_restaurant(restaurant: Restaurant, origin: Tuple[float, float]) -> Optional[Restaurant]:
+    '''
+    Returns the restaurant with its distance measured from the origin, or
+    None when the restaurant has no coordinates.
+    '''
+
+    if restaurant.latitude is None or restaurant.longitude is None:
+        return None
+    distance = haversine_miles(
+        origin, restaurant.latitude, restaurant.longitude)
+    return replace(restaurant, distance=round(distance, DISTANCE_DECIMALS))
+
+
+def locate_restaurants(restaurants: Iterable[Restaurant], origin: Tuple[float, float]) -> List[Restaurant]:
+    '''Locates every restaurant with coordinates, see locate_restaurant'''
+
+    located = (locate_restaurant(restaurant, origin)
+               for restaurant in restaurants)
+    return [restaurant for restaurant in located if restaurant is not None]
+
+
+class SpatialGrid(object):
+    '''
+    Buckets rows by latitude and longitude into square cells of cell_degrees.
+    A radius query only visits the cells overlapping the bounding box of the
+    circle, so haversine distances are only computed for nearby candidates.
+    '''
+
+    def __init__(self, cell_degrees: float = 0.1):
+        self.cell_degrees = cell_degrees
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        self.row_count = 0
+
+    def add(self, row: int, latitude: float, longitude: float) -> None:
+        self.cells.setdefault(self._cell(latitude, longitude), []).append(row)
+        self.row_count += 1
+
+    def rows_within(self, origin: Tuple[float, float], radius: float) -> List[int]:
+        '''
+        Returns, in row order, every row which may be within radius miles of
+        the origin: all of those rows, and some just outside.
+        '''
+
+        latitude, longitude = origin
+        angular_radius = radius / EARTH_RADIUS_MILES
+        latitude_delta = math.degrees(angular_radius)
+        min_latitude, max_latitude = latitude - latitude_delta, latitude + latitude_delta
+
+        if min_latitude <= -90 or max_latitude >= 90 or angular_radius >= math.pi / 2:
+            # The circle reaches a pole, every longitude is within range
+            longitude_delta = 180.0
+        else:
+            longitude_delta = math.degrees(math.asin(
+                min(1.0, math.sin(angular_radius) / math.cos(math.radians(latitude)))))
+
+        min_row = math.floor(max(min_latitude, -90) / self.cell_degrees)
+        max_row = math.floor(min(max_latitude, 90) / self.cell_degrees)
+        min_column = math.floor((longitude - longitude_delta) / self.cell_degrees)
+        max_column = math.floor((longitude + longitude_delta) / self.cell_degrees)
+        columns_per_turn = math.ceil(360 / self.cell_degrees)
+        if longitude_delta >= 180 or max_column - min_column + 1 >= columns_per_turn:
+            min_column, max_column = 0, columns_per_turn - 1
+
+        def in_box(cell: Tuple[int, int]) -> bool:
+            cell_row, cell_column = cell
+            # Columns wrap around at the antimeridian
+            return min_row <= cell_row <= max_row and (cell_column - min_column) % columns_per_turn <= max_column - min_column
+
+        box_cells = (max_row - min_row + 1) * (max_column - min_column + 1)
+        if box_cells > len(self.cells):
+            cells = [cell for cell in self.cells if in_box(cell)]
+        else:
+            cells = [self._wrap((cell_row, cell_column))
+                     for cell_row in range(min_row, max_row + 1)
+                     for cell_column in range(min_column, max_column + 1)]
+
+        rows: List[int] = []
+        for cell in cells:
+            rows.extend(self.cells.get(cell, ()))
+        rows.sort()
+        return rows
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return self._wrap((math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees)))
+
+    def _wrap(self, cell: Tuple[int, int]) -> Tuple[int, int]:
+        cell_row, cell_column = cell
+        return cell_row, cell_column % math.ceil(360 / self.cell_degrees)
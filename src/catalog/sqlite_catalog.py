@@ -0,0 +1,293 @@
+import json
+import os
+import sqlite3
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from search_restaurants_program import FilterRestaurantsCSVProgram
+from catalog.snapshot import file_fingerprint
+from catalog.spatial_index import DISTANCE_DECIMALS, haversine_miles
+from models.restaurant import Restaurant
+from models.restaurant_criteria import RestaurantCriteria
+from ranking.keyset import Keyset, RestaurantPage, decode_cursor, page_of
+from ranking.top_k import DEFAULT_LIMIT
+from search_stats import SearchStats
+from specifications.compiler import compile_specification_to_sql
+from specifications.restaurant import name_edit_distance, restaurant_criteria_specification, searches_names_fuzzily
+
+SCHEMA_VERSION = 1
+
+# Restaurants are unique, the same as Restaurant equality. Missing
+# coordinates are NULL, which a unique index would treat as all different
+_SCHEMA = '''
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE cuisines (
+    code INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    search_name TEXT NOT NULL
+);
+CREATE TABLE restaurants (
+    name TEXT NOT NULL,
+    search_name TEXT NOT NULL,
+    customer_rating INTEGER NOT NULL,
+    distance REAL NOT NULL,
+    average_price REAL NOT NULL,
+    cuisine_code INTEGER NOT NULL REFERENCES cuisines (code),
+    latitude REAL,
+    longitude REAL
+);
+CREATE UNIQUE INDEX restaurants_unique ON restaurants (
+    name, customer_rating, distance, average_price, cuisine_code,
+    ifnull(latitude, ''), ifnull(longitude, ''));
+CREATE INDEX restaurants_distance ON restaurants (distance);
+CREATE INDEX restaurants_price ON restaurants (average_price);
+CREATE INDEX restaurants_rating ON restaurants (customer_rating);
+CREATE INDEX restaurants_cuisine ON restaurants (cuisine_code);
+'''
+
+
+def database_path(cuisine_file_name: str, restaurant_file_name: str) -> str:
+    '''Returns where the database imported from the csv files is kept, next to them in csv/'''
+
+    return f'csv/.{restaurant_file_name}.{cuisine_file_name}.sqlite'
+
+
+def search_name(string: str) -> str:
+    '''The column searched by partial_match_sql: " " + the lowercased string'''
+
+    return ' ' + string.lower()
+
+
+def located_distance(origin_latitude: float, origin_longitude: float,
+                     latitude: Optional[float], longitude: Optional[float]) -> Optional[float]:
+    '''The distance of locate_restaurant, as an SQL function'''
+
+    if latitude is None or longitude is None:
+        return None
+    return round(haversine_miles((origin_latitude, origin_longitude), latitude, longitude), DISTANCE_DECIMALS)
+
+
+class SQLiteRestaurantCatalog(FilterRestaurantsCSVProgram):
+    '''
+    A catalog which imports the cuisine and restaurant csv files into a local
+    SQLite database, indexed on distance, price, rating and cuisine, rather
+    than holding the restaurants in memory. A RestaurantCriteria is answered
+    by translating its specification into a parameterized WHERE clause and
+    letting SQLite rank and limit the matches. The database records the
+    fingerprints of the csv files and is imported again when they change.
+    '''
+
+    def __init__(self, cuisine_file_name: str, restaurant_file_name: str, path: Optional[str] = None):
+        super().__init__(cuisine_file_name=cuisine_file_name,
+                         restaurant_file_name=restaurant_file_name)
+        self.path = path or database_path(
+            cuisine_file_name, restaurant_file_name)
+        self.connection: Optional[sqlite3.Connection] = None
+        # Cuisine names by their code in the database
+        self.cuisine_names: List[str] = []
+
+        fingerprints = self._fingerprints()
+        self._connect()
+        if self._stored_fingerprints() == fingerprints:
+            self.cuisine_names = [name for name, in self.connection.execute(
+                'SELECT name FROM cuisines ORDER BY code')]
+        else:
+            self._import(fingerprints)
+
+    def reload(self) -> None:
+        '''Imports the csv files again, replacing the database'''
+
+        self._import(self._fingerprints())
+
+    def get_best_matched_restaurants(self, criteria: RestaurantCriteria, limit: int = DEFAULT_LIMIT) -> List[Restaurant]:
+        '''
+        Given a set of criteria, returns the top "limit" Restaurants which
+        satisfy the criteria, ranked and limited by SQLite.
+        '''
+
+        if self.stats_collectors:
+            return self._get_best_matched_restaurants_with_stats(criteria, limit)
+
+        query, parameters = self._select(criteria, limit)
+        return [self._build_restaurant(row) for row in self.connection.execute(query, parameters)]
+
+    def iter_valid_restaurants(self, criteria: RestaurantCriteria) -> Iterator[Restaurant]:
+        '''Yields, in file order, the restaurants which conform to the given Criteria'''
+
+        query, parameters = self._select(criteria)
+        for row in self.connection.execute(query, parameters):
+            yield self._build_restaurant(row)
+
+    def get_best_matched_restaurants_page(self, criteria: RestaurantCriteria, limit: int = DEFAULT_LIMIT,
+                                          cursor: Optional[str] = None) -> RestaurantPage:
+        '''
+        Returns a page of the best matched restaurants, see
+        FilterRestaurantsCSVProgram.get_best_matched_restaurants_page, with
+        ties in row order. The query only selects the rows ranked after the
+        cursor's keyset, so SQLite ranks no more rows for a later page than
+        for the first.
+        '''
+
+        query, parameters = self._select(
+            criteria, limit + 1, decode_cursor(cursor, criteria))
+        return page_of([(tuple(row[7:]), self._build_restaurant(row))
+                        for row in self.connection.execute(query, parameters)], limit)
+
+    def get_best_matched_restaurants_for_each(self, criterias: List[RestaurantCriteria],
+                                              limits: List[int]) -> List[List[Restaurant]]:
+        '''Answers many criteria, each with its own query'''
+
+        return [self.get_best_matched_restaurants(criteria, limit)
+                for criteria, limit in zip(criterias, limits)]
+
+    def _get_best_matched_restaurants_with_stats(self, criteria: RestaurantCriteria, limit: int) -> List[Restaurant]:
+        '''
+        The same search as get_best_matched_restaurants, timing the query and
+        reporting the plan SQLite chose as the access path. SQLite doesn't
+        report the rows it reads or which condition rejected them, matches
+        are counted with a separate query.
+        '''
+
+        stats = SearchStats(rows_read=None)
+        with stats.time('count matches'):
+            count_query, parameters = self._select(criteria)
+            stats.matches = self.connection.execute(
+                f'SELECT count(*) FROM ({count_query})', parameters).fetchone()[0]
+
+        query, parameters = self._select(criteria, limit)
+        stats.access_path = '; '.join(
+            row[3] for row in self.connection.execute('EXPLAIN QUERY PLAN ' + query, parameters))
+
+        with stats.time('query'):
+            results = [self._build_restaurant(row)
+                       for row in self.connection.execute(query, parameters)]
+        stats.results = len(results)
+        for collector in self.stats_collectors:
+            collector(stats)
+        return results
+
+    def _select(self, criteria: RestaurantCriteria, limit: Optional[int] = None,
+                after: Optional[Keyset] = None) -> Tuple[str, Dict[str, Any]]:
+        '''
+        Returns the query selecting the restaurants matching the Criteria,
+        ranked and limited when given a limit, otherwise in file order, and
+        only those ranked after the given keyset. Each restaurant is followed
+        by its keyset. With an origin the distance column is measured from
+        it, and rows which differ only in their stored distance are the same
+        restaurant once located, so only the first of them is kept. Names
+        searched with max_name_edits are checked on every row, no index
+        applies.
+        '''
+
+        condition, parameters = compile_specification_to_sql(
+            restaurant_criteria_specification(), criteria)
+        if criteria.origin is None:
+            restaurants = '''
+                SELECT rowid AS row, name, search_name, customer_rating, distance,
+                       average_price, cuisine_code, latitude, longitude
+                FROM restaurants'''
+        else:
+            parameters['origin_latitude'], parameters['origin_longitude'] = criteria.origin
+            # Grouped on the located row, the other columns are those of its first row
+            distance = 'located_distance(:origin_latitude, :origin_longitude, latitude, longitude)'
+            restaurants = f'''
+                SELECT min(rowid) AS row, name, search_name, customer_rating, {distance} AS distance,
+                       average_price, cuisine_code, latitude, longitude
+                FROM restaurants
+                GROUP BY name, customer_rating, {distance}, average_price, cuisine_code, latitude, longitude'''
+
+        keyset = ['distance', '-customer_rating', 'average_price', 'row']
+        order = 'distance, customer_rating DESC, average_price, row'
+        if searches_names_fuzzily(criteria):
+            parameters['restaurant_name'] = criteria.restaurant_name
+            keyset.insert(0, 'name_edit_distance(name, :restaurant_name)')
+            order = 'name_edit_distance(name, :restaurant_name), ' + order
+
+        query = f'''
+            SELECT name, customer_rating, distance, average_price, cuisine_code, latitude, longitude,
+                   {', '.join(keyset)}
+            FROM ({restaurants}
+            )
+            WHERE distance IS NOT NULL AND {condition}'''
+        if after is not None:
+            # A row value comparison, ranked after the keyset
+            parameters.update((f'after_{i}', value)
+                              for i, value in enumerate(after))
+            query += f''' AND ({', '.join(keyset)}) > ({', '.join(f':after_{i}' for i in range(len(after)))})'''
+        if limit is None:
+            return query + ' ORDER BY row', parameters
+
+        parameters['limit'] = limit
+        return query + f' ORDER BY {order} LIMIT :limit', parameters
+
+    def _build_restaurant(self, row: Tuple) -> Restaurant:
+        name, rating, distance, price, cuisine_code, latitude, longitude = row[:7]
+        return Restaurant(name=name, customer_rating=rating, distance=distance, average_price=price,
+                          cuisine=self.cuisine_names[cuisine_code], latitude=latitude, longitude=longitude)
+
+    def _fingerprints(self) -> List[List[Any]]:
+        return [list(file_fingerprint('csv/'+file_name))
+                for file_name in [self.cuisine_file_name, self.restaurant_file_name]]
+
+    def _stored_fingerprints(self) -> Optional[List[List[Any]]]:
+        '''Returns the fingerprints the database was imported from, or None when it is unusable'''
+
+        try:
+            meta = dict(self.connection.execute('SELECT key, value FROM meta'))
+        except sqlite3.DatabaseError:
+            return None
+        if meta.get('version') != str(SCHEMA_VERSION):
+            return None
+        return json.loads(meta['fingerprints'])
+
+    def _connect(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+        self.connection = sqlite3.connect(self.path)
+        self.connection.create_function(
+            'located_distance', 4, located_distance, deterministic=True)
+        self.connection.create_function(
+            'name_edit_distance', 2, name_edit_distance, deterministic=True)
+
+    def _import(self, fingerprints: List[List[Any]]) -> None:
+        '''
+        Imports the csv files into a new database, streaming the restaurants
+        a chunk at a time, then replaces the database with it.
+        '''
+
+        temporary_path = f'{self.path}.{os.getpid()}.tmp'
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+        connection = sqlite3.connect(temporary_path)
+        try:
+            connection.executescript(_SCHEMA)
+
+            # Cuisines sharing a name share a code, as Restaurants only know the name
+            cuisine_codes: Dict[str, int] = {}
+            for cuisine in self._build_cuisines_map().values():
+                cuisine_codes.setdefault(cuisine, len(cuisine_codes))
+
+            for restaurants in self.read_restaurant_chunks():
+                connection.executemany(
+                    'INSERT OR IGNORE INTO restaurants VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    [(r.name, search_name(r.name), r.customer_rating, r.distance, r.average_price,
+                      cuisine_codes.setdefault(r.cuisine, len(cuisine_codes)), r.latitude, r.longitude)
+                     for r in restaurants])
+
+            connection.executemany('INSERT INTO cuisines VALUES (?, ?, ?)',
+                                   [(code, cuisine, search_name(cuisine)) for cuisine, code in cuisine_codes.items()])
+            connection.executemany('INSERT INTO meta VALUES (?, ?)', [
+                ('version', str(SCHEMA_VERSION)),
+                ('fingerprints', json.dumps(fingerprints)),
+            ])
+            connection.execute('ANALYZE')
+            connection.commit()
+        finally:
+            connection.close()
+
+        self.connection.close()
+        os.replace(temporary_path, self.path)
+        self._connect()
+        self.cuisine_names = list(cuisine_codes)
+
+    def __len__(self) -> int:
+        return self.connection.execute('SELECT count(*) FROM restaurants').fetchone()[0]
@@ -1,11 +1,22 @@
 #!/usr/bin/env python
 
 import argparse
-from typing import Any, List
+import math
+import sys
+from typing import Any, List, Optional, Tuple
 from os.path import exists
 from specifications.restaurant import RestaurantCriteria
 from search_restaurants_program import FilterRestaurantsCSVProgram
+from parallel_search_restaurants_program import ParallelFilterRestaurantsCSVProgram
+from sharded_search_restaurants_program import ShardedFilterRestaurantsCSVProgram, find_shards
+from catalog.sqlite_catalog import SQLiteRestaurantCatalog
 from models.restaurant import Restaurant
+from output_formats import OUTPUT_FORMATS
+from ranking.top_k import DEFAULT_LIMIT
+from search_stats import SearchStats
+
+# Typos allowed in a searched name by --fuzzy when no number is given
+DEFAULT_MAX_NAME_EDITS = 2
 
 
 def main(args) -> List[Restaurant]:
@@ -15,35 +26,102 @@ def main(args) -> List[Restaurant]:
         max_distance=args.distance,
         max_price=args.price,
         min_customer_rating=args.customer_rating,
-        cuisine=args.cuisine
+        cuisine=args.cuisine,
+        origin=args.origin,
+        max_name_edits=args.fuzzy
     )
 
     restaurant_file_name: str = args.restaurant_file
     cuisine_file_name: str = args.cuisine_file
 
-    program = FilterRestaurantsCSVProgram(
-        restaurant_file_name=restaurant_file_name, cuisine_file_name=cuisine_file_name)
-
-    top_restaurants: List[Restaurant] = program.get_best_matched_restaurants(
-        criteria)
-    program.display(top_restaurants)
+    if args.stats and args.cursor is not None:
+        raise SystemExit('index.py: error: --stats measures whole searches, not --cursor pages')
+
+    if args.shards is not None:
+        if args.sqlite:
+            raise SystemExit('index.py: error: --sqlite can not search --shards')
+        program = ShardedFilterRestaurantsCSVProgram(
+            cuisine_file_name=cuisine_file_name, shard_pattern=args.shards,
+            workers=args.workers, use_snapshot=args.snapshot)
+    elif args.sqlite:
+        program = SQLiteRestaurantCatalog(
+            restaurant_file_name=restaurant_file_name, cuisine_file_name=cuisine_file_name)
+    elif args.workers > 1:
+        program = ParallelFilterRestaurantsCSVProgram(
+            restaurant_file_name=restaurant_file_name, cuisine_file_name=cuisine_file_name,
+            workers=args.workers)
+    else:
+        program = FilterRestaurantsCSVProgram(
+            restaurant_file_name=restaurant_file_name, cuisine_file_name=cuisine_file_name,
+            use_snapshot=args.snapshot)
+
+    collected_stats: List[SearchStats] = []
+    if args.stats:
+        program.add_stats_collector(collected_stats.append)
+
+    if args.cursor is None:
+        top_restaurants: List[Restaurant] = program.get_best_matched_restaurants(
+            criteria, limit=args.limit)
+        program.display(top_restaurants, args.format)
+    else:
+        try:
+            page = program.get_best_matched_restaurants_page(
+                criteria, limit=args.limit, cursor=args.cursor)
+        except ValueError as error:
+            raise SystemExit(f'index.py: error: {error}')
+        top_restaurants = page.restaurants
+        program.display(top_restaurants, args.format)
+        print_next_page(page.cursor, args.format)
+
+    for stats in collected_stats:
+        print(stats.format(), file=sys.stderr)
 
     return top_restaurants
 
 
+def print_next_page(cursor: Optional[str], output_format: str) -> None:
+    '''Prints how to get the next page, to stderr unless it would go in a table'''
+
+    print('No more restaurants' if cursor is None else f'Next page: --cursor {cursor}',
+          file=sys.stdout if output_format == 'table' else sys.stderr)
+
+
 def make_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description='Filter and display CSV Recipe data given a set of criteria.')
     parser.add_argument('-f', '--restaurant-file', type=is_valid_csv_file,
                         help='Name of restaurant data csv located in src/csv. Must contain .csv', default='restaurants.csv')
+    parser.add_argument('--shards', type=is_shard_pattern, metavar='GLOB_OR_DIRECTORY',
+                        help='Search every restaurant csv in src/csv matching a glob, or in a directory, instead of --restaurant-file. '
+                        'Shards share --cuisine-file and are searched on --workers processes')
     parser.add_argument('--cuisine-file', type=is_valid_csv_file,
                         help='Name of cuisines data csv located in src/csv. Must contain .csv', default='cuisines.csv')
+    add_query_arguments(parser)
+    parser.add_argument('--snapshot', action=argparse.BooleanOptionalAction, default=False,
+                        help='Load every restaurant from a cached snapshot of the CSVs, rebuilt when they change, '
+                        'rather than streaming the CSVs. Defaults to streaming')
+    parser.add_argument('--sqlite', action='store_true',
+                        help='Search a SQLite database imported from the CSVs, kept next to them and imported again when they change')
+    parser.add_argument('-w', '--workers', type=is_positive_int, default=1,
+                        help='Number of processes searching the restaurant CSV in parallel, defaults to 1')
+    parser.add_argument('--stats', action='store_true',
+                        help='Print the time spent in each stage of the search and the restaurants each criteria rejected. '
+                        'Searches on a single process, and CSVs on an unoptimized path which checks every criteria of every row')
+    return parser
+
+
+def add_query_arguments(parser: argparse.ArgumentParser) -> None:
+    '''Adds the arguments describing a search and how its results are shown'''
+
     parser.add_argument(
         '-n',
         '--name',
         type=str,
         help='Prefix of one of the words in the name of the restaurant, ignores case when filtering',
     )
+    parser.add_argument('--fuzzy', type=is_positive_int, nargs='?', const=DEFAULT_MAX_NAME_EDITS, metavar='EDITS',
+                        help='Also match names with a word within EDITS typos (letters inserted, deleted or replaced) '
+                        f'of --name, {DEFAULT_MAX_NAME_EDITS} when not given. Fewest typos rank first')
     parser.add_argument('-d', '--distance',
                         type=is_positive_float, help='Max distance in miles to the restaurant')
     parser.add_argument('--customer-rating', metavar="[1-5]", choices=range(1, 6),
@@ -52,18 +130,61 @@ def make_parser() -> argparse.ArgumentParser:
                         type=is_positive_float, help='Max price in US dollars for the average price')
     parser.add_argument('-c', '--cuisine', type=str,
                         help='Prefix of one of the words in a cuisine name, ignores case when filtering')
-    return parser
+    parser.add_argument('--origin', type=is_coordinate, metavar='LATITUDE,LONGITUDE',
+                        help='Measure distances from this point, using the latitude and longitude columns of the restaurant csv. '
+                        'Restaurants without coordinates are left out')
+    parser.add_argument('--cursor', nargs='?', const='',
+                        help='Page through the results: without a value shows the first page, which ends with '
+                        'the cursor of the next page to pass here. Cursors are only valid for the same search')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='table',
+                        help='Print the restaurants as a table, csv with a header row or JSON Lines, defaults to table')
+    parser.add_argument('-k', '--limit', type=is_positive_int, default=DEFAULT_LIMIT,
+                        help=f'Max number of best matched restaurants to return, defaults to {DEFAULT_LIMIT}')
 
 
 def is_positive_float(value: Any) -> bool:
     '''Determines if the value is a positive float, otherwise throws argparse error'''
     value = float(value)
-    if value <= 0:
+    if not math.isfinite(value) or value <= 0:
         raise argparse.ArgumentTypeError(
             f'{value} is an invalid positive float value')
     return value
 
 
+def is_positive_int(value: Any) -> int:
+    '''Determines if the value is a positive integer, otherwise throws argparse error'''
+    try:
+        value = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f'{value} is an invalid positive int value')
+    if value <= 0:
+        raise argparse.ArgumentTypeError(
+            f'{value} is an invalid positive int value')
+    return value
+
+
+def is_coordinate(value: Any) -> Tuple[float, float]:
+    '''Determines if the value is a "latitude,longitude" pair, otherwise throws argparse error'''
+    try:
+        latitude, longitude = (float(part) for part in value.split(','))
+    except (AttributeError, ValueError):
+        raise argparse.ArgumentTypeError(
+            f'{value} is an invalid latitude,longitude pair')
+    if not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+        raise argparse.ArgumentTypeError(
+            f'{value} is an invalid latitude,longitude pair')
+    return latitude, longitude
+
+
+def is_shard_pattern(value: Any) -> str:
+    '''Determines if the value is a glob or directory in csv/ with restaurant .csv files, otherwise throws argparse error'''
+    if not find_shards(value, ''):
+        raise argparse.ArgumentTypeError(
+            f'csv/{value} has no restaurant CSV files')
+    return value
+
+
 def is_valid_csv_file(value: Any) -> bool:
     '''Determines if the value is a .csv file and exists in csv/, otherwise throws argparse error'''
     if not exists('csv/'+value):
@@ -1,12 +1,16 @@
 
+from typing import Optional
 from dataclasses import dataclass
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Restaurant:
-    '''Represents a Restaurant'''
+    '''Represents a Restaurant, without a per instance __dict__'''
     name: str
     customer_rating: int
     distance: float
     average_price: float
     cuisine: str
+    # Only known when the restaurant CSV has latitude and longitude columns
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
@@ -1,5 +1,5 @@
 
-from typing import Optional
+from typing import Optional, Tuple
 from dataclasses import dataclass
 
 
@@ -7,10 +7,15 @@ from dataclasses import dataclass
 class RestaurantCriteria():
     '''
     Represents a set of criteria to compare a Restaurant to. Criteria is
-    optional and thus fields not being filtered for are None.
+    optional and thus fields not being filtered for are None. When an origin
+    (latitude, longitude) is given, distances are measured from it rather
+    than taken from the distance column. When max_name_edits is given,
+    names match with up to that many typos, see name_edit_distance.
     '''
     restaurant_name: Optional[str]
     max_distance: Optional[float]
     max_price: Optional[str]
     min_customer_rating: Optional[int]
     cuisine: Optional[str]
+    origin: Optional[Tuple[float, float]] = None
+    max_name_edits: Optional[int] = None
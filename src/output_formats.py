@@ -0,0 +1,116 @@
+import csv
+import io
+import json
+import math
+import sys
+from dataclasses import fields
+from itertools import islice
+from json.encoder import encode_basestring_ascii
+from operator import attrgetter
+from typing import Iterable, Iterator, List, Optional, TextIO, Tuple
+from models.restaurant import Restaurant
+
+OUTPUT_FORMATS = ['table', 'csv', 'jsonl']
+
+# Restaurants formatted together and written to the stream in one write
+WRITE_CHUNK_SIZE = 1000
+
+# Every attribute of a Restaurant, the csv columns and jsonl keys
+_FIELDS = [field.name for field in fields(Restaurant)]
+
+# A JSON Lines line, the same as json.dumps of the Restaurant as a dict
+_JSON_LINE = ('{"name": %s, "customer_rating": %d, "distance": %s, "average_price": %s, '
+              '"cuisine": %s, "latitude": %s, "longitude": %s}\n')
+
+_TABLE_HEADERS = ('Name', 'Rating (stars)', 'Distance (mi)',
+                  'Avg. Price ($)', 'Cuisine')
+# Spaces between table columns
+_TABLE_GUTTER = 3
+
+
+def write_restaurants(restaurants: Iterable[Restaurant], output_format: str = 'table',
+                      stream: Optional[TextIO] = None) -> None:
+    '''
+    Writes the restaurants to the stream (stdout by default) as a table, csv
+    with a header row or JSON Lines. Restaurants are formatted and written
+    WRITE_CHUNK_SIZE at a time, rather than a write per restaurant. The csv
+    and jsonl formats stream: each chunk is written and flushed as soon as
+    the restaurants are produced, so any iterable, however long, can be
+    written. A table is sized to fit its cells, so it is written once every
+    restaurant is known. Raises a ValueError for an unknown output format.
+    '''
+
+    writers = {'table': _write_table, 'csv': _write_csv, 'jsonl': _write_jsonl}
+    if output_format not in writers:
+        raise ValueError(
+            f'{output_format} is an invalid output format, choose from {", ".join(OUTPUT_FORMATS)}')
+    writers[output_format](iter(restaurants), sys.stdout if stream is None else stream)
+
+
+def _chunks(restaurants: Iterator[Restaurant]) -> Iterator[List[Restaurant]]:
+    while True:
+        chunk = list(islice(restaurants, WRITE_CHUNK_SIZE))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _write_jsonl(restaurants: Iterator[Restaurant], stream: TextIO) -> None:
+    for chunk in _chunks(restaurants):
+        stream.write(''.join([_JSON_LINE % (
+            encode_basestring_ascii(r.name), r.customer_rating,
+            _json_number(r.distance), _json_number(r.average_price),
+            encode_basestring_ascii(r.cuisine),
+            _json_number(r.latitude), _json_number(r.longitude)) for r in chunk]))
+        stream.flush()
+
+
+def _json_number(number: Optional[float]) -> str:
+    '''Writes a number or None as json.dumps does'''
+
+    if number is None:
+        return 'null'
+    if math.isfinite(number):
+        return repr(number)
+    return json.dumps(number)
+
+
+def _write_csv(restaurants: Iterator[Restaurant], stream: TextIO) -> None:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(_FIELDS)
+    values = attrgetter(*_FIELDS)
+
+    for chunk in _chunks(restaurants):
+        # Missing coordinates are written as empty fields
+        writer.writerows(values(restaurant) for restaurant in chunk)
+        stream.write(buffer.getvalue())
+        stream.flush()
+        buffer.seek(0)
+        buffer.truncate()
+    stream.write(buffer.getvalue())
+    stream.flush()
+
+
+def _write_table(restaurants: Iterator[Restaurant], stream: TextIO) -> None:
+    '''
+    Writes a table with each column as wide as its widest cell. Every cell
+    is formatted once, in a single pass over the restaurants, and the column
+    widths are measured from those cells.
+    '''
+
+    rows: List[Tuple[str, ...]] = [
+        (r.name, str(r.customer_rating), str(r.distance), str(r.average_price), r.cuisine)
+        for r in restaurants]
+
+    widths = [max(len(header), max((len(row[column]) for row in rows), default=0))
+              for column, header in enumerate(_TABLE_HEADERS)]
+    # The last column is not padded
+    line = ''.join(f'%-{width + _TABLE_GUTTER}s' for width in widths[:-1]) + '%s\n'
+
+    stream.write('\n' + line % _TABLE_HEADERS)
+    for start in range(0, len(rows), WRITE_CHUNK_SIZE):
+        stream.write(''.join([line % row
+                              for row in rows[start:start+WRITE_CHUNK_SIZE]]))
+    stream.write('\n\n')
+    stream.flush()
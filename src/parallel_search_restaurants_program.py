@@ -0,0 +1,119 @@
+import csv
+import io
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, List, Tuple
+from search_restaurants_program import DEFAULT_CHUNK_SIZE, FilterRestaurantsCSVProgram
+from models.restaurant import Restaurant
+from models.restaurant_criteria import RestaurantCriteria
+from ranking.top_k import DEFAULT_LIMIT, TopRestaurants, criteria_rank_key
+
+
+class ParallelFilterRestaurantsCSVProgram(FilterRestaurantsCSVProgram):
+    '''
+    A FilterRestaurantsCSVProgram which searches the Restaurant CSV on several
+    processes. The CSV is split into byte ranges aligned to line boundaries,
+    each range is parsed and filtered by a worker which ranks its own top
+    restaurants, and those are merged into the overall top restaurants. The
+    results are identical to the serial program. A CSV with any quote is
+    searched serially, as a quoted field may hold a line break which is not
+    the end of a row.
+    '''
+
+    def __init__(self, cuisine_file_name: str, restaurant_file_name: str, workers: int = os.cpu_count() or 1):
+        super().__init__(cuisine_file_name=cuisine_file_name,
+                         restaurant_file_name=restaurant_file_name)
+        self.workers = workers
+
+    def get_best_matched_restaurants(self, criteria: RestaurantCriteria, limit: int = DEFAULT_LIMIT) -> List[Restaurant]:
+        '''
+        Given a set of criteria, returns the top "limit" Restaurants which
+        satisfy the criteria, searching the ranges of the CSV in parallel.
+        '''
+
+        # Stats measure the stages of a single process search
+        if self.workers <= 1 or self.stats_collectors:
+            return super().get_best_matched_restaurants(criteria, limit)
+
+        fieldnames, byte_ranges = self._split_restaurant_file(self.workers)
+        if len(byte_ranges) <= 1:
+            return super().get_best_matched_restaurants(criteria, limit)
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            range_results = executor.map(
+                self._get_best_matched_restaurants_in_range,
+                [fieldnames] * len(byte_ranges), byte_ranges,
+                [criteria] * len(byte_ranges), [limit] * len(byte_ranges))
+
+            # Each range's results are ranked and the ranges are merged in
+            # file order, so ties resolve in file order like the serial program
+            top_restaurants = TopRestaurants(limit, criteria_rank_key(criteria))
+            for restaurants in range_results:
+                top_restaurants.add_all(restaurants)
+        return top_restaurants.results()
+
+    def _get_best_matched_restaurants_in_range(self, fieldnames: List[str], byte_range: Tuple[int, int],
+                                               criteria: RestaurantCriteria, limit: int) -> List[Restaurant]:
+        '''Runs on a worker, returns the top restaurants of one byte range of the CSV'''
+
+        start, end = byte_range
+        with open('csv/'+self.restaurant_file_name, 'rb') as csvfile:
+            csvfile.seek(start)
+            data = csvfile.read(end - start)
+
+        # Decoded the same way open() decodes the whole CSV for the serial program
+        restaurant_reader = csv.DictReader(io.TextIOWrapper(
+            io.BytesIO(data)), fieldnames=fieldnames)
+        valid_restaurant = self._adaptive_criteria_specification()
+
+        top_restaurants = TopRestaurants(limit, criteria_rank_key(criteria))
+        for restaurants in self._parse_restaurant_rows(
+                restaurant_reader, self._build_cuisines_map(), DEFAULT_CHUNK_SIZE, criteria):
+            top_restaurants.add_all(valid_restaurant.filter(
+                self._locate(restaurants, criteria), criteria))
+        return top_restaurants.results()
+
+    def _split_restaurant_file(self, parts: int) -> Tuple[List[str], List[Tuple[int, int]]]:
+        '''
+        Reads the header of the Restaurant CSV and splits the rows after it
+        into at most "parts" byte ranges of similar size, each starting at the
+        beginning of a line and ending after a line break or at the end of file.
+        Line breaks are only row boundaries without quotes, so a CSV with any
+        quote is left as a single range.
+        '''
+
+        path = 'csv/'+self.restaurant_file_name
+        size = os.path.getsize(path)
+        with open(path, 'rb') as csvfile:
+            header = csvfile.readline()
+            fieldnames = next(csv.reader(io.TextIOWrapper(io.BytesIO(header))), [])
+
+            data_start = csvfile.tell()
+            if _has_quotes(csvfile, size):
+                return fieldnames, [(data_start, size)] if data_start < size else []
+            boundaries = [data_start]
+            for part in range(1, max(parts, 1)):
+                boundary = data_start + (size - data_start) * part // parts
+                if boundary <= boundaries[-1]:
+                    continue
+                csvfile.seek(boundary - 1)
+                # Move the boundary to the start of the next line
+                csvfile.readline()
+                boundary = csvfile.tell()
+                if boundaries[-1] < boundary < size:
+                    boundaries.append(boundary)
+            boundaries.append(size)
+
+        byte_ranges = [(start, end) for start, end in zip(boundaries, boundaries[1:])
+                       if start < end]
+        return fieldnames, byte_ranges
+
+
+def _has_quotes(csvfile: BinaryIO, size: int) -> bool:
+    '''Whether the open csv file has a quote anywhere, searched in memory without reading it into Python'''
+
+    if size == 0:
+        return False
+    with mmap.mmap(csvfile.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        return buffer.find(b'"') >= 0
@@ -0,0 +1,113 @@
+import base64
+import binascii
+import heapq
+import json
+import math
+from typing import List, Optional, Set, Tuple
+from dataclasses import dataclass
+from models.restaurant import Restaurant
+from models.restaurant_criteria import RestaurantCriteria
+from specifications.restaurant import searches_names_fuzzily
+
+# The rank key of a restaurant followed by its position, unique within a search
+Keyset = Tuple
+
+
+@dataclass
+class RestaurantPage:
+    '''
+    One page of the best matched restaurants, best first, and the cursor to
+    pass to get the next page, which is None after the last page.
+    '''
+    restaurants: List[Restaurant]
+    cursor: Optional[str]
+
+
+def encode_cursor(keyset: Keyset) -> str:
+    '''Encodes the keyset of the last restaurant of a page as an opaque cursor'''
+
+    return base64.urlsafe_b64encode(json.dumps(list(keyset)).encode()).decode()
+
+
+def keyset_size(criteria: RestaurantCriteria) -> int:
+    '''The number of values in the keysets of a search: its criteria_rank_key and the position'''
+
+    return (4 if searches_names_fuzzily(criteria) else 3) + 1
+
+
+def decode_cursor(cursor: Optional[str], criteria: RestaurantCriteria) -> Optional[Keyset]:
+    '''
+    Returns the keyset encoded by encode_cursor for a search with the
+    Criteria, or None for the first page when the cursor is None or empty.
+    Raises a ValueError if the cursor was not made by encode_cursor for such
+    a search.
+    '''
+
+    if not cursor:
+        return None
+    try:
+        keyset = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError(f'{cursor} is an invalid cursor')
+    if (not isinstance(keyset, list) or len(keyset) != keyset_size(criteria)
+            or not all(type(value) in (int, float) and math.isfinite(value) for value in keyset)):
+        raise ValueError(f'{cursor} is an invalid cursor')
+    return tuple(keyset)
+
+
+class KeysetPage(object):
+    '''
+    Accumulates a stream of restaurants and their keysets, keeping only the
+    best "limit" of those ranked after the cursor's keyset, plus one more to
+    tell whether there is a next page. Like TopRestaurants, memory is
+    O(limit) and equal restaurants are only kept once, including the later
+    copies of restaurants on earlier pages, which share the rank of the
+    cursor's restaurant.
+    '''
+
+    def __init__(self, limit: int, after: Optional[Keyset] = None):
+        self.limit = limit
+        self.after = after
+        # Max heap on keyset, the worst kept restaurant is at the top
+        self._heap: List[Tuple[Tuple, Restaurant]] = []
+        self._kept: Set[Restaurant] = set()
+        # Restaurants ranked the same as the cursor's and at or before it
+        self._on_earlier_pages: Set[Restaurant] = set()
+
+    def add(self, keyset: Keyset, restaurant: Restaurant) -> None:
+        '''Offers a restaurant, its keysets must be offered in increasing position'''
+
+        if self.after is not None and keyset <= self.after:
+            if keyset[:-1] == self.after[:-1]:
+                self._on_earlier_pages.add(restaurant)
+            return
+        if restaurant in self._kept or restaurant in self._on_earlier_pages:
+            return
+
+        entry = (tuple(-value for value in keyset), restaurant)
+        if len(self._heap) <= self.limit:
+            heapq.heappush(self._heap, entry)
+            self._kept.add(restaurant)
+        elif entry > self._heap[0]:
+            evicted = heapq.heapreplace(self._heap, entry)
+            self._kept.discard(evicted[-1])
+            self._kept.add(restaurant)
+
+    def page(self) -> RestaurantPage:
+        '''Returns the kept restaurants, best first, and the cursor after them'''
+
+        entries = sorted(self._heap, reverse=True)
+        return page_of([(tuple(-value for value in keyset), restaurant) for keyset, restaurant in entries],
+                       self.limit)
+
+
+def page_of(ranked: List[Tuple[Keyset, Restaurant]], limit: int) -> RestaurantPage:
+    '''
+    Returns the page of the first "limit" of the ranked keysets and
+    restaurants, which must hold one more when there is a next page.
+    '''
+
+    restaurants = [restaurant for _, restaurant in ranked[:limit]]
+    if len(ranked) <= limit or not restaurants:
+        return RestaurantPage(restaurants=restaurants, cursor=None)
+    return RestaurantPage(restaurants=restaurants, cursor=encode_cursor(ranked[limit - 1][0]))
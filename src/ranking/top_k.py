@@ -0,0 +1,91 @@
+import heapq
+from itertools import count
+from typing import Callable, Iterable, List, Optional, Set, Tuple
+from models.restaurant import Restaurant
+from models.restaurant_criteria import RestaurantCriteria
+from specifications.restaurant import name_edit_distance, searches_names_fuzzily
+
+DEFAULT_LIMIT = 5
+
+
+def rank_key(restaurant: Restaurant) -> Tuple[float, int, float]:
+    '''
+    The ordering of the best matched restaurants: closest distance first,
+    breaking ties with largest customer rating, and further breaking ties by
+    average price.
+    '''
+
+    return (restaurant.distance, -restaurant.customer_rating, restaurant.average_price)
+
+
+def criteria_rank_key(criteria: RestaurantCriteria) -> Callable[[Restaurant], Tuple]:
+    '''
+    The ordering of the best matched restaurants for a Criteria. When names
+    are searched with max_name_edits, the names with the fewest typos come
+    first, then the restaurants are ordered by rank_key.
+    '''
+
+    if not searches_names_fuzzily(criteria):
+        return rank_key
+
+    restaurant_name = criteria.restaurant_name
+    return lambda restaurant: (name_edit_distance(restaurant.name, restaurant_name),) + rank_key(restaurant)
+
+
+class TopRestaurants(object):
+    '''
+    Accumulates a stream of Restaurants, keeping only the best "limit" of them
+    by the key (rank_key by default) in a bounded heap. Memory is O(limit)
+    however many restaurants are added. Restaurants with the same rank stay
+    in the order they were added, so the results are exactly those of
+    sorting every restaurant and taking the first "limit". Equal restaurants
+    are only kept once.
+    '''
+
+    def __init__(self, limit: int = DEFAULT_LIMIT, key: Callable[[Restaurant], Tuple] = rank_key):
+        self.limit = limit
+        self.key = key
+        # Max heap on rank, the worst kept restaurant is at the top. The
+        # negated arrival order makes a later restaurant rank worse on ties.
+        self._heap: List[Tuple[Tuple, int, Restaurant]] = []
+        # The key of the worst kept restaurant, once the heap is full
+        self._worst_key: Optional[Tuple] = None
+        self._kept: Set[Restaurant] = set()
+        self._arrivals = count()
+
+    def add(self, restaurant: Restaurant) -> None:
+        '''Offers a restaurant, keeping it only if it ranks in the top "limit"'''
+
+        if self.limit <= 0 or restaurant in self._kept:
+            return
+
+        key = self.key(restaurant)
+        # A restaurant arriving later ranks worse on ties, so an equal key is not kept
+        if self._worst_key is not None and key >= self._worst_key:
+            return
+
+        entry = (tuple(-value for value in key),
+                 -next(self._arrivals), restaurant)
+        if len(self._heap) < self.limit:
+            heapq.heappush(self._heap, entry)
+        else:
+            evicted = heapq.heapreplace(self._heap, entry)
+            self._kept.discard(evicted[-1])
+        self._kept.add(restaurant)
+
+        if len(self._heap) == self.limit:
+            self._worst_key = tuple(-value for value in self._heap[0][0])
+
+    def add_all(self, restaurants: Iterable[Restaurant]) -> None:
+        '''Offers every restaurant in order'''
+
+        for restaurant in restaurants:
+            self.add(restaurant)
+
+    def results(self) -> List[Restaurant]:
+        '''Returns the kept restaurants, best first'''
+
+        return [entry[-1] for entry in sorted(self._heap, reverse=True)]
+
+    def __len__(self) -> int:
+        return len(self._heap)
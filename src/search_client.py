@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+
+import argparse
+import http.client
+import json
+import socket
+from typing import Any, Dict, List
+from index import add_query_arguments, print_next_page
+from search_server import DEFAULT_HOST, DEFAULT_PORT
+from models.restaurant import Restaurant
+from output_formats import write_restaurants
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    '''An HTTPConnection over a Unix socket'''
+
+    def __init__(self, path: str):
+        super().__init__('localhost')
+        self.path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+
+
+def main(args) -> List[Restaurant]:
+    '''
+    Takes the search arguments of index.py, searches through a running
+    search_server.py and displays the results exactly as index.py does.
+    '''
+
+    response = fetch_search(args)
+    top_restaurants = _restaurants(response)
+    write_restaurants(top_restaurants, args.format)
+    if args.cursor is not None:
+        print_next_page(response['cursor'], args.format)
+    return top_restaurants
+
+
+def fetch_best_matched_restaurants(args) -> List[Restaurant]:
+    '''
+    Requests the search described by the index.py arguments from the server,
+    exiting with the server's error message if they are invalid.
+    '''
+
+    return _restaurants(fetch_search(args))
+
+
+def fetch_search(args) -> Dict[str, Any]:
+    '''
+    Requests the search described by the index.py arguments from the server
+    and returns its response, exiting with the server's error message if
+    they are invalid.
+    '''
+
+    query: Dict[str, Any] = {
+        'name': args.name,
+        'distance': args.distance,
+        'price': args.price,
+        'customer_rating': args.customer_rating,
+        'cuisine': args.cuisine,
+        'origin': args.origin,
+        'fuzzy': args.fuzzy,
+        'limit': args.limit,
+        'restaurant_file': args.restaurant_file,
+        'cuisine_file': args.cuisine_file,
+    }
+    if args.cursor is not None:
+        query['cursor'] = args.cursor or None
+
+    if args.unix_socket is not None:
+        connection = _UnixHTTPConnection(args.unix_socket)
+    else:
+        connection = http.client.HTTPConnection(args.host, args.port)
+    try:
+        connection.request('POST', '/search', body=json.dumps(query),
+                           headers={'Content-Type': 'application/json'})
+        response = json.loads(connection.getresponse().read())
+    finally:
+        connection.close()
+
+    if 'error' in response:
+        raise SystemExit(f'search_client.py: error: {response["error"]}')
+
+    return response
+
+
+def _restaurants(response: Dict[str, Any]) -> List[Restaurant]:
+    return [Restaurant(**restaurant) for restaurant in response['restaurants']]
+
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description='Search restaurants through a running search_server.py, taking the search arguments of index.py.')
+    # The server searches its own files, these only check they are the expected ones
+    parser.add_argument('-f', '--restaurant-file',
+                        help='Name of the restaurant csv the server must be searching, any when not given')
+    parser.add_argument('--cuisine-file',
+                        help='Name of the cuisine csv the server must be searching, any when not given')
+    add_query_arguments(parser)
+    parser.add_argument('--host', default=DEFAULT_HOST,
+                        help=f'Host of the search server, defaults to {DEFAULT_HOST}')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help=f'Port of the search server, defaults to {DEFAULT_PORT}')
+    parser.add_argument('--unix-socket',
+                        help='Path of the Unix socket of the search server, instead of host and port')
+    return parser
+
+
+if __name__ == '__main__':
+    main(make_parser().parse_args())
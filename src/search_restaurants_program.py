@@ -1,8 +1,25 @@
-from typing import List, Dict, Set
+from typing import Callable, List, Dict, Iterable, Iterator, Optional, Set, Tuple
 import csv
-from specifications.restaurant import RestaurantIsTheRightName, RestaurantIsCheapEnough, RestaurantIsCloseEnough, RestaurantIsRatedWellEnough, RestaurantIsTheRightCuisine, RestaurantIsTheRightName
+import heapq
+import io
+from itertools import chain, islice
+from specifications.adaptive_specification import AdaptiveAndSpecification
+from specifications.compiler import compile_specification
+from specifications.restaurant import restaurant_criteria_leaves, restaurant_criteria_specification
+from specifications.row_pushdown import (RESTAURANT_COLUMNS, compile_column_parser, compile_column_ranker,
+                                         compile_line_parser, compile_row_parser)
 from models.restaurant import Restaurant
 from models.restaurant_criteria import RestaurantCriteria
+from ranking.keyset import KeysetPage, RestaurantPage, decode_cursor
+from ranking.top_k import DEFAULT_LIMIT, TopRestaurants, criteria_rank_key, rank_key
+from catalog.csv_scanner import CSVScanner
+from catalog.snapshot import RestaurantSnapshot, SnapshotColumns
+from catalog.spatial_index import locate_restaurants
+from output_formats import write_restaurants
+from search_stats import SearchStats
+
+# Number of restaurant rows parsed together while streaming the CSV
+DEFAULT_CHUNK_SIZE = 10000
 
 
 class FilterRestaurantsCSVProgram(object):
@@ -13,17 +30,73 @@ class FilterRestaurantsCSVProgram(object):
     these matches as well as tabulate the results on the command line.
     '''
 
-    def __init__(self, cuisine_file_name: str, restaurant_file_name: str):
+    def __init__(self, cuisine_file_name: str, restaurant_file_name: str, use_snapshot: bool = False):
         self.cuisine_file_name = cuisine_file_name
         self.restaurant_file_name = restaurant_file_name
+        # When set, parsed csv files are cached in a RestaurantSnapshot
+        self.use_snapshot = use_snapshot
+        # Called with the SearchStats of every search, see add_stats_collector
+        self.stats_collectors: List[Callable[[SearchStats], None]] = []
+
+    def get_best_matched_restaurants(self, criteria: RestaurantCriteria, limit: int = DEFAULT_LIMIT) -> List[Restaurant]:
+        '''
+        Given a set of criteria, returns the top "limit" (5 by default)
+        Restaurants which satisfy the criteria. Matches are streamed into the
+        ranking, so only "limit" of them are held at once.
+        '''
+        if self.stats_collectors:
+            return self._get_best_matched_restaurants_with_stats(criteria, limit)
+        if self.use_snapshot and criteria.origin is None:
+            return self._get_best_matched_snapshot_restaurants(criteria, limit)
+
+        valid_restaurants = self.iter_valid_restaurants(criteria)
+        return self._get_top_restaurants(valid_restaurants, limit, criteria_rank_key(criteria))
+
+    def get_best_matched_restaurants_page(self, criteria: RestaurantCriteria, limit: int = DEFAULT_LIMIT,
+                                          cursor: Optional[str] = None) -> RestaurantPage:
+        '''
+        Returns a page of the best matched restaurants: the first "limit"
+        ranked after the restaurant the cursor of the previous page was made
+        for, or the first "limit" without a cursor. Restaurants are ranked as
+        get_best_matched_restaurants ranks them, with ties in the order they
+        match, which keysets the ranking. Any page only costs a pass over the
+        CSVs with a bounded ranking, the same as the first. Raises a
+        ValueError if the cursor is invalid.
+        '''
+
+        page = KeysetPage(limit, decode_cursor(cursor, criteria))
+        key = criteria_rank_key(criteria)
+        for position, restaurant in enumerate(self.iter_valid_restaurants(criteria)):
+            page.add(key(restaurant) + (position,), restaurant)
+        return page.page()
 
-    def get_best_matched_restaurants(self, criteria: RestaurantCriteria) -> Set[Restaurant]:
+    def add_stats_collector(self, collector: Callable[[SearchStats], None]) -> None:
         '''
-        Given a set of criteria, returns the top 5 Restaurants which satisfy
-        the criteria.
+        Calls the collector with the SearchStats of every following search.
+        Searches only measure themselves while there are collectors.
         '''
-        valid_restaurants = self.determine_valid_restaurants(criteria)
-        return self._get_top_restaurants(valid_restaurants)
+
+        self.stats_collectors.append(collector)
+
+    def get_best_matched_restaurants_for_each(self, criterias: List[RestaurantCriteria],
+                                              limits: List[int]) -> List[List[Restaurant]]:
+        '''
+        Answers many criteria in a single pass over the CSVs. Every criteria
+        has its own top "limit" ranking which each chunk of parsed restaurants
+        is fed to, so the CSVs are only parsed once however many criteria
+        there are. Returns the top restaurants of each criteria, in order.
+        '''
+
+        valid_restaurants = [self._adaptive_criteria_specification()
+                             for _ in criterias]
+        top_restaurants = [TopRestaurants(limit, criteria_rank_key(criteria))
+                           for criteria, limit in zip(criterias, limits)]
+
+        for restaurants in self.read_restaurant_chunks():
+            for criteria, valid_restaurant, top in zip(criterias, valid_restaurants, top_restaurants):
+                top.add_all(valid_restaurant.filter(
+                    self._locate(restaurants, criteria), criteria))
+        return [top.results() for top in top_restaurants]
 
     def determine_valid_restaurants(self, criteria: RestaurantCriteria) -> Set[Restaurant]:
         '''
@@ -32,43 +105,270 @@ class FilterRestaurantsCSVProgram(object):
         Criteria. Ensures that files are being read from the /csv file.
         '''
 
+        return set(self.iter_valid_restaurants(criteria))
+
+    def iter_valid_restaurants(self, criteria: RestaurantCriteria) -> Iterator[Restaurant]:
+        '''
+        Yields, in file order, the restaurants which conform to the given
+        Criteria without collecting them. The CSV is parsed and filtered a
+        chunk at a time. When the Criteria has an origin, the restaurants
+        are yielded with their distance from it, see _locate.
+        '''
+
+        valid_restaurant = self._adaptive_criteria_specification()
+        for restaurants in self.read_restaurant_chunks_for(criteria):
+            # Only yield the restaurants which meet the criteria
+            yield from valid_restaurant.filter(self._locate(restaurants, criteria), criteria)
+
+    def _locate(self, restaurants: List[Restaurant], criteria: RestaurantCriteria) -> List[Restaurant]:
+        '''
+        When the Criteria has an origin, returns the restaurants with
+        coordinates with their distance measured from the origin, so the
+        distance criteria and ranking use it. Otherwise returns the
+        restaurants as they are.
+        '''
+
+        if criteria.origin is None:
+            return restaurants
+        return locate_restaurants(restaurants, criteria.origin)
+
+    def read_restaurants(self) -> Iterator[Restaurant]:
+        '''
+        Parses the Cuisine and Restaurant CSVs, yielding every Restaurant in
+        file order with its cuisine name joined in. Raises a ValueError if a
+        row of the Restaurant CSV is incorrectly formatted. When using a
+        snapshot, the restaurants are loaded from it while the CSVs are
+        unchanged, otherwise the CSVs are parsed and the snapshot rebuilt.
+        '''
+
+        return chain.from_iterable(self.read_restaurant_chunks())
+
+    def read_restaurant_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[Restaurant]]:
+        '''
+        Reads the restaurants of read_restaurants as lists of at most
+        chunk_size restaurants. Without a snapshot the Restaurant CSV is
+        streamed, only one chunk is parsed and held at a time so memory does
+        not grow with the size of the file.
+        '''
+
+        if not self.use_snapshot:
+            yield from self._parse_restaurant_chunks(chunk_size)
+            return
+        yield from self._read_snapshot_chunks(chunk_size)
+
+    def read_restaurant_chunks_for(self, criteria: RestaurantCriteria) -> Iterator[List[Restaurant]]:
+        '''
+        Reads chunks of the restaurants which may satisfy the Criteria, along
+        with others, to be filtered with the Criteria. The criteria are pushed
+        down to the rows of the Restaurant CSV, or of the snapshot, so that
+        only the rows which pass them are made into Restaurants, see
+        compile_row_parser.
+        '''
+
+        if self.use_snapshot:
+            return self._read_snapshot_chunks(DEFAULT_CHUNK_SIZE, criteria)
+        return self._parse_restaurant_chunks(DEFAULT_CHUNK_SIZE, criteria)
+
+    def _read_snapshot_chunks(self, chunk_size: int,
+                              criteria: Optional[RestaurantCriteria] = None) -> Iterator[List[Restaurant]]:
+        '''
+        Reads chunk_size rows of the snapshot at a time, only making the
+        rows which may satisfy the Criteria into Restaurants, see
+        compile_column_parser.
+        '''
+
+        columns = self._load_snapshot()
+        parse_columns = compile_column_parser(criteria, columns.cuisine_names)
+        for chunk in columns.chunks(chunk_size):
+            yield parse_columns(*chunk)
+
+    def _get_best_matched_snapshot_restaurants(self, criteria: RestaurantCriteria, limit: int) -> List[Restaurant]:
+        '''
+        get_best_matched_restaurants over the columns of the snapshot: the
+        rows which satisfy the Criteria are ranked by their columns (see
+        compile_column_ranker) and only the best "limit" are made into
+        Restaurants. Like TopRestaurants, equal restaurants are kept once.
+        '''
+
+        columns = self._load_snapshot()
+        ranked = compile_column_ranker(criteria, columns.cuisine_names)(
+            columns.names, columns.ratings, columns.distances, columns.prices, columns.cuisine_codes)
+        # The row ends each entry, so equally ranked rows stay in file order
+        heapq.heapify(ranked)
+        top_restaurants: Dict[Restaurant, None] = {}
+        while ranked and len(top_restaurants) < limit:
+            top_restaurants.setdefault(columns[heapq.heappop(ranked)[-1]])
+        return list(top_restaurants)
+
+    def _load_snapshot(self) -> SnapshotColumns:
+        '''
+        Loads the columns of every restaurant from the snapshot of the CSVs,
+        parsing the CSVs and rebuilding the snapshot when it is missing or
+        stale.
+        '''
+
+        snapshot = RestaurantSnapshot(
+            self.cuisine_file_name, self.restaurant_file_name)
+        fingerprints = snapshot.fingerprints()
+        columns = snapshot.load(fingerprints)
+        if columns is None:
+            columns = SnapshotColumns.from_restaurants(chain.from_iterable(
+                self._parse_restaurant_chunks(DEFAULT_CHUNK_SIZE)))
+            snapshot.write(fingerprints, columns)
+        return columns
+
+    def _parse_restaurant_chunks(self, chunk_size: int,
+                                 criteria: Optional[RestaurantCriteria] = None) -> Iterator[List[Restaurant]]:
+        '''
+        Parses the Cuisine and Restaurant CSVs, see read_restaurant_chunks.
+        The Restaurant CSV is scanned in memory when it can be, see
+        _scan_restaurant_chunks, and read with the csv module otherwise.
+        '''
+
         cuisines: Dict[str, str] = self._build_cuisines_map()
-        restaurants: Set[Restaurant] = set()
+
+        with CSVScanner('csv/'+self.restaurant_file_name) as scanner:
+            if scanner.can_scan(RESTAURANT_COLUMNS):
+                yield from self._scan_restaurant_chunks(scanner, cuisines, chunk_size, criteria)
+                return
 
         with open('csv/'+self.restaurant_file_name, 'r') as csvfile:
-            restaurant_reader = csv.DictReader(csvfile)
-            for restaurant_dict in restaurant_reader:
-                try:
-                    restaurant: Restaurant = Restaurant(
-                        name=restaurant_dict['name'],
-                        customer_rating=int(
-                            restaurant_dict['customer_rating']),
-                        distance=float(restaurant_dict['distance']),
-                        average_price=float(restaurant_dict['price']),
-                        cuisine=cuisines[restaurant_dict['cuisine_id']]
-                    )
-                except:
-                    raise ValueError(
-                        f'Restaurant CSV csv/{self.restaurant_file_name} is incorrectly formatted')
+            yield from self._parse_restaurant_rows(
+                csv.DictReader(csvfile), cuisines, chunk_size, criteria)
+
+    def _scan_restaurant_chunks(self, scanner: CSVScanner, cuisines: Dict[str, str], chunk_size: int,
+                                criteria: Optional[RestaurantCriteria]) -> Iterator[List[Restaurant]]:
+        '''
+        Parses the lines of the Restaurant CSV found by the scanner, only
+        converting the fields needed, see compile_line_parser. A chunk with
+        a line which can't be converted from bytes is parsed again with the
+        csv module, which raises the usual ValueError for malformed rows.
+        '''
+
+        columns = {name: scanner.column(name) for name in scanner.fieldnames}
+        parse_lines = compile_line_parser(criteria, cuisines, columns, scanner.encoding)
+        for lines in scanner.line_chunks(chunk_size):
+            try:
+                restaurants: List[Restaurant] = parse_lines(lines)
+            except (ValueError, IndexError, KeyError, UnicodeDecodeError):
+                text = io.StringIO(b'\n'.join(lines).decode(scanner.encoding))
+                restaurants = next(self._parse_restaurant_rows(
+                    csv.DictReader(text, fieldnames=scanner.fieldnames), cuisines, len(lines), criteria), [])
+            yield restaurants
+
+    def _parse_restaurant_rows(self, restaurant_reader: Iterator[Dict[str, str]], cuisines: Dict[str, str],
+                               chunk_size: int, criteria: Optional[RestaurantCriteria] = None) -> Iterator[List[Restaurant]]:
+        '''
+        Turns the rows read from the Restaurant CSV into Restaurants joined
+        with their cuisine names, chunk_size rows at a time. Given a
+        Criteria, only the rows which may satisfy it are made into
+        Restaurants, see compile_row_parser.
+        '''
+
+        parse_rows = compile_row_parser(criteria, cuisines)
+        while True:
+            restaurant_dicts = list(islice(restaurant_reader, chunk_size))
+            if not restaurant_dicts:
+                return
+            try:
+                restaurants: List[Restaurant] = parse_rows(restaurant_dicts)
+            except:
+                raise ValueError(
+                    f'Restaurant CSV csv/{self.restaurant_file_name} is incorrectly formatted')
+            yield restaurants
+
+    def _get_best_matched_restaurants_with_stats(self, criteria: RestaurantCriteria, limit: int) -> List[Restaurant]:
+        '''
+        The same search as get_best_matched_restaurants, measuring each stage
+        and counting the restaurants rejected by each specification, then
+        passing the SearchStats to every collector. Rows are read with the
+        csv module or from the snapshot and every one is made into a
+        Restaurant, without the scanner, row pushdown or adaptive order of
+        get_best_matched_restaurants, which the stats say.
+        '''
 
-                # Only add if the restaurant meets the criteria
-                if self._is_valid_restaurant(restaurant, criteria):
-                    restaurants.add(restaurant)
-        return restaurants
+        stats = SearchStats(unoptimized=True)
+        specifications = self._compile_criteria_leaves(criteria)
+        stats.rejected_by = dict.fromkeys(specifications, 0)
+        top_restaurants = TopRestaurants(limit, criteria_rank_key(criteria))
 
-    def display(self, restaurants: List[Restaurant]) -> None:
+        for restaurants in self._read_restaurant_chunks_with_stats(stats):
+            stats.rows_read += len(restaurants)
+
+            matches = self._evaluate_with_stats(
+                self._locate(restaurants, criteria), specifications, stats)
+
+            with stats.time('rank'):
+                top_restaurants.add_all(matches)
+
+        results = top_restaurants.results()
+        stats.results = len(results)
+        for collector in self.stats_collectors:
+            collector(stats)
+        return results
+
+    def _compile_criteria_leaves(self, criteria: RestaurantCriteria) -> Dict[str, Callable[[Restaurant], bool]]:
+        '''Compiles each specification of _is_valid_restaurant on its own, by label'''
+
+        return {label: compile_specification(specification, criteria)
+                for label, specification in restaurant_criteria_leaves().items()}
+
+    def _evaluate_with_stats(self, restaurants: List[Restaurant], specifications: Dict[str, Callable[[Restaurant], bool]],
+                             stats: SearchStats) -> List[Restaurant]:
         '''
-        Provides a command line table view of the given restaurants
+        Returns the restaurants satisfying every specification, counting the
+        restaurants each specification rejects and timing it all.
         '''
 
-        # Print table header
-        print("\n{:<60}{:<20}{:<15}{:<19}{:<8}".format(
-            'Name', 'Rating (stars)', 'Distance (mi)', 'Avg. Price ($)', 'Cuisine'))
+        with stats.time('evaluate criteria'):
+            matches: List[Restaurant] = []
+            for restaurant in restaurants:
+                is_valid_restaurant = True
+                for label, is_satisfied in specifications.items():
+                    if not is_satisfied(restaurant):
+                        stats.rejected_by[label] += 1
+                        is_valid_restaurant = False
+                if is_valid_restaurant:
+                    matches.append(restaurant)
+        stats.matches += len(matches)
+        return matches
+
+    def _read_restaurant_chunks_with_stats(self, stats: SearchStats) -> Iterator[List[Restaurant]]:
+        '''read_restaurant_chunks, timing reading the files apart from parsing and joining the rows'''
+
+        if self.use_snapshot:
+            with stats.time('load snapshot'):
+                columns = self._load_snapshot()
+                parse_columns = compile_column_parser(None, columns.cuisine_names)
+            for chunk in columns.chunks(DEFAULT_CHUNK_SIZE):
+                with stats.time('parse and join'):
+                    restaurants = parse_columns(*chunk)
+                yield restaurants
+            return
+
+        with stats.time('read cuisines'):
+            cuisines: Dict[str, str] = self._build_cuisines_map()
+
+        with open('csv/'+self.restaurant_file_name, 'r') as csvfile:
+            restaurant_reader = csv.DictReader(csvfile)
+            while True:
+                with stats.time('read csv'):
+                    restaurant_dicts = list(
+                        islice(restaurant_reader, DEFAULT_CHUNK_SIZE))
+                if not restaurant_dicts:
+                    return
+                with stats.time('parse and join'):
+                    restaurants = next(self._parse_restaurant_rows(
+                        iter(restaurant_dicts), cuisines, DEFAULT_CHUNK_SIZE))
+                yield restaurants
+
+    def display(self, restaurants: Iterable[Restaurant], output_format: str = 'table') -> None:
+        '''
+        Provides a command line table view of the given restaurants, or
+        writes them to stdout as csv or JSON Lines, see write_restaurants
+        '''
 
-        for restaurant in restaurants:
-            print("{:<60}{:<20}{:<15}{:<19}{:<8}".format(
-                restaurant.name, restaurant.customer_rating,  restaurant.distance,  restaurant.average_price,  restaurant.cuisine))
-        print('\n')
+        write_restaurants(restaurants, output_format)
 
     def _is_valid_restaurant(self, restaurant: Restaurant, criteria: RestaurantCriteria) -> bool:
         '''
@@ -77,24 +377,40 @@ class FilterRestaurantsCSVProgram(object):
         (not None in the RestaurantCriteria) must be satisfied by the restaurant.
         '''
 
-        valid_restaurant = RestaurantIsRatedWellEnough() & RestaurantIsCloseEnough(
-        ) & RestaurantIsCheapEnough() & RestaurantIsTheRightCuisine() & RestaurantIsTheRightName()
+        valid_restaurant = restaurant_criteria_specification()
         return valid_restaurant.is_satisfied_by(restaurant, criteria)
 
-    def _get_top_restaurants(self, restaurants: Set[Restaurant]) -> List[Restaurant]:
+    def _compile_criteria(self, criteria: RestaurantCriteria) -> Callable[[Restaurant], bool]:
         '''
-        Given a set of restaurants, sorts the restaurants by closest distance,
-        breaking ties with largest customer rating, and further breaking ties
-        by average_price. Returns, at max, the first five elements of the sorted list. 
+        Compiles the same check as _is_valid_restaurant into a single
+        predicate for the given RestaurantCriteria, to be built once per query
+        and reused for every restaurant.
         '''
 
-        top_restaurants = sorted(restaurants, key=lambda r: (
-            r.distance, -r.customer_rating, r.average_price))
+        return compile_specification(restaurant_criteria_specification(), criteria)
 
-        if len(top_restaurants) > 5:
-            top_restaurants = top_restaurants[0:5]
+    def _adaptive_criteria_specification(self) -> AdaptiveAndSpecification:
+        '''
+        The same check as _is_valid_restaurant for filtering chunks of
+        restaurants, with the criteria reordered by how cheap and selective
+        they turn out to be on the restaurants being filtered.
+        '''
 
-        return top_restaurants
+        return AdaptiveAndSpecification(restaurant_criteria_leaves().values())
+
+    def _get_top_restaurants(self, restaurants: Iterable[Restaurant], limit: int = DEFAULT_LIMIT,
+                             key: Callable[[Restaurant], Tuple] = rank_key) -> List[Restaurant]:
+        '''
+        Given restaurants, ranks the restaurants by closest distance, breaking
+        ties with largest customer rating, and further breaking ties by
+        average_price, or by the given key. Returns, at max, the first "limit"
+        restaurants of the ranking. Only "limit" restaurants are kept while
+        ranking, rather than sorting all of them.
+        '''
+
+        top_restaurants = TopRestaurants(limit, key)
+        top_restaurants.add_all(restaurants)
+        return top_restaurants.results()
 
     def _build_cuisines_map(self):
         '''From the CSV, builds a map of id=>name for faster lookups'''
@@ -108,3 +424,4 @@ class FilterRestaurantsCSVProgram(object):
                     raise ValueError(
                         f'Cuisines CSV csv/{self.cuisine_file_name} is incorrectly formatted')
         return cuisine_map
+
@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+
+import argparse
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+from index import is_positive_int, is_valid_csv_file
+from batch_index import parse_query
+from catalog.query_cache import CachedRestaurantSearch
+from catalog.restaurant_catalog import RestaurantCatalog
+from ranking.keyset import decode_cursor
+from ranking.top_k import DEFAULT_LIMIT
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+            405: 'Method Not Allowed', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+_MAX_BODY_SIZE = 1 << 20
+
+
+class RestaurantSearchServer(object):
+    '''
+    A long running asyncio HTTP server answering searches against a catalog
+    loaded once at startup. A search is a POST to /search with a JSON object
+    body using the long argument names of index.py (name, distance, price,
+    customer_rating, cuisine, origin, fuzzy, limit and optionally
+    restaurant_file and cuisine_file, which must be the served ones). The
+    response is a JSON object with the matching "restaurants" or an "error".
+    A query with a "cursor", null for the first page, is answered a page at
+    a time, with the "cursor" of the next page in the response. Serves over
+    TCP or a Unix socket, any number of clients at once. Searches run on a
+    thread of the server's own, one at a time as a search may refresh the
+    catalog once its CSVs change, so the event loop keeps answering other
+    connections meanwhile.
+    '''
+
+    def __init__(self, search: CachedRestaurantSearch, default_limit: int = DEFAULT_LIMIT):
+        self.search = search
+        self.default_limit = default_limit
+        # The catalog and its cache are not safe to search while being refreshed
+        self._search_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='search')
+
+    def handle_search(self, query: Any) -> Tuple[int, Dict[str, Any]]:
+        '''Returns the HTTP status and JSON response for one search query'''
+
+        try:
+            if not isinstance(query, dict):
+                raise ValueError('query must be a JSON object')
+            query = dict(query)
+            for key, served_file_name in [('restaurant_file', self.search.program.restaurant_file_name),
+                                          ('cuisine_file', self.search.program.cuisine_file_name)]:
+                file_name = query.pop(key, None)
+                if file_name is not None and file_name != served_file_name:
+                    raise ValueError(
+                        f'this server searches csv/{served_file_name}, not csv/{file_name}')
+            paged = 'cursor' in query
+            cursor = query.pop('cursor', None)
+            if cursor is not None and not isinstance(cursor, str):
+                raise ValueError(f'{cursor} is an invalid cursor')
+            criteria, limit = parse_query(query, self.default_limit)
+            if paged:
+                decode_cursor(cursor, criteria)
+        except ValueError as error:
+            return 400, {'error': str(error)}
+
+        # The query is valid, so what fails now is the catalog, such as a malformed row appended to a CSV
+        try:
+            with self._search_lock:
+                if paged:
+                    page = self.search.get_best_matched_restaurants_page(criteria, limit, cursor)
+                else:
+                    restaurants = self.search.get_best_matched_restaurants(criteria, limit)
+        except (ValueError, OSError) as error:
+            return 500, {'error': str(error)}
+
+        if paged:
+            return 200, {'restaurants': [asdict(restaurant) for restaurant in page.restaurants],
+                         'cursor': page.cursor}
+        return 200, {'restaurants': [asdict(restaurant) for restaurant in restaurants]}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        '''Answers the HTTP requests of one client connection'''
+
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, body, keep_alive = request
+                status, response = await self._route(method, path, body)
+                payload = json.dumps(response).encode()
+                writer.write(
+                    f'HTTP/1.1 {status} {_REASONS[status]}\r\n'
+                    'Content-Type: application/json\r\n'
+                    f'Content-Length: {len(payload)}\r\n'
+                    f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'.encode() + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                    unix_socket: Optional[str] = None) -> asyncio.AbstractServer:
+        '''Starts listening, on the Unix socket when given otherwise on host:port'''
+
+        if unix_socket is not None:
+            return await asyncio.start_unix_server(self.handle_connection, path=unix_socket)
+        return await asyncio.start_server(self.handle_connection, host=host, port=port)
+
+    async def _route(self, method: str, path: str, body: bytes) -> Tuple[int, Dict[str, Any]]:
+        if urlsplit(path).path != '/search':
+            return 404, {'error': f'{path} not found, searches are POSTed to /search'}
+        if method != 'POST':
+            return 405, {'error': 'searches must be POSTed to /search'}
+        try:
+            query = json.loads(body or b'{}')
+        except ValueError as error:
+            return 400, {'error': f'invalid JSON: {error}'}
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.handle_search, query)
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, bytes, bool]]:
+        '''Reads one HTTP request, returning None once the client is done'''
+
+        request_line = await reader.readline()
+        if not request_line.strip():
+            return None
+        method, path, version = request_line.decode('latin-1').split()
+
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get('content-length', 0))
+        if length > _MAX_BODY_SIZE:
+            raise ValueError('request body too large')
+        body = await reader.readexactly(length)
+
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+        return method, path, body, keep_alive
+
+
+async def main(args) -> None:
+    catalog = RestaurantCatalog(
+        cuisine_file_name=args.cuisine_file, restaurant_file_name=args.restaurant_file,
+        use_snapshot=args.snapshot)
+    server = RestaurantSearchServer(
+        CachedRestaurantSearch(catalog, max_size=args.cache_size), default_limit=args.limit)
+
+    listener = await server.serve(args.host, args.port, args.unix_socket)
+    where = args.unix_socket or f'http://{args.host}:{args.port}'
+    print(f'Searching {len(catalog)} restaurants on {where}')
+    async with listener:
+        await listener.serve_forever()
+
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description='Serve restaurant searches over HTTP from a catalog loaded once.')
+    parser.add_argument('-f', '--restaurant-file', type=is_valid_csv_file,
+                        help='Name of restaurant data csv located in src/csv. Must contain .csv', default='restaurants.csv')
+    parser.add_argument('--cuisine-file', type=is_valid_csv_file,
+                        help='Name of cuisines data csv located in src/csv. Must contain .csv', default='cuisines.csv')
+    parser.add_argument('--snapshot', action=argparse.BooleanOptionalAction, default=False,
+                        help='Load every restaurant from a cached snapshot of the CSVs, rebuilt when they change, '
+                        'rather than parsing the CSVs. Defaults to parsing')
+    parser.add_argument('--host', default=DEFAULT_HOST,
+                        help=f'Host to listen on, defaults to {DEFAULT_HOST}')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help=f'Port to listen on, defaults to {DEFAULT_PORT}')
+    parser.add_argument('--unix-socket',
+                        help='Path of a Unix socket to listen on instead of host and port')
+    parser.add_argument('--cache-size', type=is_positive_int, default=1024,
+                        help='Number of search results cached, defaults to 1024')
+    parser.add_argument('-k', '--limit', type=is_positive_int, default=DEFAULT_LIMIT,
+                        help=f'Max number of restaurants for searches without a limit, defaults to {DEFAULT_LIMIT}')
+    return parser
+
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(main(make_parser().parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,65 @@
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Optional
+
+
+@dataclass
+class SearchStats:
+    '''
+    Where the time of one search went: the wall time of each stage, in the
+    order the stages first ran, how many restaurants were read, how many
+    were rejected by each specification (a restaurant failing several is
+    counted by each) and how many matched before keeping the top ones.
+    Counting each rejection means checking every criteria of every row, so
+    some searches are measured on an unoptimized path, see unoptimized.
+    '''
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+    # None when the search can't tell, as with a database
+    rows_read: Optional[int] = 0
+    rejected_by: Dict[str, int] = field(default_factory=dict)
+    matches: int = 0
+    results: int = 0
+    # The index a catalog picked the candidate restaurants from
+    access_path: Optional[str] = None
+    # Set when the search was measured on its unoptimized path rather than the one it takes
+    unoptimized: bool = False
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        '''Adds the wall time spent in the with block to the stage'''
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_seconds[stage] = self.stage_seconds.get(
+                stage, 0.0) + time.perf_counter() - start
+
+    def format(self) -> str:
+        '''Tabulates the stats for the command line'''
+
+        lines = []
+        if self.unoptimized:
+            lines.append('\nMeasured on the unoptimized path: every row made into a Restaurant and each\n'
+                         'criteria checked on its own, without the CSV scanner, row pushdown, snapshot\n'
+                         'columns or adaptive criteria order searches use, so searches take less time')
+        lines.append('\n{:<24}{:>14}'.format('Stage', 'Time (ms)'))
+        for stage, seconds in self.stage_seconds.items():
+            lines.append('{:<24}{:>14.3f}'.format(stage, seconds * 1000))
+        lines.append('{:<24}{:>14.3f}'.format(
+            'total', sum(self.stage_seconds.values()) * 1000))
+
+        if self.rejected_by:
+            lines.append('\n{:<24}{:>14}'.format('Rejected by', 'Restaurants'))
+            for specification, rejected in self.rejected_by.items():
+                lines.append('{:<24}{:>14}'.format(specification, rejected))
+
+        lines.append('')
+        if self.access_path is not None:
+            lines.append('{:<24}{:>14}'.format('Access path', self.access_path))
+        if self.rows_read is not None:
+            lines.append('{:<24}{:>14}'.format('Restaurants read', self.rows_read))
+        lines.append('{:<24}{:>14}'.format('Matches', self.matches))
+        lines.append('{:<24}{:>14}'.format('Results', self.results))
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,180 @@
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+from glob import glob
+from typing import Dict, Iterator, List, Optional, Tuple
+from search_restaurants_program import DEFAULT_CHUNK_SIZE, FilterRestaurantsCSVProgram
+from models.restaurant import Restaurant
+from models.restaurant_criteria import RestaurantCriteria
+from ranking.top_k import DEFAULT_LIMIT, TopRestaurants, criteria_rank_key
+from catalog.shard_summary import ShardSummary, ShardSummaryFile
+from catalog.snapshot import FileState
+from search_stats import SearchStats
+from specifications.row_pushdown import RESTAURANT_COLUMNS
+
+
+def find_shards(shard_pattern: str, cuisine_file_name: str) -> List[str]:
+    '''
+    Returns the names, relative to csv/, of the restaurant csv shards: the
+    .csv files in csv/ matching the glob, or in the directory, shard_pattern
+    names, apart from the cuisine csv and any csv whose header lacks the
+    restaurant columns, in sorted order.
+    '''
+
+    path = 'csv/'+shard_pattern
+    paths = glob(os.path.join(path, '*.csv')) if os.path.isdir(path) else glob(path, recursive=True)
+    cuisine_path = os.path.normpath('csv/'+cuisine_file_name)
+    return sorted(os.path.relpath(path, 'csv') for path in paths
+                  if path.endswith('.csv') and os.path.isfile(path)
+                  and os.path.normpath(path) != cuisine_path and _is_restaurant_csv(path))
+
+
+def _is_restaurant_csv(path: str) -> bool:
+    '''Whether the header of the csv at path has every column of the restaurant csv'''
+
+    try:
+        with open(path, 'r', newline='') as csvfile:
+            header = next(csv.reader(csvfile), [])
+    except (OSError, UnicodeDecodeError, csv.Error):
+        return False
+    return set(RESTAURANT_COLUMNS) <= set(header)
+
+
+class ShardedFilterRestaurantsCSVProgram(FilterRestaurantsCSVProgram):
+    '''
+    A FilterRestaurantsCSVProgram over many restaurant csvs (shards, such as
+    one per city) which share a cuisine csv. The shards are searched as if
+    they were one csv, in the sorted order of their names. Each shard is
+    summarized (see ShardSummary) the first time it is searched, and the
+    summary kept next to it until it changes. Shards whose summary proves
+    they can't match a search are skipped, the rest are searched on
+    several processes, each ranking its own top restaurants, and those are
+    merged into the overall top restaurants.
+    '''
+
+    def __init__(self, cuisine_file_name: str, shard_pattern: str, workers: int = os.cpu_count() or 1,
+                 use_snapshot: bool = False):
+        super().__init__(cuisine_file_name=cuisine_file_name,
+                         restaurant_file_name=shard_pattern, use_snapshot=use_snapshot)
+        self.shard_pattern = shard_pattern
+        self.workers = workers
+        # The latest summary of each shard, with the state of the files it was made from
+        self._summaries: Dict[str, Tuple[List[FileState], ShardSummary]] = {}
+
+    def shard_file_names(self) -> List[str]:
+        '''The shards searched, found again on every search, see find_shards'''
+
+        return find_shards(self.shard_pattern, self.cuisine_file_name)
+
+    def get_best_matched_restaurants(self, criteria: RestaurantCriteria, limit: int = DEFAULT_LIMIT) -> List[Restaurant]:
+        '''
+        Given a set of criteria, returns the top "limit" Restaurants of every
+        shard which satisfy the criteria, only searching the shards which may
+        have any, in parallel.
+        '''
+
+        # Stats measure the stages of a single process search
+        if self.stats_collectors:
+            return super().get_best_matched_restaurants(criteria, limit)
+
+        shards = self._shards_to_search(criteria)
+        shard_names = [shard for shard, _, _ in shards]
+        arguments = (shard_names, [criteria] * len(shards), [limit] * len(shards),
+                     [summary is None for _, _, summary in shards])
+        if self.workers <= 1 or len(shards) <= 1:
+            shard_results = list(map(self._get_best_matched_restaurants_in_shard, *arguments))
+        else:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(shards))) as executor:
+                shard_results = list(executor.map(
+                    self._get_best_matched_restaurants_in_shard, *arguments))
+
+        # Shards are merged in order, so ties resolve as in a single csv
+        top_restaurants = TopRestaurants(limit, criteria_rank_key(criteria))
+        for (shard, files_state, _), (restaurants, summary) in zip(shards, shard_results):
+            if summary is not None:
+                self._save_summary(shard, files_state, summary)
+            top_restaurants.add_all(restaurants)
+        return top_restaurants.results()
+
+    def iter_valid_restaurants(self, criteria: RestaurantCriteria) -> Iterator[Restaurant]:
+        '''
+        Yields the restaurants of every shard which conform to the Criteria,
+        shard after shard, skipping the shards which can't have any.
+        '''
+
+        for shard, files_state, summary in self._shards_to_search(criteria):
+            program = self._shard_program(shard)
+            valid_restaurant = program._adaptive_criteria_specification()
+            new_summary = ShardSummary() if summary is None else None
+            chunks = program.read_restaurant_chunks() if summary is None else program.read_restaurant_chunks_for(criteria)
+            for restaurants in chunks:
+                if new_summary is not None:
+                    new_summary.add_all(restaurants)
+                yield from valid_restaurant.filter(program._locate(restaurants, criteria), criteria)
+            if new_summary is not None:
+                self._save_summary(shard, files_state, new_summary)
+
+    def read_restaurant_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[Restaurant]]:
+        '''Reads the restaurants of every shard, shard after shard, see FilterRestaurantsCSVProgram'''
+
+        for shard in self.shard_file_names():
+            yield from self._shard_program(shard).read_restaurant_chunks(chunk_size)
+
+    def _read_restaurant_chunks_with_stats(self, stats: SearchStats) -> Iterator[List[Restaurant]]:
+        for shard in self.shard_file_names():
+            yield from self._shard_program(shard)._read_restaurant_chunks_with_stats(stats)
+
+    def _shards_to_search(self, criteria: RestaurantCriteria) -> List[Tuple[str, List[FileState], Optional[ShardSummary]]]:
+        '''
+        Returns the shards which may have restaurants satisfying the
+        Criteria, with the state of their files and their summary, or
+        None when they have not been summarized since they last changed.
+        '''
+
+        shards = []
+        for shard in self.shard_file_names():
+            files_state, summary = self._load_summary(shard)
+            if summary is None or summary.can_match(criteria):
+                shards.append((shard, files_state, summary))
+        return shards
+
+    def _load_summary(self, shard: str) -> Tuple[List[FileState], Optional[ShardSummary]]:
+        summary_file = ShardSummaryFile(self.cuisine_file_name, shard)
+        files_state = summary_file.files_state()
+        saved = self._summaries.get(shard)
+        if saved is not None and saved[0] == files_state:
+            return files_state, saved[1]
+
+        summary = summary_file.load(files_state)
+        if summary is not None:
+            self._summaries[shard] = (files_state, summary)
+        return files_state, summary
+
+    def _save_summary(self, shard: str, files_state: List[FileState], summary: ShardSummary) -> None:
+        self._summaries[shard] = (files_state, summary)
+        ShardSummaryFile(self.cuisine_file_name, shard).write(files_state, summary)
+
+    def _get_best_matched_restaurants_in_shard(self, shard: str, criteria: RestaurantCriteria, limit: int,
+                                               summarize: bool) -> Tuple[List[Restaurant], Optional[ShardSummary]]:
+        '''
+        Runs on a worker, returns the top restaurants of one shard and, when
+        summarize is set, the summary of the shard made while reading it.
+        '''
+
+        program = self._shard_program(shard)
+        valid_restaurant = program._adaptive_criteria_specification()
+        summary = ShardSummary() if summarize else None
+
+        # Summaries need every restaurant, otherwise the criteria are pushed down to the rows
+        chunks = program.read_restaurant_chunks() if summarize else program.read_restaurant_chunks_for(criteria)
+
+        top_restaurants = TopRestaurants(limit, criteria_rank_key(criteria))
+        for restaurants in chunks:
+            if summary is not None:
+                summary.add_all(restaurants)
+            top_restaurants.add_all(valid_restaurant.filter(
+                program._locate(restaurants, criteria), criteria))
+        return top_restaurants.results(), summary
+
+    def _shard_program(self, shard: str) -> FilterRestaurantsCSVProgram:
+        return FilterRestaurantsCSVProgram(self.cuisine_file_name, shard, use_snapshot=self.use_snapshot)
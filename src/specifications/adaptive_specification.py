@@ -0,0 +1,104 @@
+import math
+import time
+from functools import reduce
+from operator import and_
+from typing import Any, Callable, Iterable, List, Optional
+from dataclasses import dataclass
+from specifications.base_specification import BaseSpecification
+from specifications.compiler import compile_specification
+
+
+@dataclass
+class LeafMeasurement:
+    '''The pass rate and seconds per candidate of one specification, from the latest sample'''
+    pass_rate: float
+    seconds: float
+
+    @property
+    def rank(self) -> float:
+        '''
+        Specifications are evaluated in increasing rank: the cost of checking
+        a candidate over the chance of rejecting it. Checking the lowest rank
+        first minimizes the expected cost of a conjunction of independent
+        specifications.
+        '''
+        if self.pass_rate >= 1:
+            return math.inf
+        return self.seconds / (1 - self.pass_rate)
+
+
+class AdaptiveAndSpecification(BaseSpecification):
+    '''
+    A conjunction of any number of specifications which reorders them while
+    filtering so that the cheapest and most selective run first. Every
+    reorder_every candidates, the first sample_size candidates of a batch are
+    checked against every specification on its own to measure its pass rate
+    and cost, and the conjunction is compiled again in increasing rank. The
+    order never changes which candidates are satisfied, only how fast.
+    '''
+
+    def __init__(self, specifications: Iterable[BaseSpecification], sample_size: int = 128,
+                 reorder_every: int = 50000, clock: Callable[[], float] = time.perf_counter):
+        self.specifications: List[BaseSpecification] = list(specifications)
+        self.sample_size = sample_size
+        self.reorder_every = reorder_every
+        self.clock = clock
+
+        # The specifications in the order they are evaluated, and their latest measurements
+        self.order: List[BaseSpecification] = list(self.specifications)
+        self.measurements: List[Optional[LeafMeasurement]] = [
+            None] * len(self.specifications)
+
+        self._criteria: Any = None
+        self._leaf_predicates: List[Callable[[Any], bool]] = []
+        self._predicate: Callable[[Any], bool] = lambda candidate: True
+        self._until_sample = 0
+
+    def is_satisfied_by(self, candidate: Any, criteria: Any) -> bool:
+        return all(specification.is_satisfied_by(candidate, criteria) for specification in self.order)
+
+    def to_expression(self, criteria: Any, bind: Callable[[Any], str]) -> Optional[str]:
+        return reduce(and_, self.order).to_expression(criteria, bind) if self.order else None
+
+    def to_sql(self, criteria: Any, bind: Callable[[Any], str]) -> Optional[str]:
+        return reduce(and_, self.order).to_sql(criteria, bind) if self.order else None
+
+    def filter(self, candidates: List[Any], criteria: Any) -> List[Any]:
+        '''
+        Returns, in order, the candidates satisfying every specification for
+        the criteria. Measures and reorders the specifications first when
+        reorder_every candidates have been filtered since they last were.
+        '''
+
+        if criteria is not self._criteria:
+            self._criteria = criteria
+            self._until_sample = 0
+            self._leaf_predicates = [compile_specification(specification, criteria)
+                                     for specification in self.specifications]
+            self._compile()
+
+        if self._until_sample <= 0 and candidates:
+            self._reorder(candidates[:self.sample_size])
+            self._until_sample = self.reorder_every
+        self._until_sample -= len(candidates)
+
+        return list(filter(self._predicate, candidates))
+
+    def _reorder(self, sample: List[Any]) -> None:
+        '''Measures every specification on the sample and orders them by rank'''
+
+        for position, is_satisfied in enumerate(self._leaf_predicates):
+            start = self.clock()
+            passed = sum(1 for candidate in sample if is_satisfied(candidate))
+            seconds = self.clock() - start
+            self.measurements[position] = LeafMeasurement(
+                pass_rate=passed / len(sample), seconds=seconds / len(sample))
+
+        # Sorting is stable, equally ranked specifications keep their given order
+        ranked = sorted(range(len(self.specifications)),
+                        key=lambda position: self.measurements[position].rank)
+        self.order = [self.specifications[position] for position in ranked]
+        self._compile()
+
+    def _compile(self) -> None:
+        self._predicate = compile_specification(self, self._criteria)
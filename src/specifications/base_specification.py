@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, Callable, Optional
 from abc import abstractmethod
 from dataclasses import dataclass
 
@@ -17,6 +17,27 @@ class BaseSpecification:
     def __call__(self, candidate: Any, criteria: Any) -> bool:
         return self.is_satisfied_by(candidate, criteria)
 
+    def to_expression(self, criteria: Any, bind: Callable[[Any], str]) -> Optional[str]:
+        '''
+        Returns a Python expression over the name "candidate" which is True
+        exactly when the candidate satisfies this specification for the fixed
+        criteria, or None when every candidate does. bind makes a value
+        available to the expression and returns the name to refer to it by.
+        By default the expression calls back into is_satisfied_by.
+        '''
+        return f'{bind(self)}.is_satisfied_by(candidate, {bind(criteria)})'
+
+    def to_sql(self, criteria: Any, bind: Callable[[Any], str]) -> Optional[str]:
+        '''
+        Returns an SQL condition over the columns of the table being searched
+        which is true exactly when a row satisfies this specification for the
+        fixed criteria, or None when every row does. bind adds a parameter
+        and returns the placeholder to refer to it by. Specifications which
+        can't be expressed in SQL raise a NotImplementedError.
+        '''
+        raise NotImplementedError(
+            f'{type(self).__name__} can not be translated to SQL')
+
     def __and__(self, other: "BaseSpecification") -> "AndSpecification":
         return AndSpecification(self, other)
 
@@ -36,6 +57,24 @@ class AndSpecification(BaseSpecification):
     def is_satisfied_by(self, candidate: Any, criteria: Any) -> bool:
         return self.left.is_satisfied_by(candidate, criteria) and self.right.is_satisfied_by(candidate, criteria)
 
+    def to_expression(self, criteria: Any, bind: Callable[[Any], str]) -> Optional[str]:
+        left = self.left.to_expression(criteria, bind)
+        right = self.right.to_expression(criteria, bind)
+        if left is None:
+            return right
+        if right is None:
+            return left
+        return f'({left} and {right})'
+
+    def to_sql(self, criteria: Any, bind: Callable[[Any], str]) -> Optional[str]:
+        left = self.left.to_sql(criteria, bind)
+        right = self.right.to_sql(criteria, bind)
+        if left is None:
+            return right
+        if right is None:
+            return left
+        return f'({left} AND {right})'
+
 
 @dataclass(frozen=True)
 class OrSpecification(BaseSpecification):
@@ -46,6 +85,20 @@ class OrSpecification(BaseSpecification):
     def is_satisfied_by(self, candidate: Any, criteria: Any) -> bool:
         return self.left.is_satisfied_by(candidate, criteria) or self.right.is_satisfied_by(candidate, criteria)
 
+    def to_expression(self, criteria: Any, bind: Callable[[Any], str]) -> Optional[str]:
+        left = self.left.to_expression(criteria, bind)
+        right = self.right.to_expression(criteria, bind)
+        if left is None or right is None:
+            return None
+        return f'({left} or {right})'
+
+    def to_sql(self, criteria: Any, bind: Callable[[Any], str]) -> Optional[str]:
+        left = self.left.to_sql(criteria, bind)
+        right = self.right.to_sql(criteria, bind)
+        if left is None or right is None:
+            return None
+        return f'({left} OR {right})'
+
 
 @dataclass(frozen=True)
 class NotSpecification(BaseSpecification):
@@ -54,3 +107,15 @@ class NotSpecification(BaseSpecification):
 
     def is_satisfied_by(self, candidate: Any, criteria: Any) -> bool:
         return not self.specification.is_satisfied_by(candidate, criteria)
+
+    def to_expression(self, criteria: Any, bind: Callable[[Any], str]) -> Optional[str]:
+        expression = self.specification.to_expression(criteria, bind)
+        if expression is None:
+            return 'False'
+        return f'(not {expression})'
+
+    def to_sql(self, criteria: Any, bind: Callable[[Any], str]) -> Optional[str]:
+        condition = self.specification.to_sql(criteria, bind)
+        if condition is None:
+            return '0'
+        return f'(NOT {condition})'
@@ -0,0 +1,42 @@
+from typing import Any, Callable, Dict, Tuple
+from specifications.base_specification import BaseSpecification
+
+
+def compile_specification(specification: BaseSpecification, criteria: Any) -> Callable[[Any], bool]:
+    '''
+    Compiles a specification tree for a fixed criteria into one predicate
+    taking only the candidate. The tree is flattened into a single Python
+    expression, with the specifications whose criteria is not being filtered
+    for removed entirely, so evaluating a candidate costs one function call
+    rather than a method dispatch per node. Build it once per query and reuse
+    it for every candidate.
+    '''
+
+    namespace: Dict[str, Any] = {}
+
+    def bind(value: Any) -> str:
+        name = f'_value_{len(namespace)}'
+        namespace[name] = value
+        return name
+
+    expression = specification.to_expression(criteria, bind) or 'True'
+    return eval(f'lambda candidate: {expression}', namespace)
+
+
+def compile_specification_to_sql(specification: BaseSpecification, criteria: Any) -> Tuple[str, Dict[str, Any]]:
+    '''
+    Translates a specification tree for a fixed criteria into an SQL WHERE
+    condition and its named parameters. Values are always passed as
+    parameters, never spliced into the SQL. Parameters are named as branches
+    which are always satisfied are dropped after binding theirs.
+    '''
+
+    parameters: Dict[str, Any] = {}
+
+    def bind(value: Any) -> str:
+        name = f'value_{len(parameters)}'
+        parameters[name] = value
+        return f':{name}'
+
+    condition = specification.to_sql(criteria, bind) or '1'
+    return condition, parameters
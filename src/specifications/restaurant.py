@@ -1,4 +1,6 @@
-from typing import Optional
+from functools import lru_cache, reduce
+from operator import and_
+from typing import Any, Callable, Dict, List, Optional
 from specifications.base_specification import BaseSpecification
 from models.restaurant import Restaurant
 from models.restaurant_criteria import RestaurantCriteria
@@ -6,10 +8,29 @@ from models.restaurant_criteria import RestaurantCriteria
 
 class RestaurantIsTheRightName(BaseSpecification):
     def is_satisfied_by(self, restaurant: Restaurant, criteria: RestaurantCriteria) -> bool:
-        '''Is satisfied if the name of the restaurant partially matches the criteria's'''
-
+        '''
+        Is satisfied if the name of the restaurant partially matches the
+        criteria's, or when searching with max_name_edits, if it is within
+        that many edits of the criteria's name.
+        '''
+
+        if searches_names_fuzzily(criteria):
+            return name_edit_distance(restaurant.name, criteria.restaurant_name) <= criteria.max_name_edits
         return strings_partially_match(restaurant.name, criteria.restaurant_name)
 
+    def to_expression(self, criteria: RestaurantCriteria, bind: Callable[[Any], str]) -> Optional[str]:
+        if searches_names_fuzzily(criteria):
+            return (f'{bind(name_edit_distance)}(candidate.name, {bind(criteria.restaurant_name)}) '
+                    f'<= {bind(criteria.max_name_edits)}')
+        return partial_match_expression('candidate.name', criteria.restaurant_name, bind)
+
+    def to_sql(self, criteria: RestaurantCriteria, bind: Callable[[Any], str]) -> Optional[str]:
+        if searches_names_fuzzily(criteria):
+            # name_edit_distance is registered as an SQL function by the SQLite catalog
+            return (f'name_edit_distance(name, {bind(criteria.restaurant_name)}) '
+                    f'<= {bind(criteria.max_name_edits)}')
+        return partial_match_sql('search_name', criteria.restaurant_name, bind)
+
 
 class RestaurantIsTheRightCuisine(BaseSpecification):
     def is_satisfied_by(self, restaurant: Restaurant, criteria: RestaurantCriteria) -> bool:
@@ -17,6 +38,15 @@ class RestaurantIsTheRightCuisine(BaseSpecification):
 
         return strings_partially_match(restaurant.cuisine, criteria.cuisine)
 
+    def to_expression(self, criteria: RestaurantCriteria, bind: Callable[[Any], str]) -> Optional[str]:
+        return partial_match_expression('candidate.cuisine', criteria.cuisine, bind)
+
+    def to_sql(self, criteria: RestaurantCriteria, bind: Callable[[Any], str]) -> Optional[str]:
+        condition = partial_match_sql('search_name', criteria.cuisine, bind)
+        if condition is None:
+            return None
+        return f'cuisine_code IN (SELECT code FROM cuisines WHERE {condition})'
+
 
 class RestaurantIsCheapEnough(BaseSpecification):
     def is_satisfied_by(self, restaurant: Restaurant, criteria: RestaurantCriteria) -> bool:
@@ -26,6 +56,16 @@ class RestaurantIsCheapEnough(BaseSpecification):
             return restaurant.average_price <= criteria.max_price
         return True
 
+    def to_expression(self, criteria: RestaurantCriteria, bind: Callable[[Any], str]) -> Optional[str]:
+        if criteria.max_price is not None:
+            return f'candidate.average_price <= {bind(criteria.max_price)}'
+        return None
+
+    def to_sql(self, criteria: RestaurantCriteria, bind: Callable[[Any], str]) -> Optional[str]:
+        if criteria.max_price is not None:
+            return f'average_price <= {bind(criteria.max_price)}'
+        return None
+
 
 class RestaurantIsRatedWellEnough(BaseSpecification):
     def is_satisfied_by(self, restaurant: Restaurant, criteria: RestaurantCriteria) -> bool:
@@ -35,6 +75,16 @@ class RestaurantIsRatedWellEnough(BaseSpecification):
             return restaurant.customer_rating >= criteria.min_customer_rating
         return True
 
+    def to_expression(self, criteria: RestaurantCriteria, bind: Callable[[Any], str]) -> Optional[str]:
+        if criteria.min_customer_rating is not None:
+            return f'candidate.customer_rating >= {bind(criteria.min_customer_rating)}'
+        return None
+
+    def to_sql(self, criteria: RestaurantCriteria, bind: Callable[[Any], str]) -> Optional[str]:
+        if criteria.min_customer_rating is not None:
+            return f'customer_rating >= {bind(criteria.min_customer_rating)}'
+        return None
+
 
 class RestaurantIsCloseEnough(BaseSpecification):
     def is_satisfied_by(self, restaurant: Restaurant, criteria: RestaurantCriteria) -> bool:
@@ -44,6 +94,41 @@ class RestaurantIsCloseEnough(BaseSpecification):
             return restaurant.distance <= criteria.max_distance
         return True
 
+    def to_expression(self, criteria: RestaurantCriteria, bind: Callable[[Any], str]) -> Optional[str]:
+        if criteria.max_distance is not None:
+            return f'candidate.distance <= {bind(criteria.max_distance)}'
+        return None
+
+    def to_sql(self, criteria: RestaurantCriteria, bind: Callable[[Any], str]) -> Optional[str]:
+        if criteria.max_distance is not None:
+            return f'distance <= {bind(criteria.max_distance)}'
+        return None
+
+
+def restaurant_criteria_specification() -> BaseSpecification:
+    '''
+    The specification a restaurant must satisfy to conform to a
+    RestaurantCriteria: every constraint filtered for (not None in the
+    RestaurantCriteria) must be satisfied.
+    '''
+
+    return reduce(and_, restaurant_criteria_leaves().values())
+
+
+def restaurant_criteria_leaves() -> Dict[str, BaseSpecification]:
+    '''
+    The specifications making up restaurant_criteria_specification, labelled
+    by the criteria they check, in the order they are evaluated.
+    '''
+
+    return {
+        'rating': RestaurantIsRatedWellEnough(),
+        'distance': RestaurantIsCloseEnough(),
+        'price': RestaurantIsCheapEnough(),
+        'cuisine': RestaurantIsTheRightCuisine(),
+        'name': RestaurantIsTheRightName(),
+    }
+
 
 def strings_partially_match(to_match_against: str, string_to_match_with: Optional[str]) -> bool:
     """
@@ -55,11 +140,96 @@ def strings_partially_match(to_match_against: str, string_to_match_with: Optiona
         return True
 
     lowercase_match = string_to_match_with.lower()
-    lowercase_given = to_match_against.lower()
 
     # Determine if there is a partial match
-    all_words_in_name = lowercase_given.split(' ')
+    all_words_in_name = searchable_words(to_match_against)
     for word in all_words_in_name:
         if word.startswith(lowercase_match):
             return True
     return False
+
+
+def searchable_words(string: str) -> List[str]:
+    '''
+    Splits a string into the lowercased words whose prefixes are checked when
+    partially matching against it.
+    '''
+
+    return string.lower().split(' ')
+
+
+def searches_names_fuzzily(criteria: RestaurantCriteria) -> bool:
+    '''Whether the Criteria filters for a name with max_name_edits typos allowed'''
+
+    return bool(criteria.restaurant_name) and criteria.max_name_edits is not None
+
+
+def name_edit_distance(name: str, string_to_match_with: str) -> int:
+    '''
+    The number of typos between a restaurant name and a searched name: 0 when
+    a word of the name is prefixed with it (see strings_partially_match),
+    otherwise the least edit_distance between it and a word of the name.
+    '''
+
+    lowercase_match = string_to_match_with.lower()
+    words = searchable_words(name)
+    if any(word.startswith(lowercase_match) for word in words):
+        return 0
+    return min(edit_distance(word, lowercase_match) for word in words)
+
+
+@lru_cache(maxsize=1 << 16)
+def edit_distance(first: str, second: str) -> int:
+    '''
+    The Levenshtein distance between two strings: the fewest characters
+    inserted, deleted or substituted to turn one into the other. Names share
+    few distinct words, so the distances are cached.
+    '''
+
+    if len(first) < len(second):
+        first, second = second, first
+
+    # Distances from every prefix of second to the prefix of first seen so far
+    previous = list(range(len(second) + 1))
+    for i, first_character in enumerate(first, 1):
+        current = [i]
+        for j, second_character in enumerate(second, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (first_character != second_character)))
+        previous = current
+    return previous[-1]
+
+
+def partial_match_expression(attribute: str, string_to_match_with: Optional[str], bind: Callable[[Any], str]) -> Optional[str]:
+    '''
+    Returns an expression equivalent to strings_partially_match on the given
+    attribute, or None when the string to match with is None or empty. A word
+    of the attribute starts with the prefix exactly when " " + prefix occurs in
+    " " + the lowercased attribute, as long as the prefix has no spaces itself.
+    '''
+
+    if not string_to_match_with:
+        return None
+
+    lowercase_match = string_to_match_with.lower()
+    if ' ' in lowercase_match:
+        # Words never contain spaces, so nothing can match
+        return 'False'
+    return f'{bind(" " + lowercase_match)} in " " + {attribute}.lower()'
+
+
+def partial_match_sql(column: str, string_to_match_with: Optional[str], bind: Callable[[Any], str]) -> Optional[str]:
+    '''
+    The SQL equivalent of partial_match_expression, for a column holding " "
+    + the lowercased string. The column is lowercased by Python when it is
+    stored, as SQLite's lower() only lowercases ASCII.
+    '''
+
+    if not string_to_match_with:
+        return None
+
+    lowercase_match = string_to_match_with.lower()
+    if ' ' in lowercase_match:
+        # Words never contain spaces, so nothing can match
+        return '0'
+    return f'instr({column}, {bind(" " + lowercase_match)}) > 0'
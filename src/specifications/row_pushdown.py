@@ -0,0 +1,261 @@
+from math import isnan
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from models.restaurant import Restaurant
+from models.restaurant_criteria import RestaurantCriteria
+from specifications.restaurant import (name_edit_distance, partial_match_expression,
+                                       searches_names_fuzzily, strings_partially_match)
+
+# Parses one row read from the Restaurant CSV into the locals the conditions check
+_PARSE_ROW = '''
+        name = row['name']
+        customer_rating = int(row['customer_rating'])
+        distance = float(row['distance'])
+        average_price = float(row['price'])
+        cuisine_id = row['cuisine_id']
+        latitude = row.get('latitude')
+        longitude = row.get('longitude')'''
+
+_PARSE_ROWS = '''
+def parse_rows(rows):
+    restaurants = []
+    append = restaurants.append
+    for row in rows:%s
+        if %s:
+            append(Restaurant(
+                name, customer_rating, distance, average_price, cuisines[cuisine_id],
+                float(latitude) if latitude is not None and latitude.strip() else None,
+                float(longitude) if longitude is not None and longitude.strip() else None))
+        else:
+            # Rows left out fail on the same malformed fields as the rows kept
+            cuisines[cuisine_id]
+            if latitude is not None and latitude.strip():
+                float(latitude)
+            if longitude is not None and longitude.strip():
+                float(longitude)
+    return restaurants
+'''
+
+# Parses the raw lines of the Restaurant CSV, see compile_line_parser
+_PARSE_LINES = '''
+def parse_lines(lines):
+    restaurants = []
+    append = restaurants.append
+    for line in lines:
+        if not line:
+            continue
+        fields = line.split(b',')
+        if %(conditions)s:
+            append(Restaurant(
+                %(name)s, %(customer_rating)s, %(distance)s, %(average_price)s, cuisines[%(cuisine_id)s],
+                %(latitude)s, %(longitude)s))
+        else:
+            # Rows left out fail on the same malformed fields as the rows kept
+            %(name_field)s, %(customer_rating)s, %(distance)s, %(average_price)s, cuisines[%(cuisine_id)s]%(check_coordinates)s
+    return restaurants
+'''
+
+# Builds Restaurants from the columns of a snapshot, see compile_column_parser
+_PARSE_COLUMNS = '''
+def parse_columns(names, ratings, distances, prices, cuisine_codes, latitudes, longitudes):
+    restaurants = []
+    append = restaurants.append
+    for name, customer_rating, distance, average_price, cuisine_code, latitude, longitude in zip(
+            names, ratings, distances, prices, cuisine_codes, latitudes, longitudes):
+        if %s:
+            append(Restaurant(
+                name, customer_rating, distance, average_price, cuisine_names[cuisine_code],
+                None if isnan(latitude) else latitude, None if isnan(longitude) else longitude))
+    return restaurants
+'''
+
+# Ranks the rows of a snapshot's columns, see compile_column_ranker
+_RANK_COLUMNS = '''
+def rank_columns(names, ratings, distances, prices, cuisine_codes):
+    ranked = []
+    append = ranked.append
+    for row, (name, customer_rating, distance, average_price, cuisine_code) in enumerate(zip(
+            names, ratings, distances, prices, cuisine_codes)):
+        if %s:
+            append((%sdistance, -customer_rating, average_price, row))
+    return ranked
+'''
+
+# The locals of _PARSE_ROW the conditions check
+_ROW_VALUES = {'name': 'name', 'customer_rating': 'customer_rating', 'distance': 'distance',
+               'average_price': 'average_price', 'cuisine_id': 'cuisine_id'}
+
+# The columns of the Restaurant CSV every row has
+RESTAURANT_COLUMNS = ['name', 'customer_rating', 'distance', 'price', 'cuisine_id']
+
+
+def allowed_cuisine_ids(criteria: RestaurantCriteria, cuisines: Dict[str, str]) -> Optional[Set[str]]:
+    '''
+    The ids of the cuisines of the cuisine map (id=>name) which partially
+    match the criteria's cuisine, or None when the criteria is not filtering
+    for a cuisine.
+    '''
+
+    if not criteria.cuisine:
+        return None
+    return {cuisine_id for cuisine_id, cuisine in cuisines.items()
+            if strings_partially_match(cuisine, criteria.cuisine)}
+
+
+def compile_row_parser(criteria: Optional[RestaurantCriteria],
+                       cuisines: Dict[str, str]) -> Callable[[List[Dict[str, str]]], List[Restaurant]]:
+    '''
+    Compiles a function turning rows read from the Restaurant CSV into the
+    Restaurants, joined with their cuisine names, which may satisfy the
+    Criteria. Each row's fields are converted and checked against the
+    criteria before a Restaurant is made, so only the rows which pass are
+    made into objects. A cuisine is checked by its id, against the ids of
+    the matching cuisines resolved once from the cuisine map. Distances are
+    only checked when they are not measured from an origin, so callers
+    filter the Restaurants made with the full specification as well. Every
+    row is converted, whether it is kept or not, so a malformed row raises
+    just as it would with every row made into a Restaurant. Without a
+    Criteria every row is kept.
+    '''
+
+    namespace: Dict[str, Any] = {'Restaurant': Restaurant, 'cuisines': cuisines}
+
+    def bind(value: Any) -> str:
+        name = f'_value_{len(namespace)}'
+        namespace[name] = value
+        return name
+
+    conditions = [] if criteria is None else _row_conditions(
+        criteria, allowed_cuisine_ids(criteria, cuisines), _ROW_VALUES, bind)
+    exec(_PARSE_ROWS % (_PARSE_ROW, ' and '.join(conditions) or 'True'), namespace)
+    return namespace['parse_rows']
+
+
+def compile_line_parser(criteria: Optional[RestaurantCriteria], cuisines: Dict[str, str],
+                        columns: Dict[str, int], encoding: str) -> Callable[[List[bytes]], List[Restaurant]]:
+    '''
+    Compiles the same function as compile_row_parser for the raw lines of
+    the Restaurant CSV found by a CSVScanner, encoded in the encoding, given
+    the index of each column in a line. Fields are only converted where a
+    condition or a Restaurant needs them: a name is only decoded to check it
+    or for a kept row, and cuisine ids are looked up as bytes. Numbers are
+    converted from bytes, which accepts the same numbers as from str apart
+    from non ASCII digits and spaces, so callers parse the lines of any
+    chunk which raises with the csv module to tell a malformed row from one
+    this can't convert. Empty lines are skipped, as csv.DictReader does.
+    '''
+
+    byte_cuisines = {cuisine_id.encode(encoding): cuisine
+                     for cuisine_id, cuisine in cuisines.items() if cuisine_id is not None}
+    namespace: Dict[str, Any] = {'Restaurant': Restaurant, 'cuisines': byte_cuisines,
+                                 'encoding': encoding}
+
+    def bind(value: Any) -> str:
+        name = f'_value_{len(namespace)}'
+        namespace[name] = value
+        return name
+
+    values = {
+        'name': f'fields[{columns["name"]}].decode(encoding)',
+        'customer_rating': f'int(fields[{columns["customer_rating"]}])',
+        'distance': f'float(fields[{columns["distance"]}])',
+        'average_price': f'float(fields[{columns["price"]}])',
+        'cuisine_id': f'fields[{columns["cuisine_id"]}]',
+    }
+    coordinates: Dict[str, str] = {}
+    check_coordinates = ''
+    for coordinate in ['latitude', 'longitude']:
+        if coordinate not in columns:
+            coordinates[coordinate] = 'None'
+            continue
+        field = f'fields[{columns[coordinate]}]'
+        coordinates[coordinate] = f'(float({field}) if {field}.strip() else None)'
+        check_coordinates += f'\n            if {field}.strip():\n                float({field})'
+
+    conditions: List[str] = []
+    if criteria is not None:
+        cuisine_ids = allowed_cuisine_ids(criteria, cuisines)
+        conditions = _row_conditions(
+            criteria, None if cuisine_ids is None else
+            {cuisine_id.encode(encoding) for cuisine_id in cuisine_ids}, values, bind)
+    exec(_PARSE_LINES % dict(values, **coordinates, conditions=' and '.join(conditions) or 'True',
+                             name_field=f'fields[{columns["name"]}]', check_coordinates=check_coordinates),
+         namespace)
+    return namespace['parse_lines']
+
+
+def compile_column_parser(criteria: Optional[RestaurantCriteria],
+                          cuisine_names: List[str]) -> Callable[..., List[Restaurant]]:
+    '''
+    Compiles the same function as compile_row_parser for the columns of a
+    snapshot (see SnapshotColumns.chunks), with the cuisine of each row as a
+    code into the cuisine names. The columns hold converted values already,
+    so only the rows which pass the criteria are made into Restaurants.
+    '''
+
+    namespace: Dict[str, Any] = {'Restaurant': Restaurant, 'cuisine_names': cuisine_names,
+                                 'isnan': isnan}
+
+    def bind(value: Any) -> str:
+        name = f'_value_{len(namespace)}'
+        namespace[name] = value
+        return name
+
+    values = dict(_ROW_VALUES, cuisine_id='cuisine_code')
+    conditions = [] if criteria is None else _row_conditions(
+        criteria, allowed_cuisine_ids(criteria, dict(enumerate(cuisine_names))), values, bind)
+    exec(_PARSE_COLUMNS % (' and '.join(conditions) or 'True'), namespace)
+    return namespace['parse_columns']
+
+
+def compile_column_ranker(criteria: RestaurantCriteria,
+                          cuisine_names: List[str]) -> Callable[..., List[Tuple]]:
+    '''
+    Compiles a function returning, for the rows of a snapshot's columns
+    which pass the criteria, their criteria_rank_key followed by their row,
+    without making any Restaurant. Distances from an origin are not in the
+    columns, so the criteria must not have one.
+    '''
+
+    namespace: Dict[str, Any] = {}
+
+    def bind(value: Any) -> str:
+        name = f'_value_{len(namespace)}'
+        namespace[name] = value
+        return name
+
+    values = dict(_ROW_VALUES, cuisine_id='cuisine_code')
+    conditions = _row_conditions(
+        criteria, allowed_cuisine_ids(criteria, dict(enumerate(cuisine_names))), values, bind)
+    edits = (f'{bind(name_edit_distance)}(name, {bind(criteria.restaurant_name)}), '
+             if searches_names_fuzzily(criteria) else '')
+    exec(_RANK_COLUMNS % (' and '.join(conditions) or 'True', edits), namespace)
+    return namespace['rank_columns']
+
+
+def _row_conditions(criteria: RestaurantCriteria, cuisine_ids: Optional[Set[Any]],
+                    values: Dict[str, str], bind: Callable[[Any], str]) -> List[str]:
+    '''
+    The conditions which every row matching the Criteria meets, cheapest
+    first, on the expressions of the values of a row by attribute, and the
+    ids of the cuisines allowed.
+    '''
+
+    conditions = []
+    if criteria.min_customer_rating is not None:
+        conditions.append(f'{values["customer_rating"]} >= {bind(criteria.min_customer_rating)}')
+    if criteria.max_distance is not None and criteria.origin is None:
+        conditions.append(f'{values["distance"]} <= {bind(criteria.max_distance)}')
+    if criteria.max_price is not None:
+        conditions.append(f'{values["average_price"]} <= {bind(criteria.max_price)}')
+
+    if cuisine_ids is not None:
+        conditions.append(f'{values["cuisine_id"]} in {bind(frozenset(cuisine_ids))}')
+
+    if searches_names_fuzzily(criteria):
+        conditions.append(f'{bind(name_edit_distance)}({values["name"]}, {bind(criteria.restaurant_name)}) '
+                          f'<= {bind(criteria.max_name_edits)}')
+    else:
+        name_condition = partial_match_expression(values['name'], criteria.restaurant_name, bind)
+        if name_condition is not None:
+            conditions.append(name_condition)
+    return conditions
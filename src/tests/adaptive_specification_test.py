@@ -0,0 +1,83 @@
+import unittest
+from index import RestaurantCriteria
+from models.restaurant import Restaurant
+from search_restaurants_program import FilterRestaurantsCSVProgram
+from specifications.adaptive_specification import AdaptiveAndSpecification
+from specifications.restaurant import (RestaurantIsCheapEnough, RestaurantIsRatedWellEnough,
+                                       RestaurantIsTheRightName, restaurant_criteria_leaves)
+
+
+class TestAdaptiveAndSpecification(unittest.TestCase):
+    '''
+    Tests that the adaptive conjunction puts the most selective
+    specifications first as it filters, without changing the results.
+    '''
+
+    def setUp(self):
+        self.program = FilterRestaurantsCSVProgram('cuisines.csv', 'restaurants.csv')
+        self.restaurants = list(self.program.read_restaurants())
+
+    def criteria(self, **fields):
+        criteria = dict(restaurant_name=None, max_distance=None, max_price=None,
+                        min_customer_rating=None, cuisine=None)
+        criteria.update(fields)
+        return RestaurantCriteria(**criteria)
+
+    def test_same_results(self):
+        criterias = [
+            self.criteria(),
+            self.criteria(restaurant_name='grill'),
+            self.criteria(restaurant_name='h', max_distance=6,
+                          max_price=40, min_customer_rating=2, cuisine='a'),
+            self.criteria(max_price=20, min_customer_rating=4),
+        ]
+        for criteria in criterias:
+            specification = AdaptiveAndSpecification(
+                restaurant_criteria_leaves().values(), sample_size=16, reorder_every=30)
+            is_valid_restaurant = self.program._compile_criteria(criteria)
+            for start in range(0, len(self.restaurants), 25):
+                batch = self.restaurants[start:start+25]
+                self.assertEqual(specification.filter(batch, criteria),
+                                 list(filter(is_valid_restaurant, batch)))
+                self.assertEqual([specification.is_satisfied_by(r, criteria) for r in batch],
+                                 [is_valid_restaurant(r) for r in batch])
+
+    def test_most_selective_first(self):
+        # Nothing is named "zzz", while every restaurant is rated at least 1
+        criteria = self.criteria(restaurant_name='zzz', min_customer_rating=1)
+        name = RestaurantIsTheRightName()
+        specification = AdaptiveAndSpecification(
+            [RestaurantIsRatedWellEnough(), RestaurantIsCheapEnough(), name])
+        self.assertEqual(specification.filter(self.restaurants, criteria), [])
+
+        self.assertIs(specification.order[0], name)
+        rating, price, name_measurement = specification.measurements
+        self.assertEqual(rating.pass_rate, 1.0)
+        self.assertEqual(name_measurement.pass_rate, 0.0)
+        # Criteria which are not filtered for are never worth checking first
+        self.assertEqual(price.pass_rate, 1.0)
+
+    def test_reorders_periodically(self):
+        criteria = self.criteria(max_price=20, min_customer_rating=3)
+        rating, price = RestaurantIsRatedWellEnough(), RestaurantIsCheapEnough()
+        specification = AdaptiveAndSpecification(
+            [rating, price], sample_size=10, reorder_every=30)
+
+        def restaurants(customer_rating, average_price):
+            return [Restaurant(name=f'Place {i}', customer_rating=customer_rating, distance=1,
+                               average_price=average_price, cuisine='Thai') for i in range(20)]
+
+        # At first every restaurant is too expensive
+        self.assertEqual(specification.filter(restaurants(5, 50), criteria), [])
+        self.assertEqual(specification.order, [price, rating])
+
+        # Then every one is rated too low, which is only measured once another
+        # 30 restaurants have been filtered
+        self.assertEqual(specification.filter(restaurants(1, 10), criteria), [])
+        self.assertEqual(specification.order, [price, rating])
+        self.assertEqual(specification.filter(restaurants(1, 10), criteria), [])
+        self.assertEqual(specification.order, [rating, price])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import io
+import json
+import unittest
+from unittest import mock
+from batch_index import main, make_parser, parse_query
+from index import RestaurantCriteria
+from search_restaurants_program import FilterRestaurantsCSVProgram
+
+
+class TestBatchSearch(unittest.TestCase):
+    '''
+    Tests answering many JSON Lines queries in a single pass over the csvs.
+    '''
+
+    def setUp(self):
+        self.program = FilterRestaurantsCSVProgram(
+            'cuisines.csv', 'restaurants.csv')
+        self.queries = [
+            {'id': 1, 'name': 'delic', 'distance': 5},
+            {'cuisine': 'chi', 'limit': 2},
+            {'price': 20, 'customer_rating': 4, 'limit': 10},
+            {},
+        ]
+
+    def run_batch(self, lines):
+        output = io.StringIO()
+        args = make_parser().parse_args(['--no-snapshot'])
+        args.queries = io.StringIO('\n'.join(lines) + '\n')
+        args.output = output
+        main(args)
+        return [json.loads(line) for line in output.getvalue().splitlines()]
+
+    def test_matches_individual_searches(self):
+        results = self.run_batch([json.dumps(query) for query in self.queries])
+
+        self.assertEqual(len(results), len(self.queries))
+        self.assertEqual(results[0]['id'], 1)
+        for query, result in zip(self.queries, results):
+            criteria, limit = parse_query(query, 5)
+            expected = self.program.get_best_matched_restaurants(
+                criteria, limit)
+            self.assertEqual([restaurant['name'] for restaurant in result['restaurants']],
+                             [restaurant.name for restaurant in expected])
+
+    def test_parses_csv_once(self):
+        with mock.patch.object(FilterRestaurantsCSVProgram, '_build_cuisines_map',
+                               autospec=True, side_effect=FilterRestaurantsCSVProgram._build_cuisines_map) as build:
+            self.run_batch([json.dumps(query) for query in self.queries])
+            self.assertEqual(build.call_count, 1)
+
+    def test_invalid_queries_return_errors(self):
+        results = self.run_batch(
+            ['{"price": -1}', 'not json', '{"customer_rating": 2.5}', '{"colour": "red"}', '[]',
+             '{"limit": 2.5}', '{"fuzzy": 1.7}', '{"limit": true}', '{"distance": NaN}',
+             '{"price": Infinity}', '{"distance": "3"}', '{"origin": [true, 1]}',
+             '{"name": "grill"}'])
+
+        self.assertEqual([('error' in result) for result in results], [True] * 12 + [False])
+        self.assertEqual(results[-1]['line'], 13)
+
+    def test_parse_query(self):
+        criteria, limit = parse_query({'name': 'Grill', 'price': 12}, 5)
+        self.assertEqual(criteria, RestaurantCriteria(restaurant_name='Grill', max_distance=None,
+                                                      max_price=12.0, min_customer_rating=None, cuisine=None))
+        self.assertEqual(limit, 5)
+        with self.assertRaises(ValueError):
+            parse_query({'limit': 0}, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -16,6 +16,8 @@ class TestCommandLineInputValidity(unittest.TestCase):
             self.parser.parse_args(['--price', '-1'])
         with self.assertRaises(SystemExit):
             self.parser.parse_args(['--price', 'hello'])
+        with self.assertRaises(SystemExit):
+            self.parser.parse_args(['--price', 'nan'])
         self.assertEqual(self.parser.parse_args(['-p', '10']).price, 10.0)
         self.assertEqual(self.parser.parse_args(['-p', '11']).price, 11.0)
 
@@ -47,6 +49,74 @@ class TestCommandLineInputValidity(unittest.TestCase):
         # defaults to None
         self.assertEqual(self.parser.parse_args([]).customer_rating, None)
 
+    def test_limit(self):
+        with self.assertRaises(SystemExit):
+            self.parser.parse_args(['--limit', '0'])
+        with self.assertRaises(SystemExit):
+            self.parser.parse_args(['-k', '2.5'])
+        self.assertEqual(self.parser.parse_args(['-k', '20']).limit, 20)
+
+        # defaults to 5
+        self.assertEqual(self.parser.parse_args([]).limit, 5)
+
+    def test_origin(self):
+        with self.assertRaises(SystemExit):
+            self.parser.parse_args(['--origin', '42.3'])
+        with self.assertRaises(SystemExit):
+            self.parser.parse_args(['--origin', '42.3,-190'])
+        self.assertEqual(self.parser.parse_args(
+            ['--origin', '42.3,-71.1']).origin, (42.3, -71.1))
+        self.assertIsNone(self.parser.parse_args([]).origin)
+
+    def test_fuzzy(self):
+        with self.assertRaises(SystemExit):
+            self.parser.parse_args(['--fuzzy', '0'])
+        self.assertEqual(self.parser.parse_args(['--fuzzy', '1']).fuzzy, 1)
+
+        # Without a number, defaults to 2 typos, and without the flag names match exactly
+        self.assertEqual(self.parser.parse_args(['--fuzzy']).fuzzy, 2)
+        self.assertIsNone(self.parser.parse_args([]).fuzzy)
+
+    def test_cursor(self):
+        # Without a value, asks for the first page
+        self.assertEqual(self.parser.parse_args(['--cursor']).cursor, '')
+        self.assertEqual(self.parser.parse_args(
+            ['--cursor', 'WzEsIC00LCAxMCwgM10=']).cursor, 'WzEsIC00LCAxMCwgM10=')
+        self.assertIsNone(self.parser.parse_args([]).cursor)
+
+    def test_format(self):
+        with self.assertRaises(SystemExit):
+            self.parser.parse_args(['--format', 'xml'])
+        self.assertEqual(self.parser.parse_args(['--format', 'jsonl']).format, 'jsonl')
+        self.assertEqual(self.parser.parse_args([]).format, 'table')
+
+    def test_workers(self):
+        with self.assertRaises(SystemExit):
+            self.parser.parse_args(['--workers', '-2'])
+        self.assertEqual(self.parser.parse_args(['-w', '4']).workers, 4)
+
+        # defaults to 1
+        self.assertEqual(self.parser.parse_args([]).workers, 1)
+
+    def test_snapshot(self):
+        self.assertTrue(self.parser.parse_args(['--snapshot']).snapshot)
+        self.assertFalse(self.parser.parse_args(['--no-snapshot']).snapshot)
+
+        # defaults to streaming the CSVs
+        self.assertFalse(self.parser.parse_args([]).snapshot)
+
+    def test_shards(self):
+        # Must match a CSV in the csv/ folder
+        with self.assertRaises(SystemExit):
+            self.parser.parse_args(['--shards', 'nowhere_*.csv'])
+        with self.assertRaises(SystemExit):
+            self.parser.parse_args(['--shards', '*.py'])
+
+        self.assertEqual(self.parser.parse_args(
+            ['--shards', '*_restaurants.csv']).shards, '*_restaurants.csv')
+        self.assertEqual(self.parser.parse_args(['--shards', '.']).shards, '.')
+        self.assertIsNone(self.parser.parse_args([]).shards)
+
     def test_files(self):
 
         # Must be a CSV
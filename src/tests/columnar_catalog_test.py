@@ -0,0 +1,37 @@
+import unittest
+from itertools import product
+from index import RestaurantCriteria
+from catalog.restaurant_catalog import RestaurantCatalog
+from catalog import columnar_catalog
+
+
+@unittest.skipIf(columnar_catalog.numpy is None, 'numpy is not installed')
+class TestColumnarRestaurantCatalog(unittest.TestCase):
+    '''
+    Tests that the vectorized NumPy catalog returns the same restaurants as
+    the pure Python catalog.
+    '''
+
+    def setUp(self):
+        self.columnar = columnar_catalog.ColumnarRestaurantCatalog(
+            'cuisines.csv', 'restaurants.csv')
+        self.catalog = RestaurantCatalog('cuisines.csv', 'restaurants.csv')
+
+    def test_loads_every_unique_restaurant(self):
+        self.assertEqual(len(self.columnar), len(self.catalog))
+
+    def test_matches_python_catalog(self):
+        for name, distance, price, rating, cuisine in product(
+                [None, 'delic', 'p', 'zzz'], [None, 1, 4.5], [None, 10, 35],
+                [None, 1, 4], [None, 'chi', 'a']):
+            criteria = RestaurantCriteria(restaurant_name=name, max_distance=distance,
+                                          max_price=price, min_customer_rating=rating, cuisine=cuisine)
+            self.assertEqual(self.columnar.determine_valid_restaurants(criteria),
+                             self.catalog.determine_valid_restaurants(criteria))
+            for limit in [1, 5, 50]:
+                self.assertEqual(self.columnar.get_best_matched_restaurants(criteria, limit),
+                                 self.catalog.get_best_matched_restaurants(criteria, limit))
+
+
+if __name__ == '__main__':
+    unittest.main()
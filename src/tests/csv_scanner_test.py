@@ -0,0 +1,161 @@
+import csv
+import os
+import unittest
+from itertools import chain
+from index import RestaurantCriteria
+from search_restaurants_program import FilterRestaurantsCSVProgram
+from catalog.csv_scanner import CSVScanner
+from specifications.row_pushdown import RESTAURANT_COLUMNS
+
+HEADER = 'name,customer_rating,distance,price,cuisine_id'
+ROWS = [
+    'Deliciousgenix,4,1,10,11',
+    'Herbed Delicious,4,7,20,9',
+    'Café Crème,5,1.5,15,2',
+    'Grill Hut,2, 3 ,40,2',
+    'Hut,1,9.5,1e1,19',
+]
+
+
+class TestCSVScanner(unittest.TestCase):
+    '''
+    Tests that scanning the Restaurant CSV in memory parses exactly what the
+    csv module does, falling back to it for files and rows it can't scan.
+    '''
+
+    def setUp(self):
+        self.restaurant_file_name = 'csv_scanner_test_restaurants.csv'
+        self.program = FilterRestaurantsCSVProgram('cuisines.csv', self.restaurant_file_name)
+
+    def tearDown(self):
+        if os.path.exists('csv/'+self.restaurant_file_name):
+            os.remove('csv/'+self.restaurant_file_name)
+
+    def write(self, text, newline='\n'):
+        with open('csv/'+self.restaurant_file_name, 'w', newline=newline) as csvfile:
+            csvfile.write(text)
+
+    def criteria(self, **fields):
+        criteria = dict(restaurant_name=None, max_distance=None, max_price=None,
+                        min_customer_rating=None, cuisine=None)
+        criteria.update(fields)
+        return RestaurantCriteria(**criteria)
+
+    def criterias(self):
+        return [
+            None,
+            self.criteria(),
+            self.criteria(restaurant_name='caf'),
+            self.criteria(restaurant_name='crem', max_name_edits=1),
+            self.criteria(max_price=15, min_customer_rating=4),
+            self.criteria(cuisine='chinese', max_distance=3),
+        ]
+
+    def scanned(self, criteria, chunk_size=2):
+        return list(chain.from_iterable(self.program._parse_restaurant_chunks(chunk_size, criteria)))
+
+    def parsed_with_csv_module(self, criteria):
+        with open('csv/'+self.restaurant_file_name, 'r') as csvfile:
+            return list(chain.from_iterable(self.program._parse_restaurant_rows(
+                csv.DictReader(csvfile), self.program._build_cuisines_map(), 2, criteria)))
+
+    def can_scan(self):
+        with CSVScanner('csv/'+self.restaurant_file_name) as scanner:
+            return scanner.can_scan(RESTAURANT_COLUMNS)
+
+    def assert_same_as_csv_module(self):
+        for criteria in self.criterias():
+            self.assertEqual(self.scanned(criteria), self.parsed_with_csv_module(criteria))
+
+    def test_scans_plain_csv(self):
+        files = [
+            HEADER + '\n' + '\n'.join(ROWS) + '\n',
+            # Without a line break at the end
+            HEADER + '\n' + '\n'.join(ROWS),
+            # With blank lines
+            HEADER + '\n\n' + '\n'.join(ROWS) + '\n\n',
+            # Other columns, in another order, and coordinates
+            'id,cuisine_id,price,latitude,distance,name,customer_rating,longitude\n'
+            '1,2,10,42.36,1,Hut, 4,-71.06\n2,11,20,,2,Grill,3,\n3,9,30, ,3,Bistro,5,  \n',
+            HEADER,
+        ]
+        for text in files:
+            self.write(text)
+            self.assertTrue(self.can_scan())
+            self.assert_same_as_csv_module()
+
+        self.write(HEADER + '\r\n' + '\r\n'.join(ROWS) + '\r\n', newline='')
+        self.assertTrue(self.can_scan())
+        self.assert_same_as_csv_module()
+        self.assertEqual(len(self.scanned(None)), len(ROWS))
+
+    def test_falls_back_to_csv_module(self):
+        files = [
+            # A quoted field, which may hold a "," or line break
+            HEADER + '\n"Grill, Bar",4,1,10,2\n' + '\n'.join(ROWS) + '\n',
+            # A carriage return read as a line break by open()
+            HEADER + '\nGrill,4,1,10,2\r' + '\n'.join(ROWS) + '\n',
+            # A header without the price column
+            'name,customer_rating,distance,cuisine_id\nGrill,4,1,2\n',
+        ]
+        for text in files:
+            self.write(text, newline='')
+            self.assertFalse(self.can_scan())
+            for criteria in self.criterias():
+                try:
+                    expected = self.parsed_with_csv_module(criteria)
+                except ValueError:
+                    with self.assertRaises(ValueError):
+                        self.scanned(criteria)
+                    continue
+                self.assertEqual(self.scanned(criteria), expected)
+
+        # Both line endings, which open() reads as line breaks alike
+        mixed_files = [
+            HEADER + '\n' + '\n'.join(ROWS) + '\nGrill Bar,4,1,10,2\r\n',
+            'cuisine_id,customer_rating,distance,price,name\r\n'
+            + ''.join(f'1,4,1,10,Place {row}\n' for row in range(11)),
+        ]
+        for text in mixed_files:
+            self.write(text, newline='')
+            self.assertFalse(self.can_scan())
+            self.assert_same_as_csv_module()
+        self.assertEqual([restaurant.name for restaurant in self.scanned(None)],
+                         [f'Place {row}' for row in range(11)])
+        self.assertEqual(len(self.program.get_best_matched_restaurants(self.criteria(), 20)), 11)
+
+        # Numbers which only convert from str are parsed by the csv module
+        self.write(HEADER + '\n' + '\n'.join(ROWS) + '\nFar Place,٥, 8,10,2\n')
+        self.assertTrue(self.can_scan())
+        self.assert_same_as_csv_module()
+        self.assertEqual(self.scanned(None)[-1].customer_rating, 5)
+
+    def test_malformed_rows_raise(self):
+        malformed_rows = ['Bad Rating,five,1,40,1', 'Unknown Cuisine,1,1,40,999',
+                          'Short Row,1,1', 'Bad Price,1,1,$40,1']
+        for row in malformed_rows:
+            self.write(HEADER + '\n' + '\n'.join(ROWS) + f'\n{row}\n')
+            self.assertTrue(self.can_scan())
+            for criteria in self.criterias():
+                with self.assertRaises(ValueError):
+                    self.scanned(criteria)
+
+    def test_line_chunks(self):
+        rows = [f'Grill {row},4,1,10,2' for row in range(1000)]
+        self.write(HEADER + '\n' + '\n'.join(rows) + '\n')
+        with CSVScanner('csv/'+self.restaurant_file_name) as scanner:
+            self.assertEqual(scanner.fieldnames, HEADER.split(','))
+            chunks = list(scanner.line_chunks(100))
+
+        self.assertEqual([line.decode() for line in chain.from_iterable(chunks)], rows)
+        # About 100 lines, apart from the rest of the file at the end
+        self.assertTrue(all(50 <= len(chunk) <= 150 for chunk in chunks[:-1]))
+
+    def test_empty_file(self):
+        self.write('')
+        self.assertFalse(self.can_scan())
+        self.assertEqual(self.scanned(None), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
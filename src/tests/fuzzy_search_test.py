@@ -0,0 +1,94 @@
+import os
+import unittest
+from index import RestaurantCriteria
+from search_restaurants_program import FilterRestaurantsCSVProgram
+from catalog.columnar_catalog import ColumnarRestaurantCatalog, numpy
+from catalog.fuzzy_index import FuzzyIndex
+from catalog.restaurant_catalog import RestaurantCatalog
+from catalog.sqlite_catalog import SQLiteRestaurantCatalog
+from specifications.restaurant import edit_distance, name_edit_distance, searchable_words
+
+
+class TestFuzzySearch(unittest.TestCase):
+    '''
+    Tests searching names with typos: the FuzzyIndex must find the same words
+    as checking the edit distance to every word, and every catalog must
+    answer the same as the program.
+    '''
+
+    def setUp(self):
+        self.program = FilterRestaurantsCSVProgram(
+            'cuisines.csv', 'restaurants.csv')
+        self.names = [r.name for r in dict.fromkeys(
+            self.program.read_restaurants())]
+
+    def criteria(self, **fields):
+        criteria = dict(restaurant_name=None, max_distance=None, max_price=None,
+                        min_customer_rating=None, cuisine=None)
+        criteria.update(fields)
+        return RestaurantCriteria(**criteria)
+
+    def test_edit_distance(self):
+        self.assertEqual(edit_distance('kitten', 'sitting'), 3)
+        self.assertEqual(edit_distance('', 'grill'), 5)
+        self.assertEqual(edit_distance('grill', 'grill'), 0)
+        self.assertEqual(edit_distance('gril', 'grill'), 1)
+
+        # Prefixes of a word match without any typos, like strings_partially_match
+        self.assertEqual(name_edit_distance('Grill House', 'hou'), 0)
+        self.assertEqual(name_edit_distance('Grill House', 'GRLL'), 1)
+        self.assertEqual(name_edit_distance('Grill House', 'hoouse'), 1)
+
+    def test_index_matches_every_word(self):
+        index = FuzzyIndex()
+        index.add_all(self.names)
+        for word in ['delicous', 'chwo', 'grill', 'zzzzzzzzzz', 'Palce']:
+            for max_edits in [1, 2, 3]:
+                expected = {}
+                for row, name in enumerate(self.names):
+                    edits = min(edit_distance(name_word, word.lower())
+                                for name_word in searchable_words(name))
+                    if edits <= max_edits:
+                        expected[row] = edits
+                self.assertEqual(index.rows_within(word, max_edits), expected)
+
+    def test_ranks_fewest_typos_first(self):
+        criteria = self.criteria(restaurant_name='chwo', max_name_edits=2)
+        results = self.program.get_best_matched_restaurants(criteria, 50)
+        edits = [name_edit_distance(r.name, 'chwo') for r in results]
+        self.assertTrue(results)
+        self.assertEqual(edits, sorted(edits))
+        self.assertEqual(self.program.get_best_matched_restaurants(
+            self.criteria(restaurant_name='chwo')), [])
+
+    def test_catalogs_match_program(self):
+        catalogs = [RestaurantCatalog('cuisines.csv', 'restaurants.csv'),
+                    RestaurantCatalog('cuisines.csv', 'restaurants.csv', compact=True),
+                    SQLiteRestaurantCatalog('cuisines.csv', 'restaurants.csv')]
+        if numpy is not None:
+            catalogs.append(ColumnarRestaurantCatalog(
+                'cuisines.csv', 'restaurants.csv'))
+
+        criterias = [
+            self.criteria(restaurant_name='delicous', max_name_edits=1),
+            self.criteria(restaurant_name='chwo', max_name_edits=2,
+                          max_distance=5, cuisine='a'),
+            self.criteria(restaurant_name='gril', max_name_edits=1,
+                          min_customer_rating=3),
+            self.criteria(max_name_edits=2, max_price=15),
+        ]
+        try:
+            for catalog in catalogs:
+                for criteria in criterias:
+                    for limit in [1, 5, 100]:
+                        with self.subTest(catalog=type(catalog).__name__, criteria=criteria, limit=limit):
+                            self.assertEqual(catalog.get_best_matched_restaurants(criteria, limit),
+                                             self.program.get_best_matched_restaurants(criteria, limit))
+            self.assertEqual(catalogs[0].plan(criterias[0]).access_path, 'name')
+        finally:
+            catalogs[2].connection.close()
+            os.remove(catalogs[2].path)
+
+
+if __name__ == '__main__':
+    unittest.main()
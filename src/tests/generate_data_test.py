@@ -0,0 +1,47 @@
+import os
+import unittest
+from benchmarks.generate_data import CUISINES, generate
+from search_restaurants_program import FilterRestaurantsCSVProgram
+
+
+class TestGenerateData(unittest.TestCase):
+    '''
+    Tests that generated benchmark data can be searched like the sample csvs.
+    '''
+
+    def setUp(self):
+        self.restaurant_file_name = 'generate_test_restaurants.csv'
+        self.cuisine_file_name = 'generate_test_cuisines.csv'
+
+    def tearDown(self):
+        for file_name in [self.restaurant_file_name, self.cuisine_file_name]:
+            os.remove('csv/'+file_name)
+
+    def read_generated(self, rows, seed):
+        generate(rows, 'csv/'+self.restaurant_file_name,
+                 'csv/'+self.cuisine_file_name, seed)
+        return list(FilterRestaurantsCSVProgram(
+            self.cuisine_file_name, self.restaurant_file_name).read_restaurants())
+
+    def test_generates_valid_rows(self):
+        restaurants = self.read_generated(12345, 1)
+
+        self.assertEqual(len(restaurants), 12345)
+        for restaurant in restaurants:
+            self.assertIn(restaurant.customer_rating, range(1, 6))
+            self.assertTrue(0 < restaurant.distance <= 10)
+            self.assertTrue(10 <= restaurant.average_price <= 50)
+            self.assertIn(restaurant.cuisine, CUISINES)
+
+    def test_skewed_and_deterministic(self):
+        restaurants = self.read_generated(5000, 2)
+        cuisines = [restaurant.cuisine for restaurant in restaurants]
+
+        # Zipf like, the first cuisine is far more common than the last
+        self.assertGreater(cuisines.count(CUISINES[0]),
+                           3 * cuisines.count(CUISINES[-1]))
+        self.assertEqual(self.read_generated(5000, 2), restaurants)
+
+
+if __name__ == '__main__':
+    unittest.main()
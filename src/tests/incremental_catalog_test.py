@@ -0,0 +1,94 @@
+import os
+import shutil
+import unittest
+from unittest import mock
+from index import RestaurantCriteria
+from catalog.restaurant_catalog import RestaurantCatalog
+
+
+class TestIncrementalCatalog(unittest.TestCase):
+    '''
+    Tests that a catalog only ingests the rows appended to the restaurant csv,
+    and reloads everything when the csv is truncated or rewritten.
+    '''
+
+    def setUp(self):
+        self.restaurant_file_name = 'incremental_test_restaurants.csv'
+        shutil.copy('csv/restaurants.csv', 'csv/'+self.restaurant_file_name)
+        self.catalog = RestaurantCatalog(
+            'cuisines.csv', self.restaurant_file_name)
+        self.criterias = [
+            RestaurantCriteria(restaurant_name=None, max_distance=None,
+                               max_price=None, min_customer_rating=None, cuisine=None),
+            RestaurantCriteria(restaurant_name='new', max_distance=None,
+                               max_price=None, min_customer_rating=None, cuisine=None),
+            RestaurantCriteria(restaurant_name=None, max_distance=0.5,
+                               max_price=12, min_customer_rating=None, cuisine='th'),
+        ]
+
+    def tearDown(self):
+        os.remove('csv/'+self.restaurant_file_name)
+
+    def append(self, text):
+        with open('csv/'+self.restaurant_file_name, 'a') as csvfile:
+            csvfile.write(text)
+
+    def assert_matches_fresh_catalog(self):
+        fresh = RestaurantCatalog('cuisines.csv', self.restaurant_file_name)
+        self.assertEqual(self.catalog.restaurants, fresh.restaurants)
+        for criteria in self.criterias:
+            self.assertEqual(self.catalog.plan(criteria), fresh.plan(criteria))
+            self.assertEqual(self.catalog.get_best_matched_restaurants(criteria, 10),
+                             fresh.get_best_matched_restaurants(criteria, 10))
+
+    def test_unchanged(self):
+        self.assertFalse(self.catalog.refresh())
+
+    def test_only_parses_appended_rows(self):
+        self.append('\nNew Place,5,0.5,12,3\nNewer Place,4,0.2,9,3\n')
+        with mock.patch.object(self.catalog, 'reload') as reload:
+            self.assertTrue(self.catalog.refresh())
+            reload.assert_not_called()
+        self.assert_matches_fresh_catalog()
+
+        # Duplicates of known restaurants are dropped, like when loading
+        self.append('New Place,5,0.5,12,3\nNewest Place,1,0.1,5,3')
+        self.assertTrue(self.catalog.refresh())
+        self.assert_matches_fresh_catalog()
+
+    def test_extended_last_row_reloads(self):
+        # No line break after the last row, its cuisine_id 1 becomes 12
+        with open('csv/'+self.restaurant_file_name) as csvfile:
+            content = csvfile.read()
+        with open('csv/'+self.restaurant_file_name, 'w') as csvfile:
+            csvfile.write(content.rstrip('\n')[:-1] + '1')
+        self.catalog = RestaurantCatalog(
+            'cuisines.csv', self.restaurant_file_name)
+        self.append('2')
+
+        with mock.patch.object(self.catalog, 'reload', wraps=self.catalog.reload) as reload:
+            self.catalog.refresh()
+            reload.assert_called_once()
+        self.assert_matches_fresh_catalog()
+
+    def test_truncated_reloads(self):
+        with open('csv/'+self.restaurant_file_name, 'rb') as csvfile:
+            half = csvfile.read(2000)
+        with open('csv/'+self.restaurant_file_name, 'r+b') as csvfile:
+            csvfile.truncate(half.rindex(b'\n'))
+        self.catalog.refresh()
+        self.assert_matches_fresh_catalog()
+
+    def test_rewritten_reloads(self):
+        with open('csv/'+self.restaurant_file_name) as csvfile:
+            content = csvfile.read()
+        with open('csv/'+self.restaurant_file_name, 'w') as csvfile:
+            csvfile.write(content.replace('Delicious', 'Tasty').replace(',4,', ',2,'))
+        self.append('\nNew Place,5,0.5,12,3')
+
+        self.assertTrue(self.catalog.refresh())
+        self.assert_matches_fresh_catalog()
+
+
+if __name__ == '__main__':
+    unittest.main()
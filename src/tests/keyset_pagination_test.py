@@ -0,0 +1,117 @@
+import os
+import shutil
+import unittest
+from index import RestaurantCriteria
+from search_restaurants_program import FilterRestaurantsCSVProgram
+from catalog.restaurant_catalog import RestaurantCatalog
+from catalog.sqlite_catalog import SQLiteRestaurantCatalog
+from catalog.query_cache import CachedRestaurantSearch
+from ranking.keyset import encode_cursor
+from search_server import RestaurantSearchServer
+
+
+class TestKeysetPagination(unittest.TestCase):
+    '''
+    Tests paging through the best matched restaurants with cursors: the
+    pages of every program and catalog must add up to the full ranking.
+    '''
+
+    def setUp(self):
+        self.restaurant_file_name = 'pagination_test_restaurants.csv'
+        shutil.copy('csv/restaurants.csv', 'csv/'+self.restaurant_file_name)
+        with open('csv/'+self.restaurant_file_name, 'a') as csvfile:
+            # Ties with the first restaurants, and copies of them
+            csvfile.write('\nTied Place,4,1,10,1\nTied Place,4,1,10,2\n'
+                          'Tied Place,4,1,10,1\nTied Place,4,1,10,2\n')
+        self.program = FilterRestaurantsCSVProgram(
+            'cuisines.csv', self.restaurant_file_name)
+
+    def tearDown(self):
+        os.remove('csv/'+self.restaurant_file_name)
+
+    def criteria(self, **fields):
+        criteria = dict(restaurant_name=None, max_distance=None, max_price=None,
+                        min_customer_rating=None, cuisine=None)
+        criteria.update(fields)
+        return RestaurantCriteria(**criteria)
+
+    def all_pages(self, program, criteria, limit):
+        restaurants, cursor = [], None
+        while True:
+            page = program.get_best_matched_restaurants_page(
+                criteria, limit, cursor)
+            self.assertLessEqual(len(page.restaurants), limit)
+            restaurants += page.restaurants
+            if page.cursor is None:
+                return restaurants
+            cursor = page.cursor
+
+    def test_pages_add_up_to_ranking(self):
+        sqlite_catalog = SQLiteRestaurantCatalog(
+            'cuisines.csv', self.restaurant_file_name)
+        programs = [self.program,
+                    RestaurantCatalog('cuisines.csv', self.restaurant_file_name),
+                    RestaurantCatalog('cuisines.csv', self.restaurant_file_name, compact=True),
+                    sqlite_catalog]
+        criterias = [
+            self.criteria(),
+            self.criteria(restaurant_name='tied'),
+            # Selective enough for the catalog to rank the indexed candidates
+            self.criteria(restaurant_name='grill', max_price=40),
+            self.criteria(max_distance=3, min_customer_rating=4),
+            self.criteria(restaurant_name='delicous', max_name_edits=1),
+            self.criteria(origin=(42.36, -71.06)),
+        ]
+        try:
+            for program in programs:
+                for criteria in criterias:
+                    expected = self.program.get_best_matched_restaurants(
+                        criteria, 1000)
+                    for limit in [1, 2, 7]:
+                        with self.subTest(program=type(program).__name__, criteria=criteria, limit=limit):
+                            self.assertEqual(self.all_pages(
+                                program, criteria, limit), expected)
+        finally:
+            sqlite_catalog.connection.close()
+            os.remove(sqlite_catalog.path)
+
+    def test_first_page_is_best_matched(self):
+        criteria = self.criteria(max_price=20)
+        page = self.program.get_best_matched_restaurants_page(criteria, 3)
+        self.assertEqual(page.restaurants,
+                         self.program.get_best_matched_restaurants(criteria, 3))
+        self.assertIsNotNone(page.cursor)
+
+        # The last page has no cursor
+        page = self.program.get_best_matched_restaurants_page(
+            self.criteria(restaurant_name='tied'), 5)
+        self.assertEqual(len(page.restaurants), 2)
+        self.assertIsNone(page.cursor)
+
+    def test_invalid_cursors(self):
+        catalog = RestaurantCatalog('cuisines.csv', self.restaurant_file_name)
+        for cursor in ['not a cursor', encode_cursor((1, 2)), encode_cursor((1, -4, 'a', 3))]:
+            for program in [self.program, catalog]:
+                with self.assertRaises(ValueError):
+                    program.get_best_matched_restaurants_page(
+                        self.criteria(), 5, cursor)
+
+    def test_server_pages(self):
+        server = RestaurantSearchServer(CachedRestaurantSearch(
+            RestaurantCatalog('cuisines.csv', self.restaurant_file_name)))
+        status, first = server.handle_search(
+            {'name': 'delic', 'limit': 2, 'cursor': None})
+        self.assertEqual(status, 200)
+        status, second = server.handle_search(
+            {'name': 'delic', 'limit': 2, 'cursor': first['cursor']})
+        self.assertEqual(status, 200)
+        self.assertEqual(first['restaurants'] + second['restaurants'], server.handle_search(
+            {'name': 'delic', 'limit': 4})[1]['restaurants'])
+
+        status, response = server.handle_search({'cursor': 'bad'})
+        self.assertEqual(status, 400)
+        self.assertNotIn('cursor', server.handle_search({})[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
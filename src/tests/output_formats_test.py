@@ -0,0 +1,83 @@
+import csv
+import io
+import json
+import unittest
+from dataclasses import asdict
+from output_formats import WRITE_CHUNK_SIZE, write_restaurants
+from models.restaurant import Restaurant
+from search_restaurants_program import FilterRestaurantsCSVProgram
+
+
+class TestOutputFormats(unittest.TestCase):
+    '''
+    Tests writing restaurants as a table, csv and JSON Lines.
+    '''
+
+    def setUp(self):
+        self.restaurants = list(FilterRestaurantsCSVProgram(
+            'cuisines.csv', 'restaurants.csv').read_restaurants())
+        self.restaurants.append(Restaurant(name='Café "Quoted", Inc', customer_rating=5, distance=0.25,
+                                           average_price=12.5, cuisine='Thai', latitude=42.36, longitude=-71.06))
+
+    def write(self, restaurants, output_format):
+        stream = io.StringIO()
+        write_restaurants(restaurants, output_format, stream)
+        return stream.getvalue()
+
+    def test_table_fits_widest_cells(self):
+        lines = self.write(self.restaurants, 'table').split('\n')
+        self.assertEqual(lines[0], '')
+        self.assertEqual(lines[-3:], ['', '', ''])
+        header, rows = lines[1], lines[2:-3]
+        self.assertEqual(len(rows), len(self.restaurants))
+
+        # Every column starts where its header does, after the widest name
+        rating_column = header.index('Rating (stars)')
+        cuisine_column = header.index('Cuisine')
+        self.assertEqual(rating_column, max(len(r.name) for r in self.restaurants) + 3)
+        for row, restaurant in zip(rows, self.restaurants):
+            self.assertEqual(row[:rating_column].rstrip(), restaurant.name)
+            self.assertEqual(row[cuisine_column:], restaurant.cuisine)
+
+        # An empty table is as wide as its headers
+        self.assertEqual(self.write([], 'table'),
+                         '\nName   Rating (stars)   Distance (mi)   Avg. Price ($)   Cuisine\n\n\n')
+
+    def test_csv(self):
+        rows = list(csv.DictReader(io.StringIO(self.write(self.restaurants, 'csv'))))
+        self.assertEqual(len(rows), len(self.restaurants))
+        self.assertEqual(rows[-1], {'name': 'Café "Quoted", Inc', 'customer_rating': '5', 'distance': '0.25',
+                                    'average_price': '12.5', 'cuisine': 'Thai',
+                                    'latitude': '42.36', 'longitude': '-71.06'})
+        self.assertEqual(rows[0]['latitude'], '')
+
+    def test_jsonl_matches_json_dumps(self):
+        self.assertEqual(self.write(self.restaurants, 'jsonl'),
+                         ''.join(json.dumps(asdict(r)) + '\n' for r in self.restaurants))
+
+    def test_streams_in_chunks(self):
+        restaurant = self.restaurants[0]
+        stream = io.StringIO()
+        lines_written = []
+
+        def restaurants():
+            for i in range(WRITE_CHUNK_SIZE * 2 + 1):
+                lines_written.append(stream.getvalue().count('\n'))
+                yield restaurant
+
+        for output_format, header_lines in [('csv', 1), ('jsonl', 0)]:
+            stream.seek(0)
+            stream.truncate()
+            lines_written.clear()
+            write_restaurants(restaurants(), output_format, stream)
+            # Each chunk is written before the next restaurants are produced
+            self.assertEqual(lines_written[WRITE_CHUNK_SIZE], WRITE_CHUNK_SIZE + header_lines)
+            self.assertEqual(stream.getvalue().count('\n'), WRITE_CHUNK_SIZE * 2 + 1 + header_lines)
+
+    def test_invalid_format(self):
+        with self.assertRaises(ValueError):
+            self.write(self.restaurants, 'xml')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import random
+import unittest
+from itertools import product
+from index import RestaurantCriteria
+from search_restaurants_program import FilterRestaurantsCSVProgram
+from parallel_search_restaurants_program import ParallelFilterRestaurantsCSVProgram
+
+
+class TestParallelSearch(unittest.TestCase):
+    '''
+    Tests that searching line aligned ranges of the restaurant csv on several
+    processes returns exactly what the serial program does.
+    '''
+
+    @classmethod
+    def setUpClass(cls):
+        cls.restaurant_file_name = 'parallel_test_restaurants.csv'
+        generator = random.Random(3)
+        with open('csv/'+cls.restaurant_file_name, 'w') as csvfile:
+            csvfile.write('name,customer_rating,distance,price,cuisine_id\n')
+            for row in range(3000):
+                # Few distinct values so that there are ties and duplicates
+                csvfile.write(f'Grill {generator.randint(1, 300)},{generator.randint(1, 5)},'
+                              f'{generator.choice([1, 1.5, 2, 8])},{generator.choice([10, 25])},'
+                              f'{generator.randint(1, 19)}\n')
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove('csv/'+cls.restaurant_file_name)
+
+    def test_ranges_cover_every_row(self):
+        program = ParallelFilterRestaurantsCSVProgram(
+            'cuisines.csv', self.restaurant_file_name, workers=7)
+        fieldnames, byte_ranges = program._split_restaurant_file(7)
+
+        self.assertEqual(
+            fieldnames, ['name', 'customer_rating', 'distance', 'price', 'cuisine_id'])
+        self.assertEqual(len(byte_ranges), 7)
+        with open('csv/'+self.restaurant_file_name, 'rb') as csvfile:
+            header = csvfile.readline()
+            data = csvfile.read()
+        self.assertEqual(byte_ranges[0][0], len(header))
+        self.assertEqual(b''.join(data[start - len(header):end - len(header)]
+                                  for start, end in byte_ranges), data)
+        for start, _ in byte_ranges[1:]:
+            self.assertEqual(data[start - len(header) - 1:start - len(header)], b'\n')
+
+    def test_matches_serial_program(self):
+        serial = FilterRestaurantsCSVProgram(
+            'cuisines.csv', self.restaurant_file_name)
+        parallel = ParallelFilterRestaurantsCSVProgram(
+            'cuisines.csv', self.restaurant_file_name, workers=3)
+
+        for name, distance, rating, limit in product([None, 'grill 1'], [None, 1.5], [None, 4], [5, 40]):
+            criteria = RestaurantCriteria(restaurant_name=name, max_distance=distance,
+                                          max_price=None, min_customer_rating=rating, cuisine=None)
+            self.assertEqual(parallel.get_best_matched_restaurants(criteria, limit),
+                             serial.get_best_matched_restaurants(criteria, limit))
+
+    def test_quoted_line_breaks(self):
+        file_name = 'parallel_test_quoted_restaurants.csv'
+        with open('csv/'+file_name, 'w') as csvfile:
+            csvfile.write('name,customer_rating,distance,price,cuisine_id\n')
+            for row in range(500):
+                # Every boundary falls within a quoted name or right before one
+                csvfile.write(f'"Grill\n{row}",{row % 5 + 1},{row % 3 + 1},10,{row % 19 + 1}\n')
+        self.addCleanup(os.remove, 'csv/'+file_name)
+
+        parallel = ParallelFilterRestaurantsCSVProgram('cuisines.csv', file_name, workers=7)
+        self.assertEqual(len(parallel._split_restaurant_file(7)[1]), 1)
+        criteria = RestaurantCriteria(restaurant_name='grill', max_distance=None,
+                                      max_price=None, min_customer_rating=4, cuisine=None)
+        self.assertEqual(parallel.get_best_matched_restaurants(criteria, 10),
+                         FilterRestaurantsCSVProgram('cuisines.csv', file_name)
+                         .get_best_matched_restaurants(criteria, 10))
+
+    def test_small_file(self):
+        criteria = RestaurantCriteria(restaurant_name=None, max_distance=None,
+                                      max_price=None, min_customer_rating=None, cuisine=None)
+        self.assertEqual(ParallelFilterRestaurantsCSVProgram('cuisines.csv', 'boston_restaurants.csv', workers=8)
+                         .get_best_matched_restaurants(criteria),
+                         FilterRestaurantsCSVProgram('cuisines.csv', 'boston_restaurants.csv')
+                         .get_best_matched_restaurants(criteria))
+
+
+if __name__ == '__main__':
+    unittest.main()
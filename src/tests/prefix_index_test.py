@@ -0,0 +1,46 @@
+import unittest
+from catalog.prefix_index import PrefixIndex
+from specifications.restaurant import strings_partially_match
+
+
+class TestPrefixIndex(unittest.TestCase):
+    '''
+    Tests that the PrefixIndex finds the same rows as strings_partially_match.
+    '''
+
+    def setUp(self):
+        self.names = ['Grill House', 'Steak Grill', 'Lord Delicious',
+                      'Spicy PalaceClick to check domain availability.',
+                      'Hilltop  Delicious', 'Palaceio']
+        self.index = PrefixIndex()
+        self.index.add_all(self.names)
+
+    def test_empty_prefix_matches_everything(self):
+        self.assertIsNone(self.index.rows_with_prefix(None))
+        self.assertIsNone(self.index.rows_with_prefix(''))
+
+    def test_word_prefixes(self):
+        self.assertEqual(self.index.rows_with_prefix('Gri'), {0, 1})
+        self.assertEqual(self.index.rows_with_prefix('gRILL'), {0, 1})
+        self.assertEqual(self.index.rows_with_prefix('delic'), {2, 4})
+        self.assertEqual(self.index.rows_with_prefix('palace'), {3, 5})
+
+        # Only prefixes of words match
+        self.assertEqual(self.index.rows_with_prefix('eak'), set())
+        self.assertEqual(self.index.rows_with_prefix('steak grill'), set())
+
+    def test_estimate_rows(self):
+        self.assertEqual(self.index.estimate_rows('gri'), 2)
+        self.assertEqual(self.index.estimate_rows('zzz'), 0)
+        self.assertGreaterEqual(self.index.estimate_rows('p'), len(
+            self.index.rows_with_prefix('p')))
+
+    def test_matches_strings_partially_match(self):
+        for prefix in ['g', 'grill h', 'lord', 'availability.', 'to', 'x', ' ', 'hilltop ']:
+            expected = {row for row, name in enumerate(self.names)
+                        if strings_partially_match(name, prefix)}
+            self.assertEqual(self.index.rows_with_prefix(prefix), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
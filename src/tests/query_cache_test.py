@@ -0,0 +1,111 @@
+import os
+import shutil
+import unittest
+from unittest import mock
+from index import RestaurantCriteria
+from search_restaurants_program import FilterRestaurantsCSVProgram
+from catalog.query_cache import CachedRestaurantSearch, normalize_criteria
+from catalog.restaurant_catalog import RestaurantCatalog
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCachedRestaurantSearch(unittest.TestCase):
+    '''
+    Tests caching, evicting and invalidating best matched restaurants.
+    '''
+
+    def setUp(self):
+        self.restaurant_file_name = 'query_cache_test_restaurants.csv'
+        shutil.copy('csv/boston_restaurants.csv',
+                    'csv/'+self.restaurant_file_name)
+        self.program = FilterRestaurantsCSVProgram(
+            'cuisines.csv', self.restaurant_file_name)
+        self.clock = FakeClock()
+        self.cache = CachedRestaurantSearch(
+            self.program, max_size=2, ttl=60, clock=self.clock)
+
+    def tearDown(self):
+        os.remove('csv/'+self.restaurant_file_name)
+
+    def make_criteria(self, name=None, distance=None, price=None, rating=None, cuisine=None):
+        return RestaurantCriteria(restaurant_name=name, max_distance=distance,
+                                  max_price=price, min_customer_rating=rating, cuisine=cuisine)
+
+    def test_normalize_criteria(self):
+        self.assertEqual(normalize_criteria(self.make_criteria(name='GRILL', distance=5, cuisine='')),
+                         normalize_criteria(self.make_criteria(name='grill', distance=5.0)))
+        self.assertNotEqual(normalize_criteria(self.make_criteria(name='grill')),
+                            normalize_criteria(self.make_criteria(cuisine='grill')))
+
+    def test_hits_and_misses(self):
+        with mock.patch.object(self.program, 'get_best_matched_restaurants',
+                               wraps=self.program.get_best_matched_restaurants) as search:
+            first = self.cache.get_best_matched_restaurants(
+                self.make_criteria(name='Grill'))
+            second = self.cache.get_best_matched_restaurants(
+                self.make_criteria(name='grill', cuisine=''))
+            self.cache.get_best_matched_restaurants(
+                self.make_criteria(name='grill'), limit=1)
+
+            self.assertEqual(first, second)
+            self.assertEqual(search.call_count, 2)
+            self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+    def test_lru_eviction(self):
+        self.cache.get_best_matched_restaurants(self.make_criteria(distance=1))
+        self.cache.get_best_matched_restaurants(self.make_criteria(distance=2))
+        self.cache.get_best_matched_restaurants(self.make_criteria(distance=1))
+        self.cache.get_best_matched_restaurants(self.make_criteria(distance=3))
+
+        self.assertEqual(len(self.cache), 2)
+        self.cache.get_best_matched_restaurants(self.make_criteria(distance=1))
+        self.assertEqual(self.cache.hits, 2)
+        self.cache.get_best_matched_restaurants(self.make_criteria(distance=2))
+        self.assertEqual(self.cache.misses, 4)
+
+    def test_ttl(self):
+        self.cache.get_best_matched_restaurants(self.make_criteria())
+        self.clock.now = 59
+        self.cache.get_best_matched_restaurants(self.make_criteria())
+        self.clock.now = 61
+        self.cache.get_best_matched_restaurants(self.make_criteria())
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+    def test_invalidated_when_csv_changes(self):
+        catalog = RestaurantCatalog('cuisines.csv', self.restaurant_file_name)
+        cache = CachedRestaurantSearch(catalog)
+        self.assertEqual(len(cache.get_best_matched_restaurants(
+            self.make_criteria(name='new'))), 0)
+
+        with open('csv/'+self.restaurant_file_name, 'a') as csvfile:
+            csvfile.write('\nNew Place,5,0.5,12,3')
+
+        self.assertEqual([r.name for r in cache.get_best_matched_restaurants(
+            self.make_criteria(name='new'))], ['New Place'])
+        self.assertEqual(cache.misses, 2)
+
+    def test_failed_refresh_is_retried(self):
+        catalog = RestaurantCatalog('cuisines.csv', self.restaurant_file_name)
+        cache = CachedRestaurantSearch(catalog)
+        cache.get_best_matched_restaurants(self.make_criteria(name='new'))
+
+        with open('csv/'+self.restaurant_file_name, 'a') as csvfile:
+            csvfile.write('\nNew Place,5,0.5,12,3')
+        with mock.patch.object(catalog, 'refresh', side_effect=ValueError('malformed')):
+            with self.assertRaises(ValueError):
+                cache.get_best_matched_restaurants(self.make_criteria(name='new'))
+
+        # Not served from the catalog which failed to refresh
+        self.assertEqual([r.name for r in cache.get_best_matched_restaurants(
+            self.make_criteria(name='new'))], ['New Place'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+from index import RestaurantCriteria
+from search_restaurants_program import FilterRestaurantsCSVProgram
+from catalog.range_index import RangeIndex
+from catalog.restaurant_catalog import RestaurantCatalog
+
+
+class TestRangeIndex(unittest.TestCase):
+    '''
+    Tests bisecting the sorted values of a RangeIndex.
+    '''
+
+    def setUp(self):
+        self.index = RangeIndex([7, 1, 4.5, 7, 10])
+
+    def test_at_most(self):
+        self.assertEqual(self.index.count_at_most(0.5), 0)
+        self.assertEqual(self.index.rows_at_most(4.5), [1, 2])
+        self.assertEqual(self.index.rows_at_most(7), [1, 2, 0, 3])
+        self.assertEqual(self.index.count_at_most(100), 5)
+
+    def test_at_least(self):
+        self.assertEqual(self.index.rows_at_least(7), [0, 3, 4])
+        self.assertEqual(self.index.count_at_least(11), 0)
+        self.assertEqual(self.index.count_at_least(1), 5)
+
+
+class TestQueryPlanner(unittest.TestCase):
+    '''
+    Tests that the catalog starts from the most selective criteria and still
+    finds the same restaurants as the csv program.
+    '''
+
+    def setUp(self):
+        self.catalog = RestaurantCatalog('cuisines.csv', 'restaurants.csv')
+        self.program = FilterRestaurantsCSVProgram(
+            'cuisines.csv', 'restaurants.csv')
+
+    def make_criteria(self, name=None, distance=None, price=None, rating=None, cuisine=None):
+        return RestaurantCriteria(restaurant_name=name, max_distance=distance,
+                                  max_price=price, min_customer_rating=rating, cuisine=cuisine)
+
+    def test_no_criteria_scans(self):
+        plan = self.catalog.plan(self.make_criteria())
+        self.assertEqual(plan.access_path, 'scan')
+        self.assertEqual(plan.estimated_rows, len(self.catalog))
+
+    def test_picks_most_selective(self):
+        plan = self.catalog.plan(self.make_criteria(distance=1, price=50))
+        self.assertEqual(plan.access_path, 'distance')
+        self.assertLess(plan.estimated_rows, len(self.catalog) / 5)
+
+        plan = self.catalog.plan(self.make_criteria(
+            name='zzz', distance=1, rating=1))
+        self.assertEqual(plan.access_path, 'name')
+        self.assertEqual(plan.estimated_rows, 0)
+
+    def test_matches_csv_program(self):
+        criterias = [
+            self.make_criteria(distance=1),
+            self.make_criteria(distance=3, price=15, rating=4),
+            self.make_criteria(rating=5, cuisine='a'),
+            self.make_criteria(name='delic', price=30),
+            self.make_criteria(name='d', distance=9, price=45,
+                               rating=2, cuisine='chi'),
+        ]
+        for criteria in criterias:
+            self.assertEqual(self.catalog.determine_valid_restaurants(criteria),
+                             self.program.determine_valid_restaurants(criteria))
+
+
+if __name__ == '__main__':
+    unittest.main()
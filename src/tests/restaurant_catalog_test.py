@@ -0,0 +1,44 @@
+import unittest
+from unittest import mock
+from index import RestaurantCriteria
+from search_restaurants_program import FilterRestaurantsCSVProgram
+from catalog.restaurant_catalog import RestaurantCatalog
+
+
+class TestRestaurantCatalog(unittest.TestCase):
+    '''
+    Tests that a loaded RestaurantCatalog answers queries the same way as the
+    csv program without re-reading the csv files.
+    '''
+
+    def setUp(self):
+        self.catalog = RestaurantCatalog('cuisines.csv', 'restaurants.csv')
+        self.program = FilterRestaurantsCSVProgram(
+            'cuisines.csv', 'restaurants.csv')
+        self.criterias = [
+            RestaurantCriteria(restaurant_name=None, max_distance=None,
+                               max_price=None, min_customer_rating=None, cuisine=None),
+            RestaurantCriteria(restaurant_name='delic', max_distance=5,
+                               max_price=None, min_customer_rating=None, cuisine=None),
+            RestaurantCriteria(restaurant_name=None, max_distance=None,
+                               max_price=20, min_customer_rating=3, cuisine='chi'),
+        ]
+
+    def test_loads_every_unique_restaurant(self):
+        self.assertEqual(len(self.catalog), len(
+            set(self.program.read_restaurants())))
+
+    def test_matches_csv_program(self):
+        for criteria in self.criterias:
+            self.assertEqual(self.catalog.determine_valid_restaurants(criteria),
+                             self.program.determine_valid_restaurants(criteria))
+
+    def test_queries_do_not_reopen_files(self):
+        with mock.patch('builtins.open') as mocked_open:
+            for criteria in self.criterias:
+                self.catalog.get_best_matched_restaurants(criteria)
+            mocked_open.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import shutil
+import unittest
+from index import RestaurantCriteria
+from catalog.restaurant_catalog import RestaurantCatalog
+from catalog.restaurant_columns import RestaurantColumns
+from models.restaurant import Restaurant
+from search_restaurants_program import FilterRestaurantsCSVProgram
+
+
+class TestRestaurantColumns(unittest.TestCase):
+    '''
+    Tests that restaurants stored as columns read back equal to the stored
+    Restaurants, and that a compact catalog answers searches the same as a
+    catalog of Restaurant objects.
+    '''
+
+    def setUp(self):
+        program = FilterRestaurantsCSVProgram('cuisines.csv', 'restaurants.csv')
+        self.cuisine_names = list(program._build_cuisines_map().values())
+        self.restaurants = list(dict.fromkeys(program.read_restaurants()))
+        self.restaurants.append(Restaurant(name='Somewhere', customer_rating=4, distance=1.5,
+                                           average_price=20, cuisine='Thai', latitude=42.3, longitude=-71.1))
+        self.columns = RestaurantColumns(self.cuisine_names, self.restaurants)
+
+    def test_round_trip(self):
+        self.assertEqual(len(self.columns), len(self.restaurants))
+        self.assertEqual(list(self.columns), self.restaurants)
+        self.assertEqual([self.columns[row] for row in range(len(self.columns))],
+                         self.restaurants)
+        self.assertEqual(self.columns[-1], self.restaurants[-1])
+        self.assertEqual(list(self.columns.column('cuisine')),
+                         [r.cuisine for r in self.restaurants])
+        self.assertEqual(list(self.columns.column('distance')),
+                         [r.distance for r in self.restaurants])
+
+    def test_drops_duplicates(self):
+        restaurant = self.restaurants[3]
+        self.assertIn(restaurant, self.columns)
+        self.assertFalse(self.columns.add(restaurant))
+        self.assertEqual(len(self.columns), len(self.restaurants))
+
+        new_restaurant = Restaurant(name=restaurant.name, customer_rating=restaurant.customer_rating,
+                                    distance=restaurant.distance + 1, average_price=restaurant.average_price,
+                                    cuisine=restaurant.cuisine)
+        self.assertNotIn(new_restaurant, self.columns)
+        self.assertTrue(self.columns.add(new_restaurant))
+        self.assertEqual(self.columns[-1], new_restaurant)
+
+    def test_shares_names_and_cuisines(self):
+        # Cuisine codes follow the cuisine csv
+        self.assertEqual(self.columns.cuisine_names, self.cuisine_names)
+
+        first = Restaurant(name=''.join(['Shared', ' Name']), customer_rating=1, distance=1,
+                           average_price=10, cuisine='Thai')
+        second = Restaurant(name=''.join(['Shared ', 'Name']), customer_rating=2, distance=1,
+                            average_price=10, cuisine='Thai')
+        self.assertIsNot(first.name, second.name)
+        self.columns.add(first)
+        self.columns.add(second)
+        self.assertIs(self.columns.names[-1], self.columns.names[-2])
+
+    def test_compact_catalog(self):
+        catalog = RestaurantCatalog('cuisines.csv', 'restaurants.csv')
+        compact = RestaurantCatalog(
+            'cuisines.csv', 'restaurants.csv', compact=True)
+        self.assertIsInstance(compact.restaurants, RestaurantColumns)
+        self.assertEqual(list(compact.restaurants), catalog.restaurants)
+
+        criterias = [
+            RestaurantCriteria(restaurant_name=None, max_distance=None,
+                               max_price=None, min_customer_rating=None, cuisine=None),
+            RestaurantCriteria(restaurant_name='grill', max_distance=None,
+                               max_price=None, min_customer_rating=None, cuisine=None),
+            RestaurantCriteria(restaurant_name=None, max_distance=3, max_price=30,
+                               min_customer_rating=3, cuisine='a'),
+        ]
+        for criteria in criterias:
+            self.assertEqual(compact.plan(criteria), catalog.plan(criteria))
+            self.assertEqual(compact.get_best_matched_restaurants(criteria, 10),
+                             catalog.get_best_matched_restaurants(criteria, 10))
+
+    def test_compact_catalog_refresh(self):
+        restaurant_file_name = 'columns_test_restaurants.csv'
+        shutil.copy('csv/restaurants.csv', 'csv/'+restaurant_file_name)
+        try:
+            compact = RestaurantCatalog(
+                'cuisines.csv', restaurant_file_name, compact=True)
+            with open('csv/'+restaurant_file_name, 'a') as csvfile:
+                csvfile.write('\nNew Place,5,0.5,12,3\nNew Place,5,0.5,12,3\n')
+            self.assertTrue(compact.refresh())
+            self.assertEqual(list(compact.restaurants), RestaurantCatalog(
+                'cuisines.csv', restaurant_file_name).restaurants)
+        finally:
+            os.remove('csv/'+restaurant_file_name)
+
+
+if __name__ == '__main__':
+    unittest.main()
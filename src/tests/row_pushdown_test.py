@@ -0,0 +1,83 @@
+import os
+import unittest
+from index import RestaurantCriteria
+from search_restaurants_program import FilterRestaurantsCSVProgram
+from specifications.row_pushdown import allowed_cuisine_ids, compile_row_parser
+
+
+class TestRowPushdown(unittest.TestCase):
+    '''
+    Tests that checking the criteria against the rows of the Restaurant CSV
+    before making Restaurants keeps exactly the matching restaurants, and
+    still rejects malformed rows which don't match.
+    '''
+
+    def setUp(self):
+        self.program = FilterRestaurantsCSVProgram('cuisines.csv', 'restaurants.csv')
+        self.restaurants = list(self.program.read_restaurants())
+        self.cuisines = self.program._build_cuisines_map()
+        self.malformed_file_name = 'row_pushdown_test_restaurants.csv'
+
+    def tearDown(self):
+        if os.path.exists('csv/'+self.malformed_file_name):
+            os.remove('csv/'+self.malformed_file_name)
+
+    def criteria(self, **fields):
+        criteria = dict(restaurant_name=None, max_distance=None, max_price=None,
+                        min_customer_rating=None, cuisine=None)
+        criteria.update(fields)
+        return RestaurantCriteria(**criteria)
+
+    def test_allowed_cuisine_ids(self):
+        self.assertIsNone(allowed_cuisine_ids(self.criteria(), self.cuisines))
+        self.assertEqual({self.cuisines[cuisine_id] for cuisine_id in
+                          allowed_cuisine_ids(self.criteria(cuisine='KOR'), self.cuisines)}, {'Korean'})
+        self.assertEqual(allowed_cuisine_ids(self.criteria(cuisine='zzz'), self.cuisines), set())
+
+    def test_only_matches_are_made(self):
+        criterias = [
+            self.criteria(),
+            self.criteria(restaurant_name='grill'),
+            self.criteria(restaurant_name='grill hut'),
+            self.criteria(restaurant_name='delicius', max_name_edits=1),
+            self.criteria(restaurant_name='h', max_distance=6,
+                          max_price=40, min_customer_rating=2, cuisine='a'),
+            self.criteria(max_price=20, min_customer_rating=4),
+            self.criteria(cuisine='chinese', max_distance=3),
+        ]
+        for criteria in criterias:
+            is_valid_restaurant = self.program._compile_criteria(criteria)
+            self.assertEqual(list(self.program.read_restaurant_chunks_for(criteria))[0],
+                             list(filter(is_valid_restaurant, self.restaurants)))
+            self.assertEqual(list(self.program.iter_valid_restaurants(criteria)),
+                             list(filter(is_valid_restaurant, self.restaurants)))
+
+    def test_origin_distances_are_not_pushed_down(self):
+        rows = [{'name': 'Far Place', 'customer_rating': '4', 'distance': '9', 'price': '10',
+                 'cuisine_id': '1', 'latitude': '42.36', 'longitude': '-71.06'}]
+        parse_rows = compile_row_parser(
+            self.criteria(max_distance=1, origin=(42.36, -71.06)), self.cuisines)
+        self.assertEqual([r.name for r in parse_rows(rows)], ['Far Place'])
+        self.assertEqual(parse_rows(rows)[0].latitude, 42.36)
+
+    def test_malformed_rows_raise_when_left_out(self):
+        rows = [
+            # Left out by every criteria below, but still incorrectly formatted
+            'Bad Rating,five,1,40,1',
+            'Unknown Cuisine,1,1,40,999',
+            'Bad Latitude,1,1,40,1,north,-71.06',
+        ]
+        criteria = self.criteria(max_price=20, min_customer_rating=4, cuisine='chinese')
+        for row in rows:
+            with open('csv/'+self.malformed_file_name, 'w') as csvfile:
+                csvfile.write('name,customer_rating,distance,price,cuisine_id,latitude,longitude\n'
+                              f'Good Place,5,1,10,1,,\n{row}\n')
+            program = FilterRestaurantsCSVProgram('cuisines.csv', self.malformed_file_name)
+            with self.assertRaises(ValueError):
+                program.get_best_matched_restaurants(criteria)
+            with self.assertRaises(ValueError):
+                program.get_best_matched_restaurants(self.criteria())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import asyncio
+import contextlib
+import io
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+import index
+import search_client
+from catalog.query_cache import CachedRestaurantSearch
+from catalog.restaurant_catalog import RestaurantCatalog
+from search_server import RestaurantSearchServer
+
+
+class TestRestaurantSearchServer(unittest.TestCase):
+    '''
+    Tests searching through the asyncio search server with the thin client,
+    which must print exactly what index.py prints.
+    '''
+
+    def setUp(self):
+        self.server = RestaurantSearchServer(CachedRestaurantSearch(
+            RestaurantCatalog('cuisines.csv', 'restaurants.csv')))
+        self.socket_directory = tempfile.TemporaryDirectory()
+        self.unix_socket = os.path.join(
+            self.socket_directory.name, 'search.sock')
+
+    def tearDown(self):
+        self.socket_directory.cleanup()
+
+    def run_cli(self, module, argv):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            restaurants = module.main(module.make_parser().parse_args(argv))
+        return restaurants, output.getvalue()
+
+    def test_handle_search(self):
+        status, response = self.server.handle_search(
+            {'name': 'delic', 'limit': 2})
+        self.assertEqual(status, 200)
+        self.assertEqual(len(response['restaurants']), 2)
+
+        status, response = self.server.handle_search({'distance': -1})
+        self.assertEqual(status, 400)
+        status, response = self.server.handle_search(
+            {'restaurant_file': 'boston_restaurants.csv'})
+        self.assertEqual(status, 400)
+        status, response = self.server.handle_search({'cursor': 'not a cursor'})
+        self.assertEqual(status, 400)
+
+        # A catalog which fails to search, such as after a malformed row is appended, answers with the error
+        malformed = ValueError('Restaurant CSV csv/restaurants.csv is incorrectly formatted')
+        for query in [{'name': 'delic'}, {'name': 'delic', 'cursor': None}]:
+            with mock.patch.object(self.server.search.program, 'refresh', side_effect=malformed), \
+                    mock.patch.object(self.server.search, '_read_files_state', return_value=[]):
+                status, response = self.server.handle_search(query)
+            self.assertEqual(status, 500)
+            self.assertEqual(response, {'error': str(malformed)})
+
+    def serve_while(self, *client_calls):
+        '''Runs the client calls on threads while the server is listening'''
+
+        async def scenario():
+            listener = await self.server.serve(unix_socket=self.unix_socket)
+            async with listener:
+                loop = asyncio.get_running_loop()
+                return await asyncio.gather(*[loop.run_in_executor(None, call)
+                                              for call in client_calls])
+
+        return asyncio.run(scenario())
+
+    def test_client_prints_like_cli(self):
+        argv = ['-n', 'grill', '-k', '3']
+        client_result, = self.serve_while(lambda: self.run_cli(
+            search_client, argv + ['--unix-socket', self.unix_socket]))
+        self.assertEqual(client_result, self.run_cli(
+            index, argv + ['--no-snapshot']))
+
+    def test_concurrent_clients(self):
+        argvs = [['-n', 'grill'], ['-c', 'chi', '-k', '8'], ['-d', '3', '-p', '20'],
+                 ['--customer-rating', '5'], []] * 4
+
+        def search(argv):
+            args = search_client.make_parser().parse_args(
+                argv + ['--unix-socket', self.unix_socket])
+            return search_client.fetch_best_matched_restaurants(args)
+
+        client_results = self.serve_while(
+            *[lambda argv=argv: search(argv) for argv in argvs])
+        with contextlib.redirect_stdout(io.StringIO()):
+            for argv, client_result in zip(argvs, client_results):
+                self.assertEqual(client_result, index.main(
+                    index.make_parser().parse_args(argv + ['--no-snapshot'])))
+
+    def test_client_arguments(self):
+        parser = search_client.make_parser()
+        for argv in [['--shards', '*.csv'], ['--sqlite'], ['-w', '2'], ['--stats'], ['--no-snapshot']]:
+            with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+                parser.parse_args(argv)
+
+        # The served files are not looked for by the client
+        args = parser.parse_args(['-n', 'grill', '-f', 'elsewhere/restaurants.csv'])
+        self.assertEqual((args.name, args.restaurant_file, args.cuisine_file),
+                         ('grill', 'elsewhere/restaurants.csv', None))
+
+        client_result, = self.serve_while(lambda: search_client.fetch_best_matched_restaurants(
+            parser.parse_args(['-n', 'grill', '--unix-socket', self.unix_socket])))
+        self.assertEqual(client_result, self.server.search.get_best_matched_restaurants(
+            index.RestaurantCriteria(restaurant_name='grill', max_distance=None, max_price=None,
+                                     min_customer_rating=None, cuisine=None)))
+
+    def test_searches_run_off_the_event_loop(self):
+        searching = threading.Event()
+        answered = threading.Event()
+        search = self.server.search.get_best_matched_restaurants
+        released = []
+
+        def slow_search(criteria, limit):
+            searching.set()
+            # Only answered while this search runs if the event loop is free
+            released.append(answered.wait(5))
+            return search(criteria, limit)
+
+        def other_request():
+            searching.wait(5)
+            connection = search_client._UnixHTTPConnection(self.unix_socket)
+            try:
+                connection.request('GET', '/elsewhere')
+                status = connection.getresponse().status
+            finally:
+                connection.close()
+            answered.set()
+            return status
+
+        args = search_client.make_parser().parse_args(
+            ['-n', 'grill', '--unix-socket', self.unix_socket])
+        with mock.patch.object(self.server.search, 'get_best_matched_restaurants',
+                               side_effect=slow_search):
+            restaurants, status = self.serve_while(
+                lambda: search_client.fetch_best_matched_restaurants(args), other_request)
+        self.assertEqual(status, 404)
+        self.assertEqual(released, [True])
+        self.assertTrue(restaurants)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from unittest import mock
+from index import RestaurantCriteria, main, make_parser
+from search_restaurants_program import FilterRestaurantsCSVProgram
+from catalog.restaurant_catalog import RestaurantCatalog
+
+
+class TestSearchStats(unittest.TestCase):
+    '''
+    Tests the stats collected about each search.
+    '''
+
+    def setUp(self):
+        self.criteria = RestaurantCriteria(restaurant_name='grill', max_distance=5,
+                                           max_price=None, min_customer_rating=None, cuisine=None)
+        self.restaurants = list(FilterRestaurantsCSVProgram(
+            'cuisines.csv', 'restaurants.csv').read_restaurants())
+
+    def collect(self, program):
+        collected = []
+        program.add_stats_collector(collected.append)
+        results = program.get_best_matched_restaurants(self.criteria, 3)
+        self.assertEqual(len(collected), 1)
+        return results, collected[0]
+
+    def test_program_stats(self):
+        program = FilterRestaurantsCSVProgram('cuisines.csv', 'restaurants.csv')
+        expected = program.get_best_matched_restaurants(self.criteria, 3)
+        results, stats = self.collect(program)
+
+        self.assertEqual(results, expected)
+        self.assertEqual(stats.rows_read, len(self.restaurants))
+        self.assertEqual(stats.rejected_by['distance'], len(
+            [r for r in self.restaurants if r.distance > 5]))
+        self.assertEqual(stats.rejected_by['price'], 0)
+        self.assertEqual(stats.matches, len(
+            program.determine_valid_restaurants(self.criteria)))
+        self.assertEqual(stats.results, 3)
+        self.assertEqual(list(stats.stage_seconds), [
+                         'read cuisines', 'read csv', 'parse and join', 'evaluate criteria', 'rank'])
+        self.assertIn('Rejected by', stats.format())
+        # The path measured isn't the one searches take, which the stats say
+        self.assertTrue(stats.unoptimized)
+        self.assertIn('unoptimized path', stats.format())
+
+    def test_catalog_stats(self):
+        catalog = RestaurantCatalog('cuisines.csv', 'restaurants.csv')
+        expected = catalog.get_best_matched_restaurants(self.criteria, 3)
+        results, stats = self.collect(catalog)
+
+        self.assertEqual(results, expected)
+        self.assertEqual(stats.access_path, 'name')
+        self.assertLess(stats.rows_read, len(self.restaurants))
+        self.assertEqual(stats.rejected_by['name'], 0)
+        self.assertNotIn('unoptimized path', stats.format())
+
+    def test_not_measured_without_collectors(self):
+        program = FilterRestaurantsCSVProgram('cuisines.csv', 'restaurants.csv')
+        with mock.patch.object(program, '_get_best_matched_restaurants_with_stats') as measured:
+            program.get_best_matched_restaurants(self.criteria)
+            measured.assert_not_called()
+
+    def test_pages_are_not_measured(self):
+        # Paging doesn't report stats, so asking for both is an error rather than silent
+        with self.assertRaises(SystemExit):
+            main(make_parser().parse_args(['--stats', '--cursor']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+import os
+import random
+import shutil
+import unittest
+from unittest import mock
+from index import RestaurantCriteria
+from search_restaurants_program import FilterRestaurantsCSVProgram
+from sharded_search_restaurants_program import ShardedFilterRestaurantsCSVProgram, find_shards
+from catalog.shard_summary import ShardSummary, summary_path
+
+
+class TestShardedSearch(unittest.TestCase):
+    '''
+    Tests that searching a directory of restaurant csv shards returns exactly
+    what searching them joined into one csv does, without reading the shards
+    their summaries prove can't match.
+    '''
+
+    shard_directory = 'sharded_test'
+    joined_file_name = 'sharded_test_restaurants.csv'
+
+    def setUp(self):
+        os.makedirs('csv/'+self.shard_directory, exist_ok=True)
+        generator = random.Random(5)
+        self.shards = {
+            # Few distinct values so that there are ties and duplicates across shards
+            'a_cheap.csv': [f'Grill {generator.randint(1, 40)},{generator.randint(1, 4)},'
+                            f'{generator.choice([1, 1.5, 2, 8])},{generator.choice([10, 15])},'
+                            f'{generator.randint(1, 9)}' for _ in range(300)],
+            'b_pricey.csv': [f'Grill {generator.randint(1, 40)},{generator.randint(3, 5)},'
+                             f'{generator.choice([1.5, 2, 8])},{generator.choice([30, 45])},'
+                             f'{generator.randint(10, 19)}' for _ in range(300)],
+            'c_far.csv': [f'Grill {generator.randint(1, 40)},{generator.randint(1, 5)},'
+                          f'{generator.choice([7, 9])},{generator.choice([10, 45])},'
+                          f'{generator.randint(1, 19)}' for _ in range(300)],
+            'd_empty.csv': [],
+        }
+        header = 'name,customer_rating,distance,price,cuisine_id\n'
+        for shard, rows in self.shards.items():
+            with open(f'csv/{self.shard_directory}/{shard}', 'w') as csvfile:
+                csvfile.write(header + ''.join(row + '\n' for row in rows))
+        with open('csv/'+self.joined_file_name, 'w') as csvfile:
+            csvfile.write(header + ''.join(row + '\n' for rows in self.shards.values() for row in rows))
+        # Not a restaurant csv, so never a shard
+        with open(f'csv/{self.shard_directory}/e_cuisines.csv', 'w') as csvfile:
+            csvfile.write('id,name\n1,Thai\n')
+
+        self.joined = FilterRestaurantsCSVProgram('cuisines.csv', self.joined_file_name)
+
+    def tearDown(self):
+        shutil.rmtree('csv/'+self.shard_directory)
+        os.remove('csv/'+self.joined_file_name)
+
+    def criteria(self, **fields):
+        criteria = dict(restaurant_name=None, max_distance=None, max_price=None,
+                        min_customer_rating=None, cuisine=None)
+        criteria.update(fields)
+        return RestaurantCriteria(**criteria)
+
+    def criterias(self):
+        return [
+            self.criteria(),
+            self.criteria(max_price=12),
+            self.criteria(max_distance=1.5, min_customer_rating=3),
+            self.criteria(min_customer_rating=5),
+            self.criteria(cuisine='ch', max_price=40),
+            self.criteria(restaurant_name='grill 1', max_name_edits=1),
+            self.criteria(max_distance=0.5),
+        ]
+
+    def test_find_shards(self):
+        shards = [f'{self.shard_directory}/{shard}' for shard in sorted(self.shards)]
+        self.assertEqual(find_shards(self.shard_directory, 'cuisines.csv'), shards)
+        self.assertEqual(find_shards(self.shard_directory + '/*.csv', 'cuisines.csv'), shards)
+        self.assertEqual(find_shards(self.shard_directory + '/b_*', 'cuisines.csv'), shards[1:2])
+        self.assertNotIn('cuisines.csv', find_shards('*.csv', 'cuisines.csv'))
+        self.assertNotIn(f'{self.shard_directory}/e_cuisines.csv',
+                         find_shards(self.shard_directory + '/*', 'cuisines.csv'))
+        self.assertEqual(find_shards('nowhere', 'cuisines.csv'), [])
+
+    def test_same_as_one_csv(self):
+        for workers in [1, 3]:
+            program = ShardedFilterRestaurantsCSVProgram(
+                'cuisines.csv', self.shard_directory, workers=workers)
+            # Searched twice, before and after the shards are summarized
+            for _ in range(2):
+                for criteria in self.criterias():
+                    for limit in [1, 7, 1000]:
+                        self.assertEqual(program.get_best_matched_restaurants(criteria, limit),
+                                         self.joined.get_best_matched_restaurants(criteria, limit))
+
+    def test_pages_and_batches(self):
+        program = ShardedFilterRestaurantsCSVProgram('cuisines.csv', self.shard_directory, workers=1)
+        criterias = self.criterias()
+        self.assertEqual(program.get_best_matched_restaurants_for_each(criterias, [7] * len(criterias)),
+                         self.joined.get_best_matched_restaurants_for_each(criterias, [7] * len(criterias)))
+
+        criteria = self.criteria(max_price=40)
+        cursor = None
+        for _ in range(3):
+            page = program.get_best_matched_restaurants_page(criteria, 6, cursor)
+            self.assertEqual(page, self.joined.get_best_matched_restaurants_page(criteria, 6, cursor))
+            cursor = page.cursor
+
+    def test_skips_shards_which_cant_match(self):
+        program = ShardedFilterRestaurantsCSVProgram('cuisines.csv', self.shard_directory, workers=1)
+        program.get_best_matched_restaurants(self.criteria())
+        self.assertTrue(os.path.exists(summary_path(
+            'cuisines.csv', f'{self.shard_directory}/a_cheap.csv')))
+
+        def searched(criteria):
+            return [shard.split('/')[-1] for shard, _, _ in program._shards_to_search(criteria)]
+
+        self.assertEqual(searched(self.criteria()), ['a_cheap.csv', 'b_pricey.csv', 'c_far.csv'])
+        self.assertEqual(searched(self.criteria(max_price=20)), ['a_cheap.csv', 'c_far.csv'])
+        self.assertEqual(searched(self.criteria(max_distance=5)), ['a_cheap.csv', 'b_pricey.csv'])
+        self.assertEqual(searched(self.criteria(min_customer_rating=5)), ['b_pricey.csv', 'c_far.csv'])
+        self.assertEqual(searched(self.criteria(max_distance=0.5)), [])
+        # Distances from an origin aren't bounded by the summaries
+        self.assertEqual(searched(self.criteria(max_distance=0.5, origin=(42.36, -71.06))),
+                         ['a_cheap.csv', 'b_pricey.csv', 'c_far.csv'])
+
+        # Summaries are loaded from disk by a new program, and skipped shards aren't read or hashed
+        program = ShardedFilterRestaurantsCSVProgram('cuisines.csv', self.shard_directory, workers=1)
+        with mock.patch.object(FilterRestaurantsCSVProgram, '_parse_restaurant_chunks',
+                               autospec=True, side_effect=FilterRestaurantsCSVProgram._parse_restaurant_chunks) as parse, \
+                mock.patch('catalog.snapshot.file_fingerprint') as fingerprint:
+            criteria = self.criteria(max_price=12, max_distance=5)
+            self.assertEqual(program.get_best_matched_restaurants(criteria, 10),
+                             self.joined.get_best_matched_restaurants(criteria, 10))
+        fingerprint.assert_not_called()
+        self.assertEqual([call.args[0].restaurant_file_name for call in parse.call_args_list],
+                         [f'{self.shard_directory}/a_cheap.csv', self.joined_file_name])
+
+    def test_changed_shard_is_summarized_again(self):
+        program = ShardedFilterRestaurantsCSVProgram('cuisines.csv', self.shard_directory, workers=1)
+        criteria = self.criteria(max_price=20, max_distance=5)
+        program.get_best_matched_restaurants(criteria)
+
+        with open(f'csv/{self.shard_directory}/b_pricey.csv', 'a') as csvfile:
+            csvfile.write('Cheap Eats,5,1,10,3\n')
+        restaurants = program.get_best_matched_restaurants(criteria)
+        self.assertEqual(restaurants[0].name, 'Cheap Eats')
+        self.assertIn(f'{self.shard_directory}/b_pricey.csv',
+                      [shard for shard, _, _ in program._shards_to_search(criteria)])
+
+
+class TestShardSummary(unittest.TestCase):
+    '''Tests which criteria a shard summary rules out'''
+
+    def test_can_match(self):
+        summary = ShardSummary(rows=3, min_distance=2, min_price=15, max_rating=4,
+                               cuisines={'Thai', 'Korean'})
+
+        def criteria(**fields):
+            criteria = dict(restaurant_name=None, max_distance=None, max_price=None,
+                            min_customer_rating=None, cuisine=None)
+            criteria.update(fields)
+            return RestaurantCriteria(**criteria)
+
+        self.assertTrue(summary.can_match(criteria()))
+        self.assertTrue(summary.can_match(criteria(max_distance=2, max_price=15, min_customer_rating=4,
+                                                   cuisine='kor', restaurant_name='zzz')))
+        self.assertFalse(summary.can_match(criteria(max_distance=1.5)))
+        self.assertFalse(summary.can_match(criteria(max_price=10)))
+        self.assertFalse(summary.can_match(criteria(min_customer_rating=5)))
+        self.assertFalse(summary.can_match(criteria(cuisine='chinese')))
+        self.assertTrue(summary.can_match(criteria(max_distance=1.5, origin=(0, 0))))
+        self.assertFalse(ShardSummary().can_match(criteria()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import shutil
+import unittest
+from itertools import chain
+from unittest import mock
+from index import RestaurantCriteria
+from search_restaurants_program import FilterRestaurantsCSVProgram
+from catalog.snapshot import RestaurantSnapshot, SnapshotColumns, snapshot_path
+
+
+class TestRestaurantSnapshot(unittest.TestCase):
+    '''
+    Tests that parsed csv files are loaded from their snapshot until one of
+    the csv files changes.
+    '''
+
+    def setUp(self):
+        self.restaurant_file_name = 'snapshot_test_restaurants.csv'
+        shutil.copy('csv/boston_restaurants.csv',
+                    'csv/'+self.restaurant_file_name)
+        self.program = FilterRestaurantsCSVProgram(
+            'cuisines.csv', self.restaurant_file_name, use_snapshot=True)
+        self.expected = list(FilterRestaurantsCSVProgram(
+            'cuisines.csv', self.restaurant_file_name).read_restaurants())
+
+    def tearDown(self):
+        for path in ['csv/'+self.restaurant_file_name,
+                     snapshot_path('cuisines.csv', self.restaurant_file_name)]:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_builds_then_loads_snapshot(self):
+        self.assertEqual(list(self.program.read_restaurants()), self.expected)
+        self.assertTrue(os.path.exists(snapshot_path(
+            'cuisines.csv', self.restaurant_file_name)))
+
+        with mock.patch.object(self.program, '_parse_restaurant_chunks') as parse:
+            self.assertEqual(
+                list(self.program.read_restaurants()), self.expected)
+            parse.assert_not_called()
+
+    def test_rebuilds_when_csv_changes(self):
+        list(self.program.read_restaurants())
+        with open('csv/'+self.restaurant_file_name, 'a') as csvfile:
+            csvfile.write('\nNew Place,5,0.5,12,3')
+
+        restaurants = list(self.program.read_restaurants())
+        self.assertEqual(restaurants[:-1], self.expected)
+        self.assertEqual(restaurants[-1].name, 'New Place')
+        self.assertEqual(restaurants[-1].cuisine, 'Thai')
+
+    def test_searches_same_as_csv(self):
+        csv_program = FilterRestaurantsCSVProgram('cuisines.csv', self.restaurant_file_name)
+        criterias = [
+            dict(),
+            dict(restaurant_name='grill', max_distance=5),
+            dict(max_price=20, min_customer_rating=3, cuisine='chi'),
+            dict(restaurant_name='delicous', max_name_edits=2),
+            dict(max_distance=1, origin=(42.36, -71.06)),
+        ]
+        list(self.program.read_restaurants())
+        for fields in criterias:
+            criteria = RestaurantCriteria(**dict(dict(restaurant_name=None, max_distance=None, max_price=None,
+                                                      min_customer_rating=None, cuisine=None), **fields))
+            with mock.patch.object(self.program, '_parse_restaurant_chunks') as parse:
+                self.assertEqual(self.program.get_best_matched_restaurants(criteria, 10),
+                                 csv_program.get_best_matched_restaurants(criteria, 10))
+                parse.assert_not_called()
+            # Only the rows passing the criteria are made into Restaurants
+            self.assertEqual(list(chain.from_iterable(self.program.read_restaurant_chunks_for(criteria))),
+                             list(chain.from_iterable(csv_program.read_restaurant_chunks_for(criteria))))
+
+    def test_stale_fingerprint_is_not_loaded(self):
+        snapshot = RestaurantSnapshot('cuisines.csv', self.restaurant_file_name)
+        fingerprints = snapshot.fingerprints()
+        snapshot.write(fingerprints, SnapshotColumns.from_restaurants(self.expected))
+        self.assertEqual(list(snapshot.load(fingerprints)), self.expected)
+
+        size, mtime, content_hash = fingerprints[1]
+        self.assertIsNone(snapshot.load(
+            [fingerprints[0], (size, mtime, 'changed')]))
+
+
+if __name__ == '__main__':
+    unittest.main()
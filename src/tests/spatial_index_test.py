@@ -0,0 +1,133 @@
+import csv
+import os
+import random
+import unittest
+from index import RestaurantCriteria
+from search_restaurants_program import FilterRestaurantsCSVProgram
+from catalog.columnar_catalog import ColumnarRestaurantCatalog, numpy
+from catalog.restaurant_catalog import RestaurantCatalog
+from catalog.spatial_index import SpatialGrid, haversine_miles
+
+
+class TestSpatialIndex(unittest.TestCase):
+    '''
+    Tests searching from an origin with the latitude and longitude columns:
+    the catalogs' spatial index must give the same results as measuring the
+    distance to every restaurant.
+    '''
+
+    @classmethod
+    def setUpClass(cls):
+        cls.restaurant_file_name = 'spatial_test_restaurants.csv'
+        generator = random.Random(16)
+        with open('csv/'+cls.restaurant_file_name, 'w', newline='') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(['name', 'customer_rating', 'distance',
+                             'price', 'cuisine_id', 'latitude', 'longitude'])
+            for i in range(3000):
+                # Clustered around Boston, with some spread across the globe
+                if i % 10:
+                    latitude = 42.36 + generator.gauss(0, 0.2)
+                    longitude = -71.06 + generator.gauss(0, 0.2)
+                else:
+                    latitude = generator.uniform(-89, 89)
+                    longitude = generator.uniform(-180, 180)
+                coordinates = ['', ''] if i % 97 == 0 else [
+                    round(latitude, 5), round(longitude, 5)]
+                writer.writerow([f'Place {generator.choice(["Pho", "Taco", "Deli"])} {i}', generator.randint(1, 5),
+                                 generator.randint(1, 10), generator.randrange(10, 55, 5),
+                                 generator.randint(1, 19)] + coordinates)
+
+        cls.program = FilterRestaurantsCSVProgram(
+            'cuisines.csv', cls.restaurant_file_name)
+        cls.catalog = RestaurantCatalog(
+            'cuisines.csv', cls.restaurant_file_name)
+        # Every restaurant is located and checked when scanning the csv
+        cls.expected_valid = [list(cls.program.iter_valid_restaurants(criteria))
+                              for criteria in cls.criterias()]
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove('csv/'+cls.restaurant_file_name)
+
+    @classmethod
+    def criterias(cls):
+        for origin in [(42.36, -71.06), (42.5, -71.3), (0, 179.99), (89.5, 10), (-33.9, 151.2)]:
+            yield RestaurantCriteria(restaurant_name=None, max_distance=None, max_price=None,
+                                     min_customer_rating=None, cuisine=None, origin=origin)
+            yield RestaurantCriteria(restaurant_name='pho', max_distance=5, max_price=None,
+                                     min_customer_rating=3, cuisine=None, origin=origin)
+            yield RestaurantCriteria(restaurant_name=None, max_distance=0.5, max_price=30,
+                                     min_customer_rating=None, cuisine=None, origin=origin)
+            yield RestaurantCriteria(restaurant_name=None, max_distance=3000, max_price=None,
+                                     min_customer_rating=None, cuisine='th', origin=origin)
+
+    def test_haversine(self):
+        # Boston to New York City is about 190 miles
+        self.assertAlmostEqual(haversine_miles(
+            (42.3601, -71.0589), 40.7128, -74.0060), 190.2, places=0)
+        self.assertEqual(haversine_miles((10, 20), 10, 20), 0)
+
+    def test_rows_within_includes_every_close_row(self):
+        generator = random.Random(0)
+        grid = SpatialGrid(cell_degrees=0.5)
+        points = [(generator.uniform(-90, 90), generator.uniform(-180, 180))
+                  for _ in range(2000)]
+        for row, (latitude, longitude) in enumerate(points):
+            grid.add(row, latitude, longitude)
+
+        for origin in [(0, 0), (0, 179.9), (0, -179.9), (88, 45), (-89.9, 0), (51.5, -0.1)]:
+            for radius in [10, 200, 1500, 13000]:
+                rows = grid.rows_within(origin, radius)
+                self.assertEqual(rows, sorted(rows))
+                close_rows = {row for row, point in enumerate(points)
+                              if haversine_miles(origin, *point) <= radius}
+                self.assertTrue(close_rows.issubset(rows))
+                if radius < 1500:
+                    self.assertLess(len(rows), len(points))
+
+    def test_catalog_matches_scan(self):
+        for criteria, valid in zip(self.criterias(), self.expected_valid):
+            for limit in [1, 5, 40]:
+                with self.subTest(criteria=criteria, limit=limit):
+                    self.assertEqual(self.catalog.get_best_matched_restaurants(criteria, limit),
+                                     self.program._get_top_restaurants(valid, limit))
+            self.assertEqual(
+                list(self.catalog.iter_valid_restaurants(criteria)), valid)
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_columnar_catalog_matches_scan(self):
+        columnar = ColumnarRestaurantCatalog(
+            'cuisines.csv', self.restaurant_file_name)
+        for criteria, valid in zip(self.criterias(), self.expected_valid):
+            for limit in [1, 5, 40]:
+                with self.subTest(criteria=criteria, limit=limit):
+                    self.assertEqual(columnar.get_best_matched_restaurants(criteria, limit),
+                                     self.program._get_top_restaurants(valid, limit))
+            self.assertEqual(
+                list(columnar.iter_valid_restaurants(criteria)), valid)
+
+    def test_distances_measured_from_origin(self):
+        criteria = RestaurantCriteria(restaurant_name=None, max_distance=2, max_price=None,
+                                      min_customer_rating=None, cuisine=None, origin=(42.36, -71.06))
+        restaurants = self.catalog.get_best_matched_restaurants(criteria, 20)
+        self.assertEqual(len(restaurants), 20)
+        self.assertEqual([r.distance for r in restaurants],
+                         sorted(r.distance for r in restaurants))
+        for restaurant in restaurants:
+            self.assertLessEqual(restaurant.distance, 2)
+            self.assertEqual(restaurant.distance, round(haversine_miles(
+                criteria.origin, restaurant.latitude, restaurant.longitude), 2))
+
+    def test_without_coordinates(self):
+        # The sample csv has no coordinates, so nothing is found from an origin
+        catalog = RestaurantCatalog('cuisines.csv', 'restaurants.csv')
+        self.assertTrue(all(r.latitude is None for r in catalog.restaurants))
+        criteria = RestaurantCriteria(restaurant_name=None, max_distance=None, max_price=None,
+                                      min_customer_rating=None, cuisine=None, origin=(42.36, -71.06))
+        self.assertEqual(catalog.get_best_matched_restaurants(criteria), [])
+        self.assertEqual(catalog.plan(criteria).access_path, 'spatial')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+from itertools import product
+from index import RestaurantCriteria
+from search_restaurants_program import FilterRestaurantsCSVProgram
+from specifications.base_specification import BaseSpecification
+from specifications.compiler import compile_specification
+from specifications.restaurant import *
+
+
+class RestaurantIsFarAway(BaseSpecification):
+    '''A specification without an expression of its own'''
+
+    def is_satisfied_by(self, restaurant, criteria):
+        return restaurant.distance > 5
+
+
+class TestCompileSpecification(unittest.TestCase):
+    '''
+    Tests that compiled specification trees agree with evaluating the tree
+    for every restaurant and criteria.
+    '''
+
+    def setUp(self):
+        self.restaurants = list(FilterRestaurantsCSVProgram(
+            'cuisines.csv', 'restaurants.csv').read_restaurants())
+        self.restaurants.append(Restaurant(
+            name='Hilltop  Delicious', customer_rating=3, distance=3, average_price=45, cuisine='Japanese'))
+        self.criterias = [RestaurantCriteria(restaurant_name=name, max_distance=distance,
+                                             max_price=price, min_customer_rating=rating, cuisine=cuisine)
+                          for name, distance, price, rating, cuisine in product(
+                              [None, '', 'delic', 'Hilltop D', 'ZZZ'], [None, 4.5],
+                              [None, 20], [None, 3], [None, 'chi'])]
+
+    def assert_compiles_equivalently(self, specification):
+        for criteria in self.criterias:
+            is_satisfied = compile_specification(specification, criteria)
+            for restaurant in self.restaurants:
+                self.assertEqual(is_satisfied(restaurant),
+                                 specification.is_satisfied_by(restaurant, criteria))
+
+    def test_all_criteria(self):
+        self.assert_compiles_equivalently(restaurant_criteria_specification())
+
+    def test_combinators(self):
+        self.assert_compiles_equivalently(
+            RestaurantIsTheRightName() | -RestaurantIsCheapEnough())
+        self.assert_compiles_equivalently(
+            -(RestaurantIsCloseEnough() & RestaurantIsTheRightCuisine()) | RestaurantIsRatedWellEnough())
+
+    def test_falls_back_to_is_satisfied_by(self):
+        self.assert_compiles_equivalently(
+            RestaurantIsFarAway() & RestaurantIsTheRightName())
+
+    def test_removes_unfiltered_criteria(self):
+        criteria = RestaurantCriteria(restaurant_name=None, max_distance=None,
+                                      max_price=None, min_customer_rating=None, cuisine=None)
+        self.assertIsNone(
+            restaurant_criteria_specification().to_expression(criteria, repr))
+
+
+if __name__ == '__main__':
+    unittest.main()
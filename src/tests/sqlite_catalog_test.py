@@ -0,0 +1,189 @@
+import os
+import shutil
+import unittest
+from unittest import mock
+from index import RestaurantCriteria
+from catalog.sqlite_catalog import SQLiteRestaurantCatalog, search_name
+from search_restaurants_program import FilterRestaurantsCSVProgram
+from specifications.compiler import compile_specification_to_sql
+from specifications.restaurant import (RestaurantIsCheapEnough, RestaurantIsCloseEnough, RestaurantIsRatedWellEnough,
+                                       RestaurantIsTheRightCuisine, RestaurantIsTheRightName)
+
+
+class TestSQLiteCatalog(unittest.TestCase):
+    '''
+    Tests that the SQLite catalog answers searches exactly as the program
+    does, with specifications translated into SQL.
+    '''
+
+    def setUp(self):
+        self.restaurant_file_name = 'sqlite_test_restaurants.csv'
+        shutil.copy('csv/restaurants.csv', 'csv/'+self.restaurant_file_name)
+        with open('csv/'+self.restaurant_file_name, 'a') as csvfile:
+            # Non ASCII names, which SQLite's lower() would not lowercase
+            csvfile.write('\nÉclair Épicerie,4,2,15,3\nCafé ÉTÉ,5,1,25,4\n'
+                          'Éclair Épicerie,4,2,15,3\n')
+        self.program = FilterRestaurantsCSVProgram(
+            'cuisines.csv', self.restaurant_file_name)
+        self.catalog = SQLiteRestaurantCatalog(
+            'cuisines.csv', self.restaurant_file_name)
+
+    def tearDown(self):
+        self.catalog.connection.close()
+        os.remove(self.catalog.path)
+        os.remove('csv/'+self.restaurant_file_name)
+
+    def criteria(self, **fields):
+        criteria = dict(restaurant_name=None, max_distance=None, max_price=None,
+                        min_customer_rating=None, cuisine=None)
+        criteria.update(fields)
+        return RestaurantCriteria(**criteria)
+
+    def test_matches_program(self):
+        criterias = [
+            self.criteria(),
+            self.criteria(restaurant_name='grill'),
+            self.criteria(restaurant_name='GRI', cuisine='chin'),
+            self.criteria(restaurant_name='éc'),
+            self.criteria(restaurant_name='été'),
+            self.criteria(restaurant_name='two words'),
+            self.criteria(cuisine='a', max_price=30),
+            self.criteria(max_distance=3, min_customer_rating=4),
+            self.criteria(restaurant_name='h', max_distance=6,
+                          max_price=40, min_customer_rating=2, cuisine='a'),
+        ]
+        for criteria in criterias:
+            for limit in [1, 5, 300]:
+                with self.subTest(criteria=criteria, limit=limit):
+                    self.assertEqual(self.catalog.get_best_matched_restaurants(criteria, limit),
+                                     self.program.get_best_matched_restaurants(criteria, limit))
+            # The program yields duplicate rows, the catalog keeps one
+            self.assertEqual(list(self.catalog.iter_valid_restaurants(criteria)),
+                             list(dict.fromkeys(self.program.iter_valid_restaurants(criteria))))
+
+    def test_combinators(self):
+        criteria = self.criteria(restaurant_name='grill', max_distance=4, max_price=20,
+                                 min_customer_rating=4, cuisine='th')
+        name, cuisine = RestaurantIsTheRightName(), RestaurantIsTheRightCuisine()
+        cheap, close, rated = RestaurantIsCheapEnough(), RestaurantIsCloseEnough(), RestaurantIsRatedWellEnough()
+        specifications = [
+            name | cuisine,
+            -(cheap & close),
+            (rated | -name) & -(-close),
+            -(name & (cuisine | cheap)) | rated,
+            # Criteria not filtered for are always satisfied
+            -(RestaurantIsCheapEnough() & RestaurantIsTheRightName()),
+        ]
+        restaurants = list(self.program.read_restaurants())
+        for specification in specifications:
+            for fields in [criteria, self.criteria(max_price=20)]:
+                with self.subTest(specification=specification, criteria=fields):
+                    condition, parameters = compile_specification_to_sql(
+                        specification, fields)
+                    rows = self.catalog.connection.execute(
+                        f'SELECT name, distance, average_price FROM restaurants AS r WHERE {condition} ORDER BY rowid',
+                        parameters).fetchall()
+                    expected = [(r.name, r.distance, r.average_price) for r in dict.fromkeys(restaurants)
+                                if specification.is_satisfied_by(r, fields)]
+                    self.assertEqual(rows, expected)
+
+    def test_values_are_parameters(self):
+        condition, parameters = compile_specification_to_sql(
+            RestaurantIsTheRightName(), self.criteria(restaurant_name="o');DROP/**/TABLE/**/restaurants;--"))
+        self.assertNotIn('DROP', condition)
+        self.assertEqual(list(parameters.values()), [
+                         " o');drop/**/table/**/restaurants;--"])
+
+    def test_drops_duplicates(self):
+        self.assertEqual(len(self.catalog), len(
+            set(self.program.read_restaurants())))
+        self.assertEqual(search_name('Café ÉTÉ'), ' café été')
+
+    def test_reuses_database(self):
+        self.catalog.connection.close()
+        with mock.patch.object(SQLiteRestaurantCatalog, '_import') as import_csvs:
+            catalog = SQLiteRestaurantCatalog(
+                'cuisines.csv', self.restaurant_file_name)
+            import_csvs.assert_not_called()
+        self.assertEqual(catalog.get_best_matched_restaurants(self.criteria()),
+                         self.program.get_best_matched_restaurants(self.criteria()))
+        self.catalog = catalog
+
+        # Any change to a csv file makes the database stale
+        with open('csv/'+self.restaurant_file_name, 'a') as csvfile:
+            csvfile.write('New Place,5,0.1,10,3\n')
+        self.catalog.connection.close()
+        self.catalog = SQLiteRestaurantCatalog(
+            'cuisines.csv', self.restaurant_file_name)
+        self.assertEqual(self.catalog.get_best_matched_restaurants(self.criteria(), 1)[0].name,
+                         'New Place')
+
+    def test_unreadable_database_is_imported_again(self):
+        self.catalog.connection.close()
+        with open(self.catalog.path, 'wb') as database:
+            database.write(b'not a database')
+        self.catalog = SQLiteRestaurantCatalog(
+            'cuisines.csv', self.restaurant_file_name)
+        self.assertEqual(len(self.catalog), len(
+            set(self.program.read_restaurants())))
+
+    def test_plan_uses_indexes(self):
+        query, parameters = self.catalog._select(
+            self.criteria(max_distance=1), 5)
+        plan = ' '.join(row[3] for row in self.catalog.connection.execute(
+            'EXPLAIN QUERY PLAN ' + query, parameters))
+        self.assertIn('USING INDEX', plan)
+
+    def test_stats(self):
+        collected_stats = []
+        self.catalog.add_stats_collector(collected_stats.append)
+        criteria = self.criteria(max_distance=3)
+        results = self.catalog.get_best_matched_restaurants(criteria)
+
+        stats, = collected_stats
+        self.assertEqual(results, self.program.get_best_matched_restaurants(criteria))
+        self.assertIn('restaurants_distance', stats.access_path)
+        self.assertEqual(stats.matches, len(
+            list(self.catalog.iter_valid_restaurants(criteria))))
+        self.assertIsNone(stats.rows_read)
+        self.assertNotIn('Restaurants read', stats.format())
+
+    def test_origin(self):
+        with open('csv/'+self.restaurant_file_name, 'w') as csvfile:
+            csvfile.write('name,customer_rating,distance,price,cuisine_id,latitude,longitude\n'
+                          'Near,3,9,10,1,42.37,-71.06\nFar,5,1,10,2,42.6,-71.5\n'
+                          'Nowhere,5,1,10,2,,\nNearest,1,9,10,3,42.361,-71.061\n')
+        self.catalog.reload()
+        for criteria in [self.criteria(origin=(42.36, -71.06)),
+                         self.criteria(origin=(42.36, -71.06), max_distance=5)]:
+            self.assertEqual(self.catalog.get_best_matched_restaurants(criteria),
+                             self.program.get_best_matched_restaurants(criteria))
+            self.assertEqual(list(self.catalog.iter_valid_restaurants(criteria)),
+                             list(self.program.iter_valid_restaurants(criteria)))
+
+    def test_origin_drops_located_duplicates(self):
+        # The same restaurant once located, stored with different distances
+        with open('csv/'+self.restaurant_file_name, 'w') as csvfile:
+            csvfile.write('name,customer_rating,distance,price,cuisine_id,latitude,longitude\n'
+                          'Twice,4,9,10,1,42.37,-71.06\nOther,4,1,10,1,42.38,-71.06\n'
+                          'Twice,4,2,10,1,42.37,-71.06\nNowhere,4,1,10,1,,\nNowhere,4,2,10,1,,\n')
+        self.catalog.reload()
+        criteria = self.criteria(origin=(42.36, -71.06))
+        for limit in [1, 2, 5]:
+            with self.subTest(limit=limit):
+                self.assertEqual(self.catalog.get_best_matched_restaurants(criteria, limit),
+                                 self.program.get_best_matched_restaurants(criteria, limit))
+        self.assertEqual(list(self.catalog.iter_valid_restaurants(criteria)),
+                         list(dict.fromkeys(self.program.iter_valid_restaurants(criteria))))
+        self.assertEqual([r.name for r in self.catalog.iter_valid_restaurants(criteria)],
+                         ['Twice', 'Other'])
+
+        # Pages don't repeat it either
+        page = self.catalog.get_best_matched_restaurants_page(criteria, 1)
+        second = self.catalog.get_best_matched_restaurants_page(criteria, 5, page.cursor)
+        self.assertEqual(page.restaurants + second.restaurants,
+                         self.program.get_best_matched_restaurants(criteria, 5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import random
+import tracemalloc
+import unittest
+from index import RestaurantCriteria
+from search_restaurants_program import FilterRestaurantsCSVProgram
+
+# Parsing one chunk of 10000 rows takes around 9MB
+MEMORY_CEILING = 16 * 1024 * 1024
+
+
+class TestStreamingMemory(unittest.TestCase):
+    '''
+    Tests that searching a large generated restaurant csv streams it through
+    the filtering and top k ranking, so peak memory stays the same however
+    many rows the csv has.
+    '''
+
+    def setUp(self):
+        self.file_names = {}
+        generator = random.Random(8)
+        for rows in [20000, 100000]:
+            file_name = f'streaming_test_{rows}_restaurants.csv'
+            with open('csv/'+file_name, 'w') as csvfile:
+                csvfile.write('name,customer_rating,distance,price,cuisine_id\n')
+                for row in range(rows):
+                    csvfile.write(f'Restaurant {row} Grill,{generator.randint(1, 5)},'
+                                  f'{generator.randint(1, 10)},{generator.randint(10, 50)},'
+                                  f'{generator.randint(1, 19)}\n')
+            self.file_names[rows] = file_name
+
+    def tearDown(self):
+        for file_name in self.file_names.values():
+            os.remove('csv/'+file_name)
+
+    def peak_search_memory(self, file_name):
+        '''Returns the peak bytes allocated while matching every restaurant'''
+
+        program = FilterRestaurantsCSVProgram('cuisines.csv', file_name)
+        criteria = RestaurantCriteria(restaurant_name=None, max_distance=None,
+                                      max_price=None, min_customer_rating=None, cuisine=None)
+        tracemalloc.start()
+        try:
+            top_restaurants = program.get_best_matched_restaurants(
+                criteria, limit=10)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        self.assertEqual(len(top_restaurants), 10)
+        return peak
+
+    def test_memory_ceiling(self):
+        small_peak = self.peak_search_memory(self.file_names[20000])
+        large_peak = self.peak_search_memory(self.file_names[100000])
+
+        # 5 times the rows, yet the peak is bounded by the chunk being parsed
+        self.assertLess(large_peak, small_peak * 1.25)
+        self.assertLess(large_peak, MEMORY_CEILING)
+
+
+if __name__ == '__main__':
+    unittest.main()
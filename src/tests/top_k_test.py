@@ -0,0 +1,45 @@
+import unittest
+import random
+from search_restaurants_program import Restaurant
+from ranking.top_k import TopRestaurants, rank_key
+
+
+class TestTopRestaurants(unittest.TestCase):
+    '''
+    Tests that the bounded top k ranking returns exactly what sorting every
+    restaurant and slicing does, ties included.
+    '''
+
+    def setUp(self):
+        generator = random.Random(12)
+        # Few distinct values so that there are many ties
+        self.restaurants = [Restaurant(
+            name=f'Restaurant {i}',
+            customer_rating=generator.randint(1, 5),
+            distance=generator.choice([1, 1.5, 2]),
+            average_price=generator.choice([10, 20]),
+            cuisine='Thai'
+        ) for i in range(300)]
+
+    def test_matches_sort(self):
+        for limit in [1, 5, 17, 300, 1000]:
+            top_restaurants = TopRestaurants(limit)
+            top_restaurants.add_all(self.restaurants)
+            self.assertEqual(top_restaurants.results(), sorted(
+                self.restaurants, key=rank_key)[:limit])
+
+    def test_keeps_only_limit(self):
+        top_restaurants = TopRestaurants(3)
+        for restaurant in self.restaurants:
+            top_restaurants.add(restaurant)
+            self.assertLessEqual(len(top_restaurants), 3)
+
+    def test_duplicates_kept_once(self):
+        top_restaurants = TopRestaurants(10)
+        top_restaurants.add_all(self.restaurants + self.restaurants)
+        self.assertEqual(top_restaurants.results(), sorted(
+            self.restaurants, key=rank_key)[:10])
+
+
+if __name__ == '__main__':
+    unittest.main()